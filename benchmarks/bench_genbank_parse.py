@@ -0,0 +1,79 @@
+"""
+bench_genbank_parse.py
+
+Compare the lightweight flatfile parser with the Biopython SeqIO path on a
+synthetic SARS-CoV-2-sized GenBank record (30 kb ORIGIN, ~25 annotated features).
+
+    python -m benchmarks.bench_genbank_parse --repeat 200
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import timeit
+
+from ingest.genbank import parse_genbank_minimal, parse_genbank_minimal_seqio
+
+
+def synthetic_flatfile(length: int = 29903, n_features: int = 25, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    seq = "".join(rng.choice("acgt") for _ in range(length))
+
+    lines = [
+        f"LOCUS       {'SYN000001':<16}{length:>12} bp    RNA     linear   VRL 01-JAN-2021",
+        "DEFINITION  Synthetic SARS-CoV-2-like record.",
+        "ACCESSION   SYN000001",
+        "VERSION     SYN000001.1",
+        "KEYWORDS    .",
+        "SOURCE      Severe acute respiratory syndrome coronavirus 2 (SARS-CoV-2)",
+        "  ORGANISM  Severe acute respiratory syndrome coronavirus 2",
+        "            Viruses; Riboviria; Orthornavirae; Pisuviricota; Pisoniviricetes;",
+        "            Nidovirales; Cornidovirineae; Coronaviridae; Betacoronavirus.",
+        "FEATURES             Location/Qualifiers",
+        f"     source          1..{length}",
+        '                     /organism="Severe acute respiratory syndrome coronavirus',
+        '                     2"',
+        '                     /mol_type="genomic RNA"',
+        '                     /host="Homo sapiens"',
+        '                     /country="USA: Illinois"',
+        '                     /collection_date="2021-01-05"',
+    ]
+    step = length // n_features
+    for i in range(n_features):
+        start, end = i * step + 1, (i + 1) * step
+        protein = "".join(rng.choice("ACDEFGHIKLMNPQRSTVWY") for _ in range(step // 3))
+        lines += [
+            f"     CDS             {start}..{end}",
+            f'                     /gene="G{i}"',
+            f'                     /product="protein {i}"',
+            f'                     /translation="{protein[:44]}',
+        ]
+        lines += [f"                     {protein[j:j + 58]}" for j in range(44, len(protein), 58)]
+        lines[-1] += '"'
+    lines.append("ORIGIN      ")
+    for i in range(0, length, 60):
+        chunk = seq[i : i + 60]
+        blocks = " ".join(chunk[j : j + 10] for j in range(0, len(chunk), 10))
+        lines.append(f"{i + 1:>9} {blocks}")
+    lines.append("//")
+    return "\n".join(lines) + "\n"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--repeat", type=int, default=100)
+    args = ap.parse_args()
+
+    text = synthetic_flatfile()
+    assert parse_genbank_minimal(text, "SYN000001.1") == parse_genbank_minimal_seqio(text, "SYN000001.1")
+
+    fast = timeit.timeit(lambda: parse_genbank_minimal(text, "SYN000001.1"), number=args.repeat)
+    slow = timeit.timeit(lambda: parse_genbank_minimal_seqio(text, "SYN000001.1"), number=args.repeat)
+
+    print(f"flatfile parser : {fast / args.repeat * 1e3:8.3f} ms/record")
+    print(f"SeqIO parser    : {slow / args.repeat * 1e3:8.3f} ms/record")
+    print(f"speedup         : {slow / fast:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+bench_import_time.py
+
+Import cost of the ingest modules, measured in a fresh interpreter with
+`python -X importtime`, checked against per-module budgets.
+
+    python -m benchmarks.bench_import_time
+
+Budgets are generous for slow CI machines; the hard guarantee is the
+`forbidden` list: heavy dependencies that a module must not import eagerly.
+tests/test_import_time.py runs the same checks.
+"""
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+HEAVY = ("Bio", "pandas", "numpy")
+
+
+@dataclass(frozen=True)
+class ImportBudget:
+    module: str
+    budget_ms: float
+    forbidden: tuple[str, ...]
+
+
+BUDGETS = [
+    ImportBudget("ingest.io", 150, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.mutations", 100, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.scoring", 100, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.flatfile", 100, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.genbank", 100, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.store", 150, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.fasta", 150, ("Bio", "pandas", "numpy")),
+    ImportBudget("ingest.analytics", 300, ("Bio", "pandas")),
+]
+
+
+def measure_import(module: str) -> tuple[float, set[str]]:
+    """Return (cumulative import ms, heavy packages loaded) for `module`."""
+    code = (
+        f"import sys, {module}; "
+        f"print(' '.join(m for m in {HEAVY!r} if m in sys.modules))"
+    )
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True, text=True, env=env, check=True,
+    )
+    cumulative_us = 0
+    for line in proc.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            cumulative_us = int(parts[1])
+    return cumulative_us / 1000, set(proc.stdout.split())
+
+
+def check(budget: ImportBudget, repeat: int = 3) -> tuple[float, set[str], list[str]]:
+    """Return (best ms, heavy packages loaded, problems) for one module."""
+    # Best of `repeat` fresh interpreters filters out disk-cache noise.
+    runs = [measure_import(budget.module) for _ in range(repeat)]
+    best = min(ms for ms, _ in runs)
+    loaded = set().union(*(heavy for _, heavy in runs))
+
+    problems = [f"{budget.module} imports {dep} eagerly" for dep in budget.forbidden if dep in loaded]
+    if best > budget.budget_ms:
+        problems.append(f"{budget.module} takes {best:.0f} ms to import (budget {budget.budget_ms:.0f} ms)")
+    return best, loaded, problems
+
+
+def main() -> int:
+    failed = False
+    for b in BUDGETS:
+        best, loaded, problems = check(b)
+        failed |= bool(problems)
+        heavy = ",".join(sorted(loaded)) or "-"
+        status = "ok" if not problems else "FAIL: " + "; ".join(problems)
+        print(f"{b.module:<20}{best:>8.1f} ms  (budget {b.budget_ms:>4.0f})  heavy={heavy:<8}{status}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
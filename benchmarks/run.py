@@ -0,0 +1,273 @@
+"""
+run.py
+Benchmark runner for the hot paths, with saved baselines for comparison.
+
+    python -m benchmarks.run                              # all benchmarks, 1k/10k/100k
+    python -m benchmarks.run --only diff_sequences --scales 1000 10000
+    python -m benchmarks.run --save benchmarks/baseline.json
+    python -m benchmarks.run --compare benchmarks/baseline.json
+
+What "scale" means depends on the benchmark:
+
+  diff_sequences, score_genome            genome length in bases
+  gene_for_position, score_mutations,
+  parse_collection_date                   number of positions / mutations / dates
+  summarize_genomes, summarize_duplicates
+  (30% byte-identical copies),
+  write_ndjson(_parallel), load_ndjson    number of 1.5 kb records
+  mutation_index_query                    number of indexed genomes
+
+`--compare` exits with status 1 if any benchmark is slower than the
+baseline by more than `--tolerance` (default 1.25x).
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from ingest.analytics import summarize_genomes
+from ingest.genbank import parse_collection_date
+from ingest.genes import gene_for_position
+from ingest.io import load_ndjson, write_ndjson, write_ndjson_parallel
+from ingest.mutation_index import MutationIndex, build_mutation_index
+from ingest.mutations import Mutation, diff_sequences
+from ingest.risk import score_mutations
+from ingest.scoring import score_genome
+
+from .synthetic import (
+    synthetic_dates,
+    synthetic_genome,
+    synthetic_mutations,
+    synthetic_records,
+    synthetic_reference,
+)
+
+DEFAULT_SCALES = (1_000, 10_000, 100_000)
+RECORD_LENGTH = 1_500  # long enough to pass summarize_genomes' too_short gate
+
+# Realistic sample: ~1 SNP per kb, two amplicon dropouts, 3' end trimmed.
+GENOME_PARAMS = {"mutation_density": 1e-3, "n_runs": 2, "n_run_length": 200, "truncate": 50}
+
+
+@dataclass(frozen=True)
+class Benchmark:
+    name: str
+    setup: Callable[[int], Any]
+    run: Callable[[Any], Any]
+
+
+# Root of the scratch space for the benchmark being measured; see measure().
+_scratch_root: str | None = None
+
+
+def _tempdir() -> Path:
+    """A fresh directory for setup output, removed once the benchmark is measured."""
+    return Path(tempfile.mkdtemp(prefix="pea-bench-", dir=_scratch_root))
+
+
+def _sequence_pair(scale: int) -> tuple[str, str]:
+    ref = synthetic_reference(scale)
+    return ref, synthetic_genome(ref, **{**GENOME_PARAMS, "n_run_length": max(1, scale // 150)})
+
+
+def _records(scale: int):
+    ref = synthetic_reference(RECORD_LENGTH)
+    return synthetic_records(scale, ref, mutation_density=5e-3, n_runs=1, n_run_length=20)
+
+
+def _records_with_duplicates(scale: int, fraction: float = 0.3):
+    """`scale` records where `fraction` of them repeat an earlier genome byte for byte."""
+    unique = _records(scale - int(scale * fraction))
+    repeats = [
+        dataclasses.replace(unique[i % len(unique)], accession=f"DUP{i:07d}.1")
+        for i in range(scale - len(unique))
+    ]
+    return unique + repeats
+
+
+def _ndjson_file(scale: int) -> Path:
+    path = _tempdir() / "records.ndjson"
+    write_ndjson(_records(scale), path)
+    return path
+
+
+def _mutation_index(scale: int) -> MutationIndex:
+    """Index of `scale` genomes, ~30 calls each from a pool of common substitutions."""
+    rng = random.Random(0)
+    pool = [Mutation(pos=p, ref="A", alt="T") for p in rng.sample(range(1, 29904), 2000)]
+    pool[:2] = [Mutation(pos=23063, ref="A", alt="T"), Mutation(pos=23012, ref="G", alt="A")]
+    weights = [1 / (i + 1) for i in range(len(pool))]  # a few very common, a long tail
+    calls = ((f"SYN{i:07d}.1", set(rng.choices(pool, weights, k=30))) for i in range(scale))
+    return MutationIndex.open(
+        build_mutation_index(calls, _tempdir() / "index")
+    )
+
+
+BENCHMARKS: dict[str, Benchmark] = {
+    b.name: b
+    for b in [
+        Benchmark(
+            "diff_sequences",
+            _sequence_pair,
+            lambda pair: diff_sequences(*pair),
+        ),
+        Benchmark(
+            "gene_for_position",
+            lambda scale: [p % 29903 + 1 for p in range(0, scale * 7, 7)],
+            lambda positions: [gene_for_position(p) for p in positions],
+        ),
+        Benchmark(
+            "score_mutations",
+            synthetic_mutations,
+            score_mutations,
+        ),
+        Benchmark(
+            "score_genome",
+            lambda scale: dict(
+                zip(("reference_sequence", "sequence"), _sequence_pair(scale), strict=True),
+                accession="SYN0000001.1",
+            ),
+            score_genome,
+        ),
+        Benchmark(
+            "summarize_genomes",
+            _records,
+            summarize_genomes,
+        ),
+        Benchmark(
+            "summarize_duplicates",
+            _records_with_duplicates,
+            summarize_genomes,
+        ),
+        Benchmark(
+            "write_ndjson",
+            lambda scale: (_records(scale), _tempdir()),
+            lambda state: write_ndjson(state[0], state[1] / "records.ndjson"),
+        ),
+        Benchmark(
+            "write_ndjson_parallel",
+            lambda scale: (_records(scale), _tempdir()),
+            lambda state: write_ndjson_parallel(state[0], state[1] / "records.ndjson"),
+        ),
+        Benchmark(
+            "load_ndjson",
+            _ndjson_file,
+            load_ndjson,
+        ),
+        Benchmark(
+            "mutation_index_query",
+            _mutation_index,
+            lambda index: index.query_ids("S:N501Y AND S:E484K OR A23063T AND G23012A"),
+        ),
+        Benchmark(
+            "parse_collection_date",
+            synthetic_dates,
+            lambda dates: [parse_collection_date(d) for d in dates],
+        ),
+    ]
+}
+
+
+def measure(bench: Benchmark, scale: int, repeat: int = 3) -> dict[str, Any]:
+    global _scratch_root
+    _scratch_root = tempfile.mkdtemp(prefix="pea-bench-")
+    try:
+        state = bench.setup(scale)
+        times = []
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            bench.run(state)
+            times.append(time.perf_counter() - t0)
+        del state  # drop memmaps before removing the files behind them
+    finally:
+        shutil.rmtree(_scratch_root, ignore_errors=True)
+        _scratch_root = None
+    best = min(times)
+    return {
+        "benchmark": bench.name,
+        "scale": scale,
+        "best_seconds": best,
+        "median_seconds": statistics.median(times),
+        "per_item_us": best / scale * 1e6,
+        "repeat": repeat,
+    }
+
+
+def _key(result: dict[str, Any]) -> str:
+    return f"{result['benchmark']}@{result['scale']}"
+
+
+def compare(
+    results: list[dict[str, Any]], baseline: dict[str, Any], tolerance: float = 1.25
+) -> list[tuple[str, float]]:
+    """Return (key, slowdown ratio) for every result slower than tolerance x baseline."""
+    base = {_key(r): r for r in baseline.get("results", [])}
+    regressions = []
+    for r in results:
+        prior = base.get(_key(r))
+        if prior and prior["best_seconds"] > 0:
+            ratio = r["best_seconds"] / prior["best_seconds"]
+            if ratio > tolerance:
+                regressions.append((_key(r), ratio))
+    return regressions
+
+
+def _environment() -> dict[str, str]:
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "platform": platform.platform(),
+    }
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="Run performance benchmarks for the ingest hot paths.")
+    ap.add_argument("--only", nargs="+", choices=sorted(BENCHMARKS), help="Benchmarks to run")
+    ap.add_argument("--scales", nargs="+", type=int, default=list(DEFAULT_SCALES))
+    ap.add_argument("--repeat", type=int, default=3, help="Timed runs per benchmark (best is kept)")
+    ap.add_argument("--save", help="Write results as a baseline JSON file")
+    ap.add_argument("--compare", help="Baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown ratio")
+    args = ap.parse_args(argv)
+
+    baseline = json.loads(Path(args.compare).read_text()) if args.compare else None
+    prior = {_key(r): r for r in baseline["results"]} if baseline else {}
+
+    results = []
+    for name in args.only or list(BENCHMARKS):
+        for scale in args.scales:
+            r = measure(BENCHMARKS[name], scale, repeat=args.repeat)
+            results.append(r)
+            line = f"{_key(r):<32}{r['best_seconds']:>10.4f}s{r['per_item_us']:>12.3f} us/item"
+            if _key(r) in prior:
+                line += f"{r['best_seconds'] / prior[_key(r)]['best_seconds']:>8.2f}x"
+            print(line, flush=True)
+
+    if args.save:
+        Path(args.save).write_text(
+            json.dumps({"environment": _environment(), "results": results}, indent=2) + "\n"
+        )
+        print(f"Saved baseline -> {args.save}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for key, ratio in regressions:
+            print(f"REGRESSION {key}: {ratio:.2f}x slower than baseline")
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+"""
+synthetic.py
+Deterministic SARS-CoV-2-like genomes and records for benchmarks.
+
+Every generator takes a `seed`, so the same parameters always produce the
+same data and timings stay comparable between runs.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+
+from ingest.genes import gene_for_position
+from ingest.models import CanonicalGenomeRecord
+from ingest.mutations import Mutation
+
+GENOME_LENGTH = 29903  # NC_045512.2
+_BASES = "ACGT"
+
+
+def synthetic_reference(length: int = GENOME_LENGTH, seed: int = 0) -> str:
+    """Random reference genome, roughly SARS-CoV-2 base composition (AT-rich)."""
+    rng = random.Random(seed)
+    return "".join(rng.choices(_BASES, weights=(30, 18, 20, 32), k=length))
+
+
+def synthetic_genome(
+    reference: str,
+    *,
+    mutation_density: float = 1e-3,
+    n_runs: int = 0,
+    n_run_length: int = 200,
+    truncate: int = 0,
+    seed: int = 0,
+) -> str:
+    """
+    Derive a sample genome from `reference`.
+
+      mutation_density  fraction of positions substituted (1e-3 ~ 30 SNPs)
+      n_runs            number of N blocks (amplicon dropouts)
+      n_run_length      length of each N block
+      truncate          bases trimmed from the 3' end (partial genomes)
+    """
+    rng = random.Random(seed)
+    seq = bytearray(reference.encode("ascii"))
+    length = len(seq)
+
+    n_mutations = min(length, round(length * mutation_density))
+    for pos in rng.sample(range(length), n_mutations):
+        seq[pos] = ord(rng.choice([b for b in _BASES if ord(b) != seq[pos]]))
+
+    for _ in range(n_runs):
+        start = rng.randrange(0, max(1, length - n_run_length))
+        seq[start : start + n_run_length] = b"N" * min(n_run_length, length - start)
+
+    if truncate:
+        del seq[max(0, length - truncate) :]
+    return seq.decode("ascii")
+
+
+def synthetic_genomes(reference: str, n: int, seed: int = 0, **params) -> list[str]:
+    """`n` independent genomes sharing the same generator parameters."""
+    return [synthetic_genome(reference, seed=seed + i, **params) for i in range(n)]
+
+
+def synthetic_mutations(n: int, length: int = GENOME_LENGTH, seed: int = 0) -> list[Mutation]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        pos = rng.randint(1, length)
+        ref, alt = rng.sample(_BASES, 2)
+        out.append(Mutation(pos=pos, ref=ref, alt=alt, gene=gene_for_position(pos)))
+    return out
+
+
+def synthetic_dates(n: int, seed: int = 0) -> list[str]:
+    """Collection-date strings in the mix of formats GenBank actually uses."""
+    rng = random.Random(seed)
+    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+    out = []
+    for _ in range(n):
+        d = date(2020, 1, 1) + timedelta(days=rng.randrange(1500))
+        out.append(
+            rng.choice(
+                [
+                    d.isoformat(),
+                    f"{d.year}-{d.month:02d}",
+                    str(d.year),
+                    f"{months[d.month - 1]}-{d.year}",
+                    f"{d.year}-{months[d.month - 1]}-{d.day:02d}",
+                    "unknown",
+                ]
+            )
+        )
+    return out
+
+
+def synthetic_records(
+    n: int,
+    reference: str,
+    seed: int = 0,
+    **genome_params,
+) -> list[CanonicalGenomeRecord]:
+    rng = random.Random(seed)
+    countries = ["USA", "United Kingdom", "India", "Brazil", "South Africa", "Japan"]
+    records = []
+    for i in range(n):
+        seq = synthetic_genome(reference, seed=seed + i, **genome_params)
+        records.append(
+            CanonicalGenomeRecord(
+                accession=f"SYN{i:07d}.1",
+                organism="Severe acute respiratory syndrome coronavirus 2",
+                collection_date=date(2020, 1, 1) + timedelta(days=rng.randrange(1500)),
+                country=rng.choice(countries),
+                region=None,
+                host="Homo sapiens",
+                sequence_length=len(seq),
+                sequence=seq,
+            )
+        )
+    return records
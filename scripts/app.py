@@ -1,16 +1,58 @@
 import streamlit as st
 
-from ingest.analytics import summarize_genomes
+from ingest.analytics import summarize_genomes, with_gene_mutations
+from ingest.cube import DEFAULT_PATH as CUBE_PATH
+from ingest.cube import SpaceTimeCube
+from ingest.db import DEFAULT_PATH, GenomeDB
+from ingest.geocode import Gazetteer
 from ingest.io import load_ndjson
+from ingest.references import ReferenceRegistry
+from ingest.scoring import ScoreCache
 
-records = load_ndjson("data/raw/genomes.ndjson")
-df = summarize_genomes(records)
+SCORE_CACHE = "data/derived/score_cache.json"
 
 st.set_page_config(page_title="Pathogen Evolution Atlas", layout="wide")
 st.title("🧬 Pathogen Evolution Atlas")
 
 # --- Sidebar filters ---
 st.sidebar.header("Filters")
+
+country, spike_only = "All", False
+if DEFAULT_PATH.exists():
+    # With the SQLite store (scripts.build_genome_db), genomes were scored at
+    # load time: filters run as indexed SQL over the stored scores and nothing
+    # is rescored on a rerun.
+    db = GenomeDB(DEFAULT_PATH)
+    country = st.sidebar.selectbox("Country", ["All", *db.countries()])
+    spike_only = st.sidebar.checkbox("Spike-mutated only")
+    min_spike = st.sidebar.number_input("Min Spike mutations", min_value=0, value=0, step=1)
+    df = db.summary_frame(
+        country=None if country == "All" else country,
+        gene="S" if spike_only or min_spike else None,
+        min_gene_mutations=max(1, int(min_spike)),
+    )
+    # Records only carry country / region names; place them at the gazetteer centroid.
+    places = df[["country", "region"]].astype(object)
+    places = places.where(places.notna(), None)
+    df["lat"], df["lon"] = Gazetteer().geocode(places["country"].tolist(), places["region"].tolist())
+else:
+    min_spike = st.sidebar.number_input("Min Spike mutations", min_value=0, value=0, step=1)
+    records = load_ndjson("data/raw/genomes.ndjson")
+
+    # Use the pinned per-organism references once scripts.build_references has
+    # fetched them; until then, fall back to picking a reference from the batch.
+    registry = ReferenceRegistry()
+    references = registry if registry.specs and all(map(registry.is_pinned, registry.specs)) else None
+
+    # Scores are keyed by sequence, so reloads only score genomes not seen before.
+    score_cache = ScoreCache.load(SCORE_CACHE)
+    df = summarize_genomes(
+        records, score_cache=score_cache, references=references, gazetteer=Gazetteer()
+    )
+    score_cache.save(SCORE_CACHE)
+    if min_spike:
+        df = with_gene_mutations(df, "S", int(min_spike))
+
 risk_levels = st.sidebar.multiselect(
     "Risk level",
     sorted(df["risk_level"].unique()),
@@ -23,7 +65,30 @@ filtered = df[df["risk_level"].isin(risk_levels)]
 c1, c2, c3 = st.columns(3)
 c1.metric("Genomes", len(filtered))
 c2.metric("Avg Risk", round(filtered["risk_score"].mean(), 2))
-c3.metric("Unique Genes", filtered["genes_affected"].nunique())
+c3.metric(
+    "Unique Genes",
+    len({g for genes in filtered["genes_affected"].dropna() for g in str(genes).split(", ") if g}),
+)
+
+# --- Trends (from the aggregate cube, not per-genome rows) ---
+# scripts.build_genome_db maintains the cube; the sidebar filters become
+# roll-up conditions. "Min Spike mutations" > 1 is finer than the cube's
+# genes dimension, so that one case aggregates the filtered rows instead.
+if DEFAULT_PATH.exists() and CUBE_PATH.exists() and min_spike <= 1:
+    cube = SpaceTimeCube.load(CUBE_PATH)
+    where = {"risk_level": risk_levels}
+    if country != "All":
+        where["country"] = country
+    if spike_only or min_spike:
+        genes = cube.cells["genes"].dropna().unique()
+        where["genes"] = [g for g in genes if "S" in g.split(", ")]
+    weekly = cube.rollup("week", "risk_level", **where)
+else:
+    weekly = SpaceTimeCube.from_summary(filtered).rollup("week", "risk_level")
+weekly = weekly.dropna(subset=["week"])
+if not weekly.empty:
+    st.subheader("Genomes per Week by Risk Level")
+    st.bar_chart(weekly.pivot(index="week", columns="risk_level", values="count").fillna(0))
 
 # --- Table ---
 st.subheader("Genome Summary")
@@ -1,10 +1,24 @@
 from __future__ import annotations
 
 import argparse
+import json
 import os
+import time
+from collections import deque
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 from pathlib import Path
+from urllib.parse import urlencode
+from urllib.request import urlopen
 
-from Bio import Entrez
+from ingest import genbank, metrics
+
+EUTILS_BASE = "https://eutils.ncbi.nlm.nih.gov/entrez/eutils"
+
+# efetch pages: NCBI allows up to 10,000 records per history-server request.
+_PAGE_SIZE = 10_000
+_MAX_TRIES = 3
 
 
 def build_query(min_len: int, max_len: int) -> str:
@@ -16,34 +30,136 @@ def build_query(min_len: int, max_len: int) -> str:
     )
 
 
-def fetch_accessions(query: str, email: str, retmax: int) -> list[str]:
-    Entrez.email = email
-    with Entrez.esearch(db="nuccore", term=query, retmax=retmax) as handle:
-        res = Entrez.read(handle)
-    # IdList here are GI/UIDs; we ask Entrez to translate to accessions via efetch later,
-    # but in practice nuccore IdList works fine with efetch rettype=acc.
-    ids = res.get("IdList", [])
-    if not ids:
-        return []
-
-    with Entrez.efetch(db="nuccore", id=",".join(ids), rettype="acc", retmode="text") as handle:
-        text = handle.read()
-
-    accessions = [line.strip() for line in text.splitlines() if line.strip()]
+def _eutils(endpoint: str, params: dict, base: str = EUTILS_BASE) -> bytes:
+    url = f"{base}/{endpoint}?{urlencode(params)}"
+    for attempt in range(_MAX_TRIES):
+        genbank._rate_limit()
+        try:
+            with urlopen(url, timeout=120) as resp:
+                return resp.read()
+        except OSError:
+            if attempt == _MAX_TRIES - 1:
+                raise
+            time.sleep(2 ** attempt)
+
+
+def search_history(query: str, email: str, base: str = EUTILS_BASE) -> tuple[int, str, str]:
+    """
+    Run esearch with usehistory=y and return (count, WebEnv, query_key).
+    The UIDs stay on NCBI's history server instead of coming back in the response.
+    """
+    params = {
+        "db": "nuccore",
+        "term": query,
+        "usehistory": "y",
+        "retmax": 0,
+        "retmode": "json",
+        "email": email,
+    }
+    res = json.loads(_eutils("esearch.fcgi", params, base))["esearchresult"]
+    return int(res["count"]), res["webenv"], res["querykey"]
+
+
+def fetch_page(
+    webenv: str,
+    query_key: str,
+    retstart: int,
+    retmax: int,
+    email: str,
+    base: str = EUTILS_BASE,
+) -> list[str]:
+    """Fetch one page of accession.version strings from the history server."""
+    params = {
+        "db": "nuccore",
+        "WebEnv": webenv,
+        "query_key": query_key,
+        "retstart": retstart,
+        "retmax": retmax,
+        "rettype": "acc",
+        "retmode": "text",
+        "email": email,
+    }
+    with metrics.stage("entrez.fetch_page"):
+        text = _eutils("efetch.fcgi", params, base).decode("utf-8")
+    return [line.strip() for line in text.splitlines() if line.strip()]
+
+
+def iter_accessions(
+    query: str,
+    email: str,
+    limit: int,
+    page_size: int = _PAGE_SIZE,
+    workers: int = 3,
+    base: str = EUTILS_BASE,
+) -> Iterator[str]:
+    """
+    Yield up to `limit` unique accessions for `query`, in search order.
+
+    Pages are fetched concurrently (at most `workers` in flight) but yielded
+    in order, so output is deterministic. `limit` counts accessions after
+    de-duplication; pages keep coming until it is reached or the search is
+    exhausted. Memory holds the in-flight pages plus the set of accessions
+    already yielded, which grows with the output.
+    """
+    if limit <= 0:
+        return
+    count, webenv, query_key = search_history(query, email, base)
+    size = min(page_size, limit)
+    starts = iter(range(0, count, size))
+
+    def fetch(start: int) -> list[str]:
+        return fetch_page(webenv, query_key, start, min(size, count - start), email, base)
+
+    seen: set[str] = set()
+    # Workers overlap downloads, but request *starts* go through the shared NCBI
+    # rate limiter, so parallelism never exceeds ~3 requests/second.
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        pending = deque(pool.submit(fetch, s) for s in islice(starts, max(1, workers)))
+        while pending:
+            page = pending.popleft().result()
+            for start in islice(starts, 1):
+                pending.append(pool.submit(fetch, start))
+            for a in _unique(page, seen):
+                yield a
+                if len(seen) >= limit:
+                    for fut in pending:
+                        fut.cancel()
+                    return
+
+
+def _unique(accessions: Iterable[str], seen: set[str]) -> Iterator[str]:
     # De-dup while preserving order
-    seen = set()
-    out: list[str] = []
     for a in accessions:
         if a not in seen:
             seen.add(a)
-            out.append(a)
-    return out
+            yield a
+
+
+def fetch_accessions(query: str, email: str, retmax: int) -> list[str]:
+    return list(iter_accessions(query, email, limit=retmax))
 
 
-def write_accessions(accessions: list[str], out_path: str | Path) -> None:
+def write_accessions(accessions: Iterable[str], out_path: str | Path) -> int:
+    """
+    Stream accessions to a text file, one per line. Returns how many were written.
+
+    Lines go to `<out>.tmp`, which replaces `out_path` only once the stream
+    finishes, so an interrupted download never leaves a truncated list behind.
+    """
     p = Path(out_path)
     p.parent.mkdir(parents=True, exist_ok=True)
-    p.write_text("\n".join(accessions) + "\n", encoding="utf-8")
+    tmp = p.with_name(p.name + ".tmp")
+    n = 0
+    try:
+        with tmp.open("w", encoding="utf-8") as f:
+            for a in accessions:
+                f.write(a + "\n")
+                n += 1
+        os.replace(tmp, p)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+    return n
 
 
 def main() -> None:
@@ -52,6 +168,9 @@ def main() -> None:
     ap.add_argument("--n", type=int, default=300, help="How many accessions to write")
     ap.add_argument("--min-len", type=int, default=29000, help="Minimum sequence length (bp)")
     ap.add_argument("--max-len", type=int, default=31000, help="Maximum sequence length (bp)")
+    ap.add_argument("--page-size", type=int, default=_PAGE_SIZE, help="Accessions per efetch page")
+    ap.add_argument("--workers", type=int, default=3, help="Concurrent page downloads")
+    metrics.add_cli_arguments(ap)
     args = ap.parse_args()
 
     email = os.getenv("NCBI_EMAIL")
@@ -59,10 +178,13 @@ def main() -> None:
         raise SystemExit("NCBI_EMAIL environment variable not set (required by NCBI).")
 
     query = build_query(args.min_len, args.max_len)
-    accessions = fetch_accessions(query=query, email=email, retmax=args.n)
+    accessions = iter_accessions(
+        query=query, email=email, limit=args.n, page_size=args.page_size, workers=args.workers
+    )
 
-    write_accessions(accessions, args.out)
-    print(f"Wrote {len(accessions)} accessions -> {args.out}")
+    with metrics.cli_instrumentation(args):
+        n = write_accessions(accessions, args.out)
+    print(f"Wrote {n} accessions -> {args.out}")
     print(f"Query: {query}")
 
 
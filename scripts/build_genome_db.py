@@ -0,0 +1,135 @@
+"""
+build_genome_db.py
+"""
+from __future__ import annotations
+
+import argparse
+
+from ingest import metrics
+from ingest.analytics import summarize_genomes
+from ingest.cube import DEFAULT_PATH as DEFAULT_CUBE_PATH
+from ingest.cube import SpaceTimeCube
+from ingest.db import DEFAULT_PATH, GenomeDB
+from ingest.io import iter_ndjson
+from ingest.mutation_index import DEFAULT_PATH as DEFAULT_MUTATION_INDEX_PATH
+from ingest.mutation_index import build_mutation_index
+from ingest.mutations import diff_sequences
+from ingest.references import ReferenceRegistry
+from ingest.similarity import DEFAULT_PATH as DEFAULT_SIMILARITY_PATH
+from ingest.similarity import update_index_file
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description="Load canonical NDJSON into the SQLite store and index mutations and scores."
+    )
+    p.add_argument("--ndjson", required=True, help="Input NDJSON (may be compressed)")
+    p.add_argument("--db", default=str(DEFAULT_PATH), help="SQLite database path")
+    p.add_argument("--cube", default=str(DEFAULT_CUBE_PATH), help="Aggregate cube (Parquet) to update")
+    p.add_argument(
+        "--rebuild-cube",
+        action="store_true",
+        help="Recompute the cube from every genome instead of updating it; required after "
+        "re-ingesting genomes whose date, location or score changed",
+    )
+    p.add_argument(
+        "--mutation-index",
+        default=str(DEFAULT_MUTATION_INDEX_PATH),
+        help="Directory for the (pos, alt) -> genomes inverted index",
+    )
+    p.add_argument(
+        "--no-mutation-index", action="store_true", help="Do not rebuild the inverted mutation index"
+    )
+    p.add_argument(
+        "--similarity-index",
+        default=str(DEFAULT_SIMILARITY_PATH),
+        help="MinHash closest-genome index (.npz) to add this run's genomes to",
+    )
+    p.add_argument(
+        "--no-similarity-index", action="store_true", help="Do not update the closest-genome index"
+    )
+    p.add_argument(
+        "--reference-accession",
+        default="NC_045512.2",
+        help="Reference to diff against when no pinned registry references are built",
+    )
+    metrics.add_cli_arguments(p)
+    args = p.parse_args()
+
+    with metrics.cli_instrumentation(args), GenomeDB(args.db) as db:
+        previously_scored = db.scored_accessions()
+        written: list[str] = []
+
+        def tracked(records):
+            for rec in records:
+                written.append(rec.accession)
+                yield rec
+
+        n = db.insert_records(tracked(iter_ndjson(args.ndjson)))
+        print(f"Stored {n} records -> {args.db}")
+
+        # Only the genomes written by this run are (re)scored and (re)indexed;
+        # everything already in the database keeps its stored rows.
+        accessions = list(dict.fromkeys(written))
+        records = [db.get(a) for a in accessions]
+
+        registry = ReferenceRegistry()
+        if registry.specs and all(map(registry.is_pinned, registry.specs)):
+            def identify(rec):
+                reference = registry.for_record(rec)
+                return reference.identify_mutations(rec) if reference is not None else []
+            summary = summarize_genomes(records, references=registry)
+        else:
+            ref = db.get(args.reference_accession)
+            if ref is None or not ref.sequence:
+                raise SystemExit(
+                    f"Reference {args.reference_accession} not in the database; "
+                    "ingest it or run scripts.build_references first."
+                )
+            ref_seq = ref.sequence
+
+            def identify(rec):
+                return diff_sequences(ref_seq, rec.sequence, normalized=rec.normalized)
+            # The reference rides along so summarize_genomes diffs against it.
+            others = [r for r in records if r.accession != ref.accession]
+            summary = summarize_genomes([ref, *others])
+            summary = summary[summary["accession"].isin(accessions)]
+
+        mutation_sets = []
+
+        def identify_and_keep(rec):
+            mutations = identify(rec)
+            mutation_sets.append((rec.accession, mutations))
+            return mutations
+
+        print(f"Indexed {db.index_mutations(records, identify_and_keep)} mutations")
+
+        if not args.no_mutation_index:
+            # Posting lists are delta-coded over dense genome ids, so the index is
+            # rebuilt from every stored mutation rather than appended to.
+            build_mutation_index(db.iter_mutations(), args.mutation_index)
+            print(f"Mutation index -> {args.mutation_index}")
+        print(f"Stored {db.insert_summary(summary)} scores")
+
+        if not args.no_similarity_index:
+            index = update_index_file(args.similarity_index, mutation_sets)
+            print(f"Similarity index holds {len(index)} genomes -> {args.similarity_index}")
+
+        # Cube cells are sums, so only genomes not scored in an earlier run are
+        # added; a missing cube (or --rebuild-cube) is recomputed from the store.
+        cube = SpaceTimeCube() if args.rebuild_cube else SpaceTimeCube.load(args.cube)
+        if cube.genomes and previously_scored:
+            reingested = summary["accession"].isin(previously_scored)
+            cube.update(summary[~reingested])
+            if reingested.any():
+                print(
+                    f"{int(reingested.sum())} genomes were already in the cube and kept their old "
+                    "cells; pass --rebuild-cube if their metadata changed"
+                )
+        else:
+            cube = SpaceTimeCube.from_summary(db.summary_frame())
+        cube.save(args.cube)
+        print(f"Cube holds {cube.genomes} genomes in {len(cube)} cells -> {args.cube}")
+
+if __name__ == "__main__":
+    main()
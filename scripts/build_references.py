@@ -0,0 +1,41 @@
+"""
+build_references.py
+"""
+from __future__ import annotations
+
+import argparse
+import os
+
+from ingest.genbank import fetch_genbank_minimal
+from ingest.references import DEFAULT_ROOT, ReferenceRegistry
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description="Fetch any missing pinned references from GenBank and build their artifacts."
+    )
+    p.add_argument("--root", default=str(DEFAULT_ROOT), help="Registry directory (registry.json)")
+    p.add_argument("--force", action="store_true", help="Rebuild artifacts even if current")
+    args = p.parse_args()
+
+    registry = ReferenceRegistry(args.root)
+    if not registry.specs:
+        raise SystemExit(f"No references listed in {args.root}/registry.json")
+
+    missing = [s for s in registry.specs if not registry.is_pinned(s)]
+    if missing:
+        email = os.getenv("NCBI_EMAIL")
+        if not email:
+            raise SystemExit("NCBI_EMAIL environment variable not set (required by NCBI).")
+        for spec in missing:
+            raw = fetch_genbank_minimal(spec.accession, email=email)
+            path = registry.pin(spec, raw["sequence"])
+            print(f"Pinned {spec.accession} -> {path}")
+
+    for spec in registry.specs:
+        out = registry.build(spec, force=args.force)
+        print(f"{spec.organism} ({spec.accession}) -> {out}")
+
+
+if __name__ == "__main__":
+    main()
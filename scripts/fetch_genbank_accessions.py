@@ -6,24 +6,55 @@ from __future__ import annotations
 import argparse
 import os
 
-from ingest.genbank import fetch_and_normalize_many
-from ingest.io import write_ndjson
+from ingest import metrics
+from ingest.genbank import iter_fetch_and_normalize
+from ingest.io import append_ndjson, read_accession_file, read_accessions
 
 
 def main() -> None:
     p = argparse.ArgumentParser(description="Fetch GenBank accessions and write canonical NDJSON.")
-    p.add_argument("--accessions", nargs="+", required=True, help="One or more GenBank accessions")
+    src = p.add_mutually_exclusive_group(required=True)
+    src.add_argument("--accessions", nargs="+", help="One or more GenBank accessions")
+    src.add_argument(
+        "--accession-file",
+        help="Text file with one accession per line (e.g. data/accessions/covid_accessions.txt)",
+    )
     p.add_argument("--out", required=True, help="Output path for NDJSON")
+    p.add_argument(
+        "--restart",
+        action="store_true",
+        help="Ignore existing output and fetch everything again",
+    )
+    metrics.add_cli_arguments(p)
     args = p.parse_args()
 
     email = os.getenv("NCBI_EMAIL")
     if not email:
         raise SystemExit("NCBI_EMAIL environment variable not set (required by NCBI).")
 
-    records = fetch_and_normalize_many(args.accessions, email=email)
-    write_ndjson(records, args.out)
-
-    print(f"Wrote {len(records)} records -> {args.out}")
+    accessions = args.accessions or read_accession_file(args.accession_file)
+
+    # Records already in the output act as the checkpoint: skip them on resume.
+    if args.restart and os.path.exists(args.out):
+        os.remove(args.out)
+    done = read_accessions(args.out)
+    todo = [a for a in accessions if a not in done]
+    if done:
+        print(f"Resuming: {len(accessions) - len(todo)} of {len(accessions)} already in {args.out}")
+
+    written = 0
+    try:
+        # Each record is appended (and flushed) as soon as it is fetched.
+        with metrics.cli_instrumentation(args):
+            written = append_ndjson(iter_fetch_and_normalize(todo, email=email), args.out)
+    except Exception as e:
+        fetched = len(read_accessions(args.out)) - len(done)
+        raise SystemExit(
+            f"Stopped after {fetched} new records ({type(e).__name__}: {e}). "
+            "Re-run the same command to resume."
+        ) from e
+
+    print(f"Wrote {written} records -> {args.out}")
 
 
 if __name__ == "__main__":
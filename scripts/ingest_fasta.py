@@ -0,0 +1,40 @@
+"""
+ingest_fasta.py
+"""
+from __future__ import annotations
+
+import argparse
+
+from ingest import metrics
+from ingest.fasta import iter_fasta_records
+from ingest.io import write_ndjson
+
+
+def main() -> None:
+    p = argparse.ArgumentParser(
+        description="Stream a FASTA (+ optional metadata.tsv) export into canonical NDJSON."
+    )
+    p.add_argument("--fasta", required=True, help="Path to sequences.fasta")
+    p.add_argument("--metadata", help="Path to metadata.tsv (tab-separated)")
+    p.add_argument("--key-column", default="strain", help="Metadata column matching FASTA headers")
+    p.add_argument("--out", required=True, help="Output path for NDJSON")
+    metrics.add_cli_arguments(p)
+    args = p.parse_args()
+
+    count = 0
+
+    def counted(records):
+        nonlocal count
+        for rec in records:
+            count += 1
+            yield rec
+
+    with metrics.cli_instrumentation(args):
+        records = iter_fasta_records(args.fasta, args.metadata, key_column=args.key_column)
+        write_ndjson(counted(records), args.out)
+
+    print(f"Wrote {count} records -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
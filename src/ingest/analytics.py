@@ -3,95 +3,401 @@ analytics.py
 """
 from __future__ import annotations
 
-from collections.abc import Iterable
+import os
+import time
+from collections.abc import Iterable, Iterator
+from datetime import date
+from functools import partial
+from pathlib import Path
+from typing import TYPE_CHECKING
 
-import pandas as pd
+from ingest import metrics
+from ingest.flatfile import parse_collection_date
+from ingest.genes import SARS_COV_2_GENES
+from ingest.qc import QCMetrics, QCThresholds, compute_qc, qc_failures
+from ingest.scoring import ScoreCache, score_genome, score_key
 
-from ingest.scoring import score_genome
+if TYPE_CHECKING:
+    import pandas as pd
+    import pyarrow as pa
+
+    from ingest.geocode import Gazetteer
+    from ingest.references import ReferenceRegistry
+
+_EMPTY_QC_COLUMNS = {
+    "qc_n_fraction": None,
+    "qc_ambiguous_bases": None,
+    "qc_longest_n_run": None,
+    "qc_reference_coverage": None,
+    "qc_reference_differences": None,
+}
+
+
+DEFAULT_BATCH_ROWS = 10_000  # rows per Arrow record batch
+GENE_COLUMN_PREFIX = "mutations_"
+
+
+def gene_column(gene: str) -> str:
+    """Name of the per-gene mutation-count column, e.g. `mutations_S`."""
+    return GENE_COLUMN_PREFIX + gene
 
-"""
-Convert genome records into an analytics-ready DataFrame.
-"""
-def summarize_genomes(records: Iterable[dict]) -> pd.DataFrame:
-    records = list(records)
 
-    def _get(rec, key, default=None):
-        if isinstance(rec, dict):
-            return rec.get(key, default)
-        return getattr(rec, key, default)
+def gene_columns(df: pd.DataFrame) -> list[str]:
+    return [c for c in df.columns if c.startswith(GENE_COLUMN_PREFIX)]
 
-    # Select reference genome once:
+
+def _gene_names(references: ReferenceRegistry | None) -> tuple[str, ...]:
+    # Genes only ever come from annotations, so this is the complete column set.
+    annotations = (
+        [g for spec in references.specs for g in spec.genes]
+        if references is not None
+        else SARS_COV_2_GENES
+    )
+    return tuple(dict.fromkeys(name for name, _, _ in annotations))
+
+
+def _get(rec, key, default=None):
+    if isinstance(rec, dict):
+        return rec.get(key, default)
+    return getattr(rec, key, default)
+
+
+def _batch_reference(records: list) -> str | None:
     # Prefer NC_045512 if present; otherwise fall back to the longest sequence available.
     ref_rec = next((r for r in records if _get(r, "accession", "").startswith("NC_045512")), None)
 
     if ref_rec is None:
         ref_rec = max(records, key=lambda r: len(_get(r, "sequence") or ""), default=None)
 
-    ref_seq = _get(ref_rec, "sequence") if ref_rec is not None else None
+    return _get(ref_rec, "sequence") if ref_rec is not None else None
+
+
+def _summary_row(
+    r,
+    reference,
+    ref_seq: str | None,
+    qc_thresholds: QCThresholds | None,
+    score_cache: ScoreCache,
+    qc_memo: dict[str, QCMetrics],
+    genes: tuple[str, ...],
+) -> dict:
+    seq = _get(r, "sequence") or ""
+
+    # QC runs before scoring so low-quality genomes never reach diff_sequences.
+    gene_map = reference.genes if reference is not None else None
+    key = score_key(seq, ref_seq, gene_map) if (seq and ref_seq) else None
+    qc = None
+    if key is not None:
+        qc = qc_memo.get(key)
+        if qc is None:
+            with metrics.stage("analytics.qc"):
+                qc = qc_memo[key] = compute_qc(seq, ref_seq)
+
+    # Decide if we can score this record
+    if not ref_seq:
+        scorable = False
+        skip_reason = "missing_reference"
+    elif not seq:
+        scorable = False
+        skip_reason = "missing_sequence"
+    elif len(seq) < 1000:
+        # Still skip obvious fragments (tweak threshold as desired)
+        scorable = False
+        skip_reason = f"too_short ({len(seq)})"
+    # elif len(seq) != len(ref_seq):
+    #     scorable = False
+    #     skip_reason = f"length_mismatch ({len(seq)} != {len(ref_seq)})"
+    elif failures := qc_failures(qc, qc_thresholds):
+        scorable = False
+        skip_reason = f"qc_failed ({', '.join(failures)})"
+    else:
+        scorable = True
+        skip_reason = ""
+
+    if scorable:
+        rec_for_scoring = {
+            "accession": _get(r, "accession"),
+            "source": _get(r, "source", "genbank"),
+            "sequence": seq,
+            "reference_sequence": ref_seq,
+            # Canonicalized at ingest: the diff can skip re-normalizing it.
+            "normalized": bool(_get(r, "normalized", False)),
+        }
+        score = partial(score_genome, rec_for_scoring)
+        if reference is not None:
+            score = partial(score, identify_mutations=reference.identify_mutations)
+        with metrics.stage("analytics.score"):
+            s = score_cache.get_or_score(key, score)
+        num_mutations = s["num_mutations"]
+        genes_affected = ", ".join(s["genes_affected"])
+        by_gene = s.get("risk_by_gene") or {}
+        risk_score = s["risk_score"]
+        risk_level = s["risk_level"]
+        risk_explanation = s["risk_explanation"]
+    else:
+        # Don't score; keep app running and make the data quality visible
+        num_mutations = 0
+        genes_affected = ""
+        by_gene = {}
+        risk_score = 0.0
+        risk_level = "N/A"
+        risk_explanation = "Not scored: " + skip_reason
+        metrics.count("analytics.records_skipped")
+
+    return {
+        "accession": _get(r, "accession"),
+        "source": _get(r, "source", "genbank"),
+        "sequence_length": len(seq),
+        "scorable": scorable,
+        "skip_reason": skip_reason,
+        "num_mutations": num_mutations,
+        "genes_affected": genes_affected,
+        **{gene_column(g): int(by_gene.get(g, 0)) for g in genes},
+        "risk_score": risk_score,
+        "risk_level": risk_level,
+        "risk_explanation": risk_explanation,
+        "date": _get(r, "collection_date"),
+        "country": _get(r, "country"),
+        "region": _get(r, "region"),
+        "lat": _get(r, "lat"),
+        "lon": _get(r, "lon"),
+        **(qc.as_columns() if qc else _EMPTY_QC_COLUMNS),
+    }
+
+
+def _fill_coordinates(row: dict, r, gazetteer: Gazetteer | None) -> dict:
+    # Records rarely carry coordinates; fall back to the place-name centroid.
+    if gazetteer is not None and (row["lat"] is None or row["lon"] is None):
+        hit = gazetteer.lookup(_get(r, "country"), _get(r, "region"))
+        if hit is not None:
+            row["lat"], row["lon"] = hit
+    return row
+
+
+def _record_metrics(n_rows: int, t_start: float) -> None:
+    if metrics.enabled():
+        elapsed = time.perf_counter() - t_start
+        metrics.count("analytics.records", n_rows)
+        metrics.gauge("analytics.records_per_second", n_rows / elapsed if elapsed else 0.0)
+
+
+def summarize_genomes(
+    records: Iterable[dict],
+    qc_thresholds: QCThresholds | None = None,
+    score_cache: ScoreCache | None = None,
+    references: ReferenceRegistry | None = None,
+    gazetteer: Gazetteer | None = None,
+) -> pd.DataFrame:
+    """
+    Convert genome records into an analytics-ready DataFrame.
+
+    Identical sequences are QC'd and scored once and the result is reused
+    for every accession that shares them. Pass a `score_cache` (e.g. one
+    loaded with `ScoreCache.load`) to reuse scores across runs as well.
+
+    With a `references` registry, each record is diffed against the pinned
+    reference (and gene annotation) for its organism, so mixed-pathogen
+    batches work; records of unregistered organisms are not scored.
+    Without one, a reference is picked from the batch as before.
+
+    With a `gazetteer`, records without lat/lon get the centroid of their
+    country / region.
+
+    This holds every record and row in memory; for large archives use
+    `iter_summary_batches` / `write_summary_parquet` instead.
+    """
+    if score_cache is None:
+        score_cache = ScoreCache()
+    qc_memo: dict[str, QCMetrics] = {}
+
+    t_start = time.perf_counter()
+    with metrics.stage("analytics.load"):
+        records = list(records)
+
+    # Select reference genome once
+    batch_ref_seq = _batch_reference(records) if references is None else None
+    genes = _gene_names(references)
 
     rows = []
     for r in records:
-        seq = _get(r, "sequence") or ""
-
-        # Decide if we can score this record
-        if not ref_seq:
-            scorable = False
-            skip_reason = "missing_reference"
-        elif not seq:
-            scorable = False
-            skip_reason = "missing_sequence"
-        elif len(seq) < 1000:
-            # Still skip obvious fragments (tweak threshold as desired)
-            scorable = False
-            skip_reason = f"too_short ({len(seq)})"
-        # elif len(seq) != len(ref_seq):
-        #     scorable = False
-        #     skip_reason = f"length_mismatch ({len(seq)} != {len(ref_seq)})"
-        else:
-            scorable = True
-            skip_reason = ""
-
-        if scorable:
-            rec_for_scoring = {
-                "accession": _get(r, "accession"),
-                "source": _get(r, "source", "genbank"),
-                "sequence": seq,
-                "reference_sequence": ref_seq,
-            }
-            s = score_genome(rec_for_scoring)
-            num_mutations = s["num_mutations"]
-            genes_affected = ", ".join(s["genes_affected"])
-            risk_score = s["risk_score"]
-            risk_level = s["risk_level"]
-            risk_explanation = s["risk_explanation"]
-        else:
-            # Don't score; keep app running and make the data quality visible
-            num_mutations = 0
-            genes_affected = ""
-            risk_score = 0.0
-            risk_level = "N/A"
-            risk_explanation = "Not scored: " + skip_reason
-
-        rows.append(
-            {
-                "accession": _get(r, "accession"),
-                "source": _get(r, "source", "genbank"),
-                "sequence_length": len(seq),
-                "scorable": scorable,
-                "skip_reason": skip_reason,
-                "num_mutations": num_mutations,
-                "genes_affected": genes_affected,
-                "risk_score": risk_score,
-                "risk_level": risk_level,
-                "risk_explanation": risk_explanation,
-                "date": _get(r, "collection_date"),
-                "lat": _get(r, "lat"),
-                "lon": _get(r, "lon"),
-            }
-        )
-
-    df = pd.DataFrame(rows)
+        reference = references.for_record(r) if references is not None else None
+        ref_seq = reference.sequence if reference is not None else batch_ref_seq
+        row = _summary_row(r, reference, ref_seq, qc_thresholds, score_cache, qc_memo, genes)
+        rows.append(_fill_coordinates(row, r, gazetteer))
+
+    # pandas is imported here, not at module level: it dominates import time.
+    import pandas as pd
+
+    with metrics.stage("analytics.dataframe"):
+        df = pd.DataFrame(rows)
+        if rows:
+            df = df.astype({gene_column(g): "int32" for g in genes})
+
+    _record_metrics(len(rows), t_start)
     return df
 
 
-    return pd.DataFrame(rows)
+def summary_schema(genes: Iterable[str] | None = None) -> pa.Schema:
+    """
+    Arrow schema of the chunked summary.
+
+    Low-cardinality text (source, risk_level, genes_affected, country,
+    region) is dictionary-encoded, so it becomes pandas `category` on
+    conversion; dates are date64 and coordinates float32. Each gene in
+    `genes` gets an int32 mutation-count column (see `gene_column`).
+    """
+    import pyarrow as pa
+
+    if genes is None:
+        genes = _gene_names(None)
+    category = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("accession", pa.string()),
+            ("source", category),
+            ("sequence_length", pa.int32()),
+            ("scorable", pa.bool_()),
+            ("skip_reason", pa.string()),
+            ("num_mutations", pa.int32()),
+            ("genes_affected", category),
+            *((gene_column(g), pa.int32()) for g in genes),
+            ("risk_score", pa.float64()),
+            ("risk_level", category),
+            ("risk_explanation", pa.string()),
+            ("date", pa.date64()),
+            ("country", category),
+            ("region", category),
+            ("lat", pa.float32()),
+            ("lon", pa.float32()),
+            ("qc_n_fraction", pa.float32()),
+            ("qc_ambiguous_bases", pa.int32()),
+            ("qc_longest_n_run", pa.int32()),
+            ("qc_reference_coverage", pa.float32()),
+            ("qc_reference_differences", pa.int32()),
+        ]
+    )
+
+
+def _as_date(value) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    return parse_collection_date(str(value))
+
+
+def _rows_to_batch(rows: list[dict], schema: pa.Schema) -> pa.RecordBatch:
+    import pyarrow as pa
+
+    columns = []
+    for field in schema:
+        values = [row[field.name] for row in rows]
+        if field.name == "date":
+            values = [_as_date(v) for v in values]
+        if pa.types.is_dictionary(field.type):
+            columns.append(pa.array(values, type=pa.string()).dictionary_encode())
+        else:
+            columns.append(pa.array(values, type=field.type))
+    return pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def iter_summary_batches(
+    records: Iterable,
+    chunk_size: int = DEFAULT_BATCH_ROWS,
+    qc_thresholds: QCThresholds | None = None,
+    score_cache: ScoreCache | None = None,
+    references: ReferenceRegistry | None = None,
+    reference_sequence: str | None = None,
+    gazetteer: Gazetteer | None = None,
+) -> Iterator[pa.RecordBatch]:
+    """
+    Summarize `records` `chunk_size` at a time, yielding Arrow record batches.
+
+    Rows match `summarize_genomes`, typed per `summary_schema()`. Records are
+    consumed lazily (pass a generator such as `iter_ndjson`), and only one
+    chunk of rows is held at a time, so memory is bounded by `chunk_size`
+    rather than by the size of the archive.
+
+    A streaming pass cannot pick a reference out of the batch, so either a
+    `references` registry or an explicit `reference_sequence` is required.
+    """
+    if references is None and reference_sequence is None:
+        raise ValueError("iter_summary_batches needs `references` or `reference_sequence`")
+    if chunk_size < 1:
+        raise ValueError("chunk_size must be >= 1")
+    if score_cache is None:
+        score_cache = ScoreCache()
+
+    genes = _gene_names(references)
+    schema = summary_schema(genes)
+    t_start = time.perf_counter()
+    n_rows = 0
+    rows: list[dict] = []
+    qc_memo: dict[str, QCMetrics] = {}
+
+    for r in records:
+        reference = references.for_record(r) if references is not None else None
+        ref_seq = reference.sequence if reference is not None else reference_sequence
+        row = _summary_row(r, reference, ref_seq, qc_thresholds, score_cache, qc_memo, genes)
+        rows.append(_fill_coordinates(row, r, gazetteer))
+        if len(rows) >= chunk_size:
+            with metrics.stage("analytics.batch"):
+                batch = _rows_to_batch(rows, schema)
+            n_rows += len(rows)
+            # QC memo is per chunk; repeats across chunks still hit score_cache.
+            rows, qc_memo = [], {}
+            yield batch
+
+    if rows:
+        with metrics.stage("analytics.batch"):
+            batch = _rows_to_batch(rows, schema)
+        n_rows += len(rows)
+        yield batch
+
+    _record_metrics(n_rows, t_start)
+
+
+def iter_summary_frames(records: Iterable, **kwargs) -> Iterator[pd.DataFrame]:
+    """`iter_summary_batches` as pandas chunks (dictionary columns become `category`)."""
+    for batch in iter_summary_batches(records, **kwargs):
+        yield batch.to_pandas()
+
+
+def write_summary_parquet(
+    records: Iterable,
+    path: str | Path,
+    compression: str = "zstd",
+    **kwargs,
+) -> int:
+    """
+    Stream the chunked summary of `records` into a Parquet file at `path`.
+
+    Each chunk becomes one row group, so the full table is never built in
+    memory. The file can be read back with `pd.read_parquet` or opened as a
+    dataset (`pyarrow.dataset.dataset(path)`) alongside other summary files.
+    Keyword arguments go to `iter_summary_batches`. Returns the rows written.
+    """
+    import pyarrow.parquet as pq
+
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    tmp = p.with_name(p.name + ".tmp")
+    n = 0
+    schema = summary_schema(_gene_names(kwargs.get("references")))
+    with pq.ParquetWriter(tmp, schema, compression=compression) as writer:
+        for batch in iter_summary_batches(records, **kwargs):
+            writer.write_batch(batch)
+            n += batch.num_rows
+    os.replace(tmp, p)
+    return n
+
+
+def with_gene_mutations(df: pd.DataFrame, gene: str, min_count: int = 1) -> pd.DataFrame:
+    """
+    Rows with at least `min_count` mutations in `gene` (e.g. `"S"` for Spike).
+
+    A single vectorized comparison on the gene's count column; genes with no
+    column (never annotated) match nothing.
+    """
+    col = gene_column(gene)
+    if col not in df.columns:
+        return df.iloc[0:0]
+    return df[df[col].to_numpy() >= min_count]
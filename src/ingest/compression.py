@@ -0,0 +1,296 @@
+"""
+compression.py
+Transparent gzip / xz / zstd handling for NDJSON and FASTA files.
+
+- The codec is chosen from the file extension when writing, and from the
+  magic bytes when reading (so a mis-named file still opens correctly).
+- zstd output uses the "seekable" layout from the zstd contrib spec:
+  independent frames of `frame_records` lines each, followed by a seek
+  table in a skippable frame. Plain `zstd -d` still decompresses it, and
+  readers here can jump straight to a record without decompressing the
+  frames before it.
+
+zstd support needs the optional `zstandard` package; gzip and xz use the
+standard library.
+"""
+from __future__ import annotations
+
+import gzip
+import io
+import lzma
+import struct
+import threading
+from collections.abc import Iterator
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import IO
+
+from .parallel import bounded_map
+
+_EXTENSIONS = {
+    ".gz": "gzip",
+    ".gzip": "gzip",
+    ".xz": "xz",
+    ".zst": "zstd",
+    ".zstd": "zstd",
+}
+
+_MAGIC = {
+    b"\x1f\x8b": "gzip",
+    b"\xfd7zXZ\x00": "xz",
+    b"\x28\xb5\x2f\xfd": "zstd",
+}
+
+# zstd seekable format constants (little-endian on disk).
+_SKIPPABLE_SEEK_TABLE_MAGIC = 0x184D2A5E
+_SEEKABLE_MAGIC = 0x8F92EAB1
+_SEEK_FOOTER = struct.Struct("<IBI")  # number_of_frames, descriptor, seekable magic
+_SEEK_ENTRY = struct.Struct("<II")  # compressed size, decompressed size
+
+DEFAULT_FRAME_RECORDS = 1024
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError as e:  # pragma: no cover - depends on environment
+        raise ImportError(
+            "zstd-compressed files need the optional 'zstandard' package "
+            "(pip install zstandard)"
+        ) from e
+    return zstandard
+
+
+def compression_for_path(path: str | Path) -> str | None:
+    """Codec implied by the file extension, or None for plain text."""
+    return _EXTENSIONS.get(Path(path).suffix.lower())
+
+
+def detect_compression(path: str | Path) -> str | None:
+    """
+    Codec of an existing file, sniffed from its magic bytes.
+    Falls back to the extension for empty files.
+    """
+    p = Path(path)
+    with p.open("rb") as f:
+        head = f.read(6)
+    if not head:
+        return compression_for_path(p)
+    for magic, codec in _MAGIC.items():
+        if head.startswith(magic):
+            return codec
+    # zstd files may start with a skippable frame (0x184D2A50 - 0x184D2A5F).
+    if len(head) >= 4 and (struct.unpack("<I", head[:4])[0] & 0xFFFFFFF0) == 0x184D2A50:
+        return "zstd"
+    return None
+
+
+class SeekableZstdWriter(io.RawIOBase):
+    """
+    Binary writer producing seekable zstd: one independent frame per
+    `frame_records` newline-terminated records, then a seek table.
+
+    Frames are compressed with `threads` zstd worker threads (-1 = all cores).
+    """
+
+    def __init__(
+        self,
+        raw: IO[bytes],
+        frame_records: int = DEFAULT_FRAME_RECORDS,
+        level: int = 3,
+        threads: int = -1,
+    ) -> None:
+        super().__init__()
+        if frame_records <= 0:
+            raise ValueError("frame_records must be positive")
+        self._raw = raw
+        self._frame_records = frame_records
+        self._cctx = _zstd().ZstdCompressor(level=level, threads=threads)
+        self._pending: list[bytes] = []
+        self._pending_records = 0
+        self._frames: list[tuple[int, int]] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        n = len(data)
+        while data:
+            need = self._frame_records - self._pending_records
+            if data.count(b"\n") < need:
+                self._pending.append(data)
+                self._pending_records += data.count(b"\n")
+                break
+
+            # Cut exactly after the `need`-th newline.
+            cut = -1
+            for _ in range(need):
+                cut = data.index(b"\n", cut + 1)
+            self._pending.append(data[: cut + 1])
+            self._pending_records += need
+            self._flush_frame()
+            data = data[cut + 1 :]
+        return n
+
+    def _flush_frame(self) -> None:
+        if not self._pending:
+            return
+        chunk = b"".join(self._pending)
+        frame = self._cctx.compress(chunk)
+        self._raw.write(frame)
+        self._frames.append((len(frame), len(chunk)))
+        self._pending = []
+        self._pending_records = 0
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        try:
+            self._flush_frame()
+            entries = b"".join(_SEEK_ENTRY.pack(c, d) for c, d in self._frames)
+            footer = _SEEK_FOOTER.pack(len(self._frames), 0, _SEEKABLE_MAGIC)
+            body = entries + footer
+            self._raw.write(struct.pack("<II", _SKIPPABLE_SEEK_TABLE_MAGIC, len(body)) + body)
+            self._raw.close()
+        finally:
+            super().close()
+
+
+def read_seek_table(f: IO[bytes]) -> list[tuple[int, int]] | None:
+    """
+    Return [(compressed_size, decompressed_size), ...] for a seekable zstd
+    file, or None if the file has no seek table (e.g. it was appended to).
+    """
+    f.seek(0, io.SEEK_END)
+    size = f.tell()
+    if size < _SEEK_FOOTER.size + 8:
+        return None
+
+    f.seek(size - _SEEK_FOOTER.size)
+    n_frames, descriptor, magic = _SEEK_FOOTER.unpack(f.read(_SEEK_FOOTER.size))
+    if magic != _SEEKABLE_MAGIC:
+        return None
+
+    entry_size = _SEEK_ENTRY.size + (4 if descriptor & 0x80 else 0)
+    table_size = n_frames * entry_size
+    f.seek(size - _SEEK_FOOTER.size - table_size)
+    raw = f.read(table_size)
+    return [
+        _SEEK_ENTRY.unpack_from(raw, i * entry_size) for i in range(n_frames)
+    ]
+
+
+def open_binary(path: str | Path, mode: str = "rb", **zstd_options) -> IO[bytes]:
+    """
+    Open `path` for binary reading ("rb"), writing ("wb") or appending ("ab"),
+    compressing or decompressing as needed.
+
+    Appending to a zstd file adds a plain frame after the seek table, which
+    stays readable but is no longer seekable.
+    """
+    p = Path(path)
+    if mode not in {"rb", "wb", "ab"}:
+        raise ValueError(f"unsupported mode {mode!r}")
+
+    if mode == "rb":
+        codec = detect_compression(p)
+    else:
+        p.parent.mkdir(parents=True, exist_ok=True)
+        codec = compression_for_path(p)
+
+    if codec == "gzip":
+        return gzip.open(p, mode)
+    if codec == "xz":
+        return lzma.open(p, mode)
+    if codec == "zstd":
+        zstd = _zstd()
+        if mode == "rb":
+            return zstd.ZstdDecompressor().stream_reader(p.open("rb"), read_across_frames=True)
+        if mode == "wb":
+            return SeekableZstdWriter(p.open("wb"), **zstd_options)
+        threads = zstd_options.get("threads", -1)
+        return zstd.ZstdCompressor(threads=threads).stream_writer(p.open("ab"))
+    return p.open(mode)
+
+
+def open_text(path: str | Path, mode: str = "r", **zstd_options) -> IO[str]:
+    """Text-mode counterpart of `open_binary` ("r", "w" or "a"), UTF-8."""
+    raw = open_binary(path, mode[0] + "b", **zstd_options)
+    return io.TextIOWrapper(raw, encoding="utf-8", newline="\n", write_through=True)
+
+
+def _iter_lines(chunks: Iterator[bytes], skip: int = 0) -> Iterator[bytes]:
+    """Split a stream of byte chunks into lines, dropping the first `skip` lines."""
+    carry = b""
+    for chunk in chunks:
+        lines = (carry + chunk).split(b"\n")
+        carry = lines.pop()
+        for line in lines:
+            if skip:
+                skip -= 1
+                continue
+            yield line
+    if carry and not skip:
+        yield carry
+
+
+def _read_chunks(f: IO[bytes], size: int = 1 << 20) -> Iterator[bytes]:
+    while chunk := f.read(size):
+        yield chunk
+
+
+def iter_lines(path: str | Path, start: int = 0, workers: int = 4) -> Iterator[bytes]:
+    """
+    Yield raw lines (without newline) from a possibly-compressed file,
+    beginning at line number `start`.
+
+    For seekable zstd, only frames from the one containing `start` onward
+    are read, and they are decompressed in parallel (`workers` threads).
+    Every other format is decompressed from the beginning and skipped.
+    """
+    p = Path(path)
+    if detect_compression(p) == "zstd":
+        with p.open("rb") as f:
+            table = read_seek_table(f)
+        if table:
+            yield from _iter_seekable_zstd(p, table, start, workers)
+            return
+
+    with open_binary(p, "rb") as f:
+        yield from _iter_lines(_read_chunks(f), skip=start)
+
+
+def _iter_seekable_zstd(
+    path: Path, table: list[tuple[int, int]], start: int, workers: int
+) -> Iterator[bytes]:
+    zstd = _zstd()
+    offsets = [0]
+    for c_size, _ in table:
+        offsets.append(offsets[-1] + c_size)
+
+    # Decompressor contexts are not thread-safe: one per worker thread.
+    local = threading.local()
+    read_lock = threading.Lock()
+
+    with path.open("rb") as f:
+
+        def frame(i: int) -> bytes:
+            with read_lock:
+                f.seek(offsets[i])
+                data = f.read(table[i][0])
+            if not hasattr(local, "dctx"):
+                local.dctx = zstd.ZstdDecompressor()
+            return local.dctx.decompress(data, max_output_size=table[i][1])
+
+        # Every frame except the last holds the same number of records.
+        first_frame = 0
+        skip = start
+        if start and len(table) > 1:
+            per_frame = frame(0).count(b"\n")
+            first_frame = min(start // per_frame, len(table) - 1)
+            skip = start - first_frame * per_frame
+
+        frames = range(first_frame, len(table))
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            yield from _iter_lines(bounded_map(pool, frame, frames, 2 * workers), skip=skip)
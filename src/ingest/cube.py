@@ -0,0 +1,179 @@
+"""
+cube.py
+Precomputed space-time cube of genome counts and risk totals.
+
+Dashboard and API views (genomes per week x country x risk level, mean risk
+per region, ...) are roll-ups of the same small table, so they are computed
+from the cube's cells rather than from every scored genome:
+
+    cube = SpaceTimeCube.load(DEFAULT_PATH)              # scripts.build_genome_db keeps it current
+    cube.update(summarize_genomes(new_records))          # only the new genomes
+    cube.save("data/derived/cube.parquet")
+
+    cube.rollup("week", "risk_level")                    # weekly counts per level
+    cube.rollup("region", country="USA")                 # drill down into one country
+
+A cell is one combination of DIMENSIONS, holding `count` (genomes),
+`scored` (genomes with a risk score) and `risk_sum`. Sums add, so updates
+and roll-ups are exact and cost O(cells), independent of how many genomes
+went in. The `genes` dimension is the genome's `genes_affected` combination
+(one value per genome, so rolling it up never double-counts).
+"""
+from __future__ import annotations
+
+import os
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .flatfile import parse_collection_date
+from .forecast import week_start
+
+DEFAULT_PATH = Path("data/derived/cube.parquet")
+
+DIMENSIONS = ("week", "country", "region", "risk_level", "genes")
+MEASURES = ("count", "scored", "risk_sum")
+
+
+def _week(value: Any) -> date | None:
+    if isinstance(value, str):
+        value = parse_collection_date(value)
+    elif isinstance(value, pd.Timestamp):
+        value = value.date()
+    if value is None or not isinstance(value, date) or pd.isna(value):
+        return None
+    return week_start(value)
+
+
+def _empty_cells() -> pd.DataFrame:
+    cells = pd.DataFrame({d: pd.Series(dtype="object") for d in DIMENSIONS})
+    for m in MEASURES:
+        cells[m] = pd.Series(dtype="float64" if m == "risk_sum" else "int64")
+    return cells
+
+
+def _aggregate(frame: pd.DataFrame) -> pd.DataFrame:
+    return (
+        frame.groupby(list(DIMENSIONS), dropna=False, observed=True, sort=True)[list(MEASURES)]
+        .sum()
+        .reset_index()
+    )
+
+
+class SpaceTimeCube:
+    def __init__(self, cells: pd.DataFrame | None = None) -> None:
+        self.cells = _empty_cells() if cells is None else cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+    @property
+    def genomes(self) -> int:
+        return int(self.cells["count"].sum())
+
+    @staticmethod
+    def cells_from_summary(summary: pd.DataFrame) -> pd.DataFrame:
+        """Aggregate `summarize_genomes` rows into cells."""
+        if summary.empty:
+            return _empty_cells()
+
+        def text(col: str) -> pd.Series:
+            if col not in summary.columns:
+                return pd.Series("", index=summary.index)
+            return summary[col].astype("object").where(summary[col].notna(), "").astype(str)
+
+        scorable = summary["scorable"].astype(bool) if "scorable" in summary else True
+        frame = pd.DataFrame(
+            {
+                "week": [_week(v) for v in summary.get("date", pd.Series(index=summary.index))],
+                "country": text("country"),
+                "region": text("region"),
+                "risk_level": text("risk_level"),
+                "genes": text("genes_affected"),
+                "count": np.ones(len(summary), dtype=np.int64),
+                "scored": np.asarray(scorable, dtype=np.int64),
+                "risk_sum": summary["risk_score"].astype("float64").where(scorable, 0.0),
+            }
+        )
+        return _aggregate(frame)
+
+    @classmethod
+    def from_summary(cls, summary: pd.DataFrame) -> SpaceTimeCube:
+        return cls(cls.cells_from_summary(summary))
+
+    def update(self, summary: pd.DataFrame) -> SpaceTimeCube:
+        """
+        Add newly scored genomes. Cost is O(existing cells + new rows).
+
+        Pass each genome once: cells hold sums, not accessions, so the cube
+        cannot tell a re-ingested genome from a new one, nor remove the cell
+        a genome was counted in before its date, location or score changed.
+        Rebuild with `from_summary` (`build_genome_db --rebuild-cube`) then.
+        """
+        new = self.cells_from_summary(summary)
+        if new.empty:
+            return self
+        if self.cells.empty:
+            self.cells = new
+        else:
+            self.cells = _aggregate(pd.concat([self.cells, new], ignore_index=True))
+        return self
+
+    def rollup(self, *dims: str, **where: Any) -> pd.DataFrame:
+        """
+        Aggregate to `dims` (all other dimensions summed out), optionally
+        restricted to cells where `dim == value` (or `dim in [values]`).
+        No dims gives the grand total.
+
+        Adds `risk_mean` = risk_sum / scored (NaN where nothing was scored).
+        """
+        unknown = set(dims) | set(where)
+        unknown -= set(DIMENSIONS)
+        if unknown:
+            raise KeyError(f"Unknown cube dimension(s): {sorted(unknown)}")
+
+        cells = self.cells
+        if where:
+            mask = np.ones(len(cells), dtype=bool)
+            for dim, value in where.items():
+                values = value if isinstance(value, list | tuple | set) else [value]
+                mask &= cells[dim].isin(values).to_numpy()
+            cells = cells[mask]
+
+        if dims:
+            out = cells.groupby(list(dims), dropna=False, sort=True)[list(MEASURES)].sum().reset_index()
+        else:
+            out = cells[list(MEASURES)].sum().to_frame().T.astype(
+                {"count": "int64", "scored": "int64", "risk_sum": "float64"}
+            )
+        out["risk_mean"] = out["risk_sum"] / out["scored"].where(out["scored"] > 0)
+        return out
+
+    def drilldown(self, dim: str, **where: Any) -> pd.DataFrame:
+        """Break the slice selected by `where` down by one more dimension."""
+        return self.rollup(*where, dim, **where)
+
+    # -- persistence ------------------------------------------------------
+
+    def save(self, path: str | Path) -> None:
+        """Write cells as Parquet (dictionary-encoded dimensions, atomic replace)."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        cells = self.cells.astype({d: "category" for d in DIMENSIONS if d != "week"})
+        tmp = p.with_name(p.name + ".tmp")
+        cells.to_parquet(tmp, index=False, compression="zstd")
+        os.replace(tmp, p)
+
+    @classmethod
+    def load(cls, path: str | Path) -> SpaceTimeCube:
+        """Cube saved at `path`, or an empty one if the file does not exist."""
+        p = Path(path)
+        if not p.exists():
+            return cls()
+        cells = pd.read_parquet(p)
+        cells = cells.astype({d: "object" for d in DIMENSIONS})
+        cells["week"] = [v if v is None or not pd.isna(v) else None for v in cells["week"]]
+        return cls(cells)
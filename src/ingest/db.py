@@ -0,0 +1,380 @@
+"""
+db.py
+SQLite-backed store of canonical records, their mutations and their scores.
+
+NDJSON is the interchange format, but answering a question such as "Spike-
+mutated genomes from USA in March" from it means loading and scanning every
+record. This module keeps the same data in an embedded SQLite database
+(stdlib `sqlite3`, no server) with indexes on the columns queries filter on:
+
+    records    accession (PK), collection_date, country
+    mutations  (pos, alt), (gene, accession), accession
+    scores     accession (PK), risk_level
+    qc         accession (PK): the record's QC metrics (ingest.qc)
+
+    db = GenomeDB("data/derived/genomes.sqlite")
+    db.insert_records(iter_ndjson("data/raw/genbank.ndjson"))
+    recs = db.select_records(country="USA", since=date(2021, 3, 1), gene="S")
+    df = summarize_genomes(recs)
+
+Inserts are batched (`batch_size` rows per transaction) so bulk loads are
+not dominated by per-row commits.
+"""
+from __future__ import annotations
+
+import sqlite3
+from collections.abc import Callable, Iterable, Iterator
+from datetime import date
+from itertools import islice
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+from . import metrics
+from .flatfile import parse_collection_date
+from .models import CanonicalGenomeRecord
+from .mutations import Mutation
+from .qc import QCMetrics
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+DEFAULT_PATH = Path("data/derived/genomes.sqlite")
+DEFAULT_BATCH_SIZE = 5_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS records (
+    accession       TEXT PRIMARY KEY,
+    organism        TEXT NOT NULL,
+    collection_date TEXT,
+    country         TEXT,
+    region          TEXT,
+    host            TEXT,
+    sequence_length INTEGER NOT NULL,
+    source          TEXT NOT NULL,
+    sequence        TEXT,
+    normalized      INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS records_date ON records (collection_date);
+CREATE INDEX IF NOT EXISTS records_country_date ON records (country, collection_date);
+
+CREATE TABLE IF NOT EXISTS mutations (
+    accession TEXT NOT NULL REFERENCES records (accession) ON DELETE CASCADE,
+    pos       INTEGER NOT NULL,
+    ref       TEXT NOT NULL,
+    alt       TEXT NOT NULL,
+    gene      TEXT
+);
+CREATE INDEX IF NOT EXISTS mutations_pos_alt ON mutations (pos, alt);
+CREATE INDEX IF NOT EXISTS mutations_gene ON mutations (gene, accession);
+CREATE INDEX IF NOT EXISTS mutations_accession ON mutations (accession);
+
+CREATE TABLE IF NOT EXISTS scores (
+    accession        TEXT PRIMARY KEY REFERENCES records (accession) ON DELETE CASCADE,
+    scorable         INTEGER NOT NULL,
+    skip_reason      TEXT,
+    num_mutations    INTEGER NOT NULL,
+    genes_affected   TEXT,
+    risk_score       REAL NOT NULL,
+    risk_level       TEXT,
+    risk_explanation TEXT
+);
+CREATE INDEX IF NOT EXISTS scores_level ON scores (risk_level);
+
+CREATE TABLE IF NOT EXISTS qc (
+    accession             TEXT PRIMARY KEY REFERENCES records (accession) ON DELETE CASCADE,
+    n_fraction            REAL NOT NULL,
+    ambiguous_bases       INTEGER NOT NULL,
+    longest_n_run         INTEGER NOT NULL,
+    reference_coverage    REAL NOT NULL,
+    reference_differences INTEGER NOT NULL
+);
+"""
+
+_RECORD_COLUMNS = (
+    "accession", "organism", "collection_date", "country", "region",
+    "host", "sequence_length", "source", "sequence", "normalized",
+)
+_QC_COLUMNS = tuple(QCMetrics.__dataclass_fields__)
+_SCORE_COLUMNS = (
+    "accession", "scorable", "skip_reason", "num_mutations",
+    "genes_affected", "risk_score", "risk_level", "risk_explanation",
+)
+
+
+def _batches(rows: Iterable[tuple], size: int) -> Iterator[list[tuple]]:
+    it = iter(rows)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+def _text(value: Any) -> str | None:
+    # pandas fills missing text with NaN; SQLite would store that as REAL, not NULL.
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    return str(value)
+
+
+def _record_row(rec: CanonicalGenomeRecord) -> tuple:
+    d = rec.collection_date
+    return (
+        rec.accession, rec.organism, d.isoformat() if d else None, rec.country,
+        rec.region, rec.host, rec.sequence_length, rec.source, rec.sequence,
+        int(rec.normalized),
+    )
+
+
+def _record_from_row(row: sqlite3.Row) -> CanonicalGenomeRecord:
+    return CanonicalGenomeRecord(
+        accession=row["accession"],
+        organism=row["organism"],
+        collection_date=parse_collection_date(row["collection_date"]),
+        country=row["country"],
+        region=row["region"],
+        host=row["host"],
+        sequence_length=row["sequence_length"],
+        source=row["source"],
+        sequence=row["sequence"],
+        normalized=bool(row["normalized"]),
+    )
+
+
+def _where(
+    country: str | None = None,
+    since: date | None = None,
+    until: date | None = None,
+    gene: str | None = None,
+    min_gene_mutations: int = 1,
+    mutation: tuple[int, str] | None = None,
+    risk_level: str | None = None,
+) -> tuple[str, list[Any]]:
+    """SQL WHERE clause (over `records r`) and its parameters for the query filters."""
+    clauses: list[str] = []
+    params: list[Any] = []
+    if country is not None:
+        clauses.append("r.country = ?")
+        params.append(country)
+    if since is not None:
+        clauses.append("r.collection_date >= ?")
+        params.append(since.isoformat())
+    if until is not None:
+        clauses.append("r.collection_date <= ?")
+        params.append(until.isoformat())
+    if gene is not None:
+        if min_gene_mutations <= 1:
+            clauses.append(
+                "EXISTS (SELECT 1 FROM mutations m WHERE m.gene = ? AND m.accession = r.accession)"
+            )
+            params.append(gene)
+        else:
+            clauses.append(
+                "(SELECT COUNT(*) FROM mutations m"
+                " WHERE m.gene = ? AND m.accession = r.accession) >= ?"
+            )
+            params += [gene, min_gene_mutations]
+    if mutation is not None:
+        clauses.append(
+            "r.accession IN (SELECT m.accession FROM mutations m WHERE m.pos = ? AND m.alt = ?)"
+        )
+        params += [int(mutation[0]), mutation[1]]
+    if risk_level is not None:
+        clauses.append("r.accession IN (SELECT s.accession FROM scores s WHERE s.risk_level = ?)")
+        params.append(risk_level)
+    return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+class GenomeDB:
+    def __init__(self, path: str | Path = DEFAULT_PATH, batch_size: int = DEFAULT_BATCH_SIZE) -> None:
+        self.path = path
+        self.batch_size = batch_size
+        if str(path) != ":memory:":
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(path))
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA foreign_keys = ON")
+        if str(path) != ":memory:":
+            # WAL lets the dashboard read while an ingest is writing.
+            self.conn.execute("PRAGMA journal_mode = WAL")
+            self.conn.execute("PRAGMA synchronous = NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> GenomeDB:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+
+    def _insert(self, sql: str, rows: Iterable[tuple]) -> int:
+        n = 0
+        for batch in _batches(rows, self.batch_size):
+            with self.conn:  # one transaction per batch
+                self.conn.executemany(sql, batch)
+            n += len(batch)
+        return n
+
+    # -- writes -----------------------------------------------------------
+
+    def insert_records(self, records: Iterable[CanonicalGenomeRecord]) -> int:
+        """Insert or replace records (by accession). Returns the number written."""
+        # An upsert, not INSERT OR REPLACE: REPLACE deletes the old row, which
+        # would cascade to the record's mutations and scores.
+        sql = (
+            f"INSERT INTO records ({', '.join(_RECORD_COLUMNS)})"
+            f" VALUES ({', '.join('?' * len(_RECORD_COLUMNS))})"
+            " ON CONFLICT (accession) DO UPDATE SET "
+            + ", ".join(f"{c} = excluded.{c}" for c in _RECORD_COLUMNS[1:])
+        )
+        with metrics.stage("db.insert_records"):
+            n = self._insert(sql, map(_record_row, records))
+        metrics.count("db.records_written", n)
+        return n
+
+    def insert_mutations(self, mutations: Iterable[tuple[str, Mutation]]) -> int:
+        """Insert (accession, Mutation) pairs; callers replace an accession's set as a whole."""
+        rows = ((acc, m.pos, m.ref, m.alt, m.gene) for acc, m in mutations)
+        sql = "INSERT INTO mutations (accession, pos, ref, alt, gene) VALUES (?, ?, ?, ?, ?)"
+        with metrics.stage("db.insert_mutations"):
+            return self._insert(sql, rows)
+
+    def index_mutations(
+        self,
+        records: Iterable[CanonicalGenomeRecord],
+        identify_mutations: Callable[[CanonicalGenomeRecord], list[Mutation]],
+    ) -> int:
+        """
+        (Re)compute and store the mutations of `records`, e.g. with
+        `Reference.identify_mutations` or a `diff_sequences` partial.
+        Any mutations previously stored for those accessions are replaced.
+        """
+        def pairs() -> Iterator[tuple[str, Mutation]]:
+            for batch in _batches(records, self.batch_size):
+                with self.conn:
+                    self.conn.executemany(
+                        "DELETE FROM mutations WHERE accession = ?",
+                        [(rec.accession,) for rec in batch],
+                    )
+                for rec in batch:
+                    if rec.sequence:
+                        for m in identify_mutations(rec):
+                            yield rec.accession, m
+
+        return self.insert_mutations(pairs())
+
+    def insert_summary(self, summary: pd.DataFrame) -> int:
+        """
+        Store `summarize_genomes` scores, and the QC metrics of every genome
+        that had them, by accession (insert or replace).
+        """
+        self._insert_qc(summary)
+        sql = (
+            f"INSERT OR REPLACE INTO scores ({', '.join(_SCORE_COLUMNS)})"
+            f" VALUES ({', '.join('?' * len(_SCORE_COLUMNS))})"
+        )
+        rows = (
+            (
+                str(row.accession), int(bool(row.scorable)), _text(row.skip_reason),
+                int(row.num_mutations), str(row.genes_affected), float(row.risk_score),
+                str(row.risk_level), _text(row.risk_explanation),
+            )
+            for row in summary.itertuples(index=False)
+        )
+        return self._insert(sql, rows)
+
+    def _insert_qc(self, summary: pd.DataFrame) -> int:
+        columns = [f"qc_{c}" for c in _QC_COLUMNS]
+        if not set(columns).issubset(summary.columns):
+            return 0
+        measured = summary[summary[columns[0]].notna()]
+        sql = (
+            f"INSERT OR REPLACE INTO qc (accession, {', '.join(_QC_COLUMNS)})"
+            f" VALUES ({', '.join('?' * (len(_QC_COLUMNS) + 1))})"
+        )
+        rows = (
+            (
+                str(row.accession), float(row.qc_n_fraction), int(row.qc_ambiguous_bases),
+                int(row.qc_longest_n_run), float(row.qc_reference_coverage),
+                int(row.qc_reference_differences),
+            )
+            for row in measured.itertuples(index=False)
+        )
+        return self._insert(sql, rows)
+
+    # -- reads ------------------------------------------------------------
+
+    def get(self, accession: str) -> CanonicalGenomeRecord | None:
+        row = self.conn.execute(
+            "SELECT * FROM records WHERE accession = ?", (accession,)
+        ).fetchone()
+        return _record_from_row(row) if row is not None else None
+
+    def get_qc(self, accession: str) -> QCMetrics | None:
+        """Stored QC metrics for one record, or None if it was never measured."""
+        row = self.conn.execute(
+            f"SELECT {', '.join(_QC_COLUMNS)} FROM qc WHERE accession = ?", (accession,)
+        ).fetchone()
+        return QCMetrics(**dict(row)) if row is not None else None
+
+    def countries(self) -> list[str]:
+        rows = self.conn.execute(
+            "SELECT DISTINCT country FROM records WHERE country IS NOT NULL ORDER BY country"
+        )
+        return [r[0] for r in rows]
+
+    def scored_accessions(self) -> set[str]:
+        """Accessions that already have a row in the scores table."""
+        return {r[0] for r in self.conn.execute("SELECT accession FROM scores")}
+
+    def select_records(self, **filters: Any) -> Iterator[CanonicalGenomeRecord]:
+        """
+        Stream records matching the filters (country, since, until, gene,
+        min_gene_mutations, mutation=(pos, alt), risk_level), in accession order.
+        The result can be passed straight to `summarize_genomes`.
+        """
+        where, params = _where(**filters)
+        cur = self.conn.execute(f"SELECT r.* FROM records r{where} ORDER BY r.accession", params)
+        for row in cur:
+            yield _record_from_row(row)
+
+    def iter_mutations(self) -> Iterator[tuple[str, list[Mutation]]]:
+        """(accession, mutations) per record that has any, in accession order."""
+        rows = self.conn.execute(
+            "SELECT accession, pos, ref, alt, gene FROM mutations ORDER BY accession, pos"
+        )
+        current, batch = None, []
+        for row in rows:
+            if row["accession"] != current:
+                if batch:
+                    yield current, batch
+                current, batch = row["accession"], []
+            batch.append(Mutation(pos=row["pos"], ref=row["ref"], alt=row["alt"], gene=row["gene"]))
+        if batch:
+            yield current, batch
+
+    def summary_frame(self, **filters: Any) -> pd.DataFrame:
+        """Stored scores joined with record metadata, for the same filters as `select_records`."""
+        import pandas as pd
+
+        where, params = _where(**filters)
+        sql = (
+            "SELECT r.accession, r.source, r.sequence_length, r.collection_date AS date,"
+            " r.country, r.region, s.scorable, s.skip_reason, s.num_mutations,"
+            " s.genes_affected, s.risk_score, s.risk_level, s.risk_explanation, "
+            + ", ".join(f"q.{c} AS qc_{c}" for c in _QC_COLUMNS)
+            + " FROM records r JOIN scores s ON s.accession = r.accession"
+            f" LEFT JOIN qc q ON q.accession = r.accession{where}"
+            " ORDER BY r.accession"
+        )
+        df = pd.read_sql_query(sql, self.conn, params=params)
+        df["scorable"] = df["scorable"].astype(bool)
+        return df
+
+    def query_plan(self, **filters: Any) -> str:
+        """SQLite's plan for `select_records(**filters)`; shows which indexes are used."""
+        where, params = _where(**filters)
+        rows = self.conn.execute(f"EXPLAIN QUERY PLAN SELECT r.* FROM records r{where}", params)
+        return "\n".join(row["detail"] for row in rows)
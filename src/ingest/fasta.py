@@ -0,0 +1,178 @@
+"""
+fasta.py
+Bulk ingest from FASTA + metadata.tsv exports (GISAID / Nextstrain style).
+
+The FASTA file is read in fixed-size binary chunks, so memory stays flat no
+matter how large the file is. Metadata is joined through an in-memory hash
+index of key -> byte offset, and each row is only parsed when its sequence
+shows up.
+"""
+from __future__ import annotations
+
+import csv
+import dataclasses
+from collections.abc import Iterator
+from pathlib import Path
+
+from .compression import open_binary
+from .flatfile import normalize_genbank_minimal
+from .models import CanonicalGenomeRecord
+
+_BUFFER_SIZE = 1 << 20  # 1 MiB
+_SEQUENCE_WHITESPACE = b" \t\r\n"
+
+SARS_COV_2 = "Severe acute respiratory syndrome coronavirus 2"
+
+
+def _split_record(block: bytes) -> tuple[str, str]:
+    header, _, body = block.partition(b"\n")
+    seq = body.translate(None, _SEQUENCE_WHITESPACE)
+    return header.strip().decode("utf-8"), seq.decode("ascii")
+
+
+def iter_fasta(path: str | Path, buffer_size: int = _BUFFER_SIZE) -> Iterator[tuple[str, str]]:
+    """
+    Stream (header, sequence) pairs from a FASTA or multi-FASTA file
+    (optionally gzip / xz / zstd compressed).
+
+    Records are split on "\\n>" inside each chunk; only the trailing,
+    possibly incomplete record is carried over to the next read.
+    """
+    carry = b""
+    first = True
+
+    with open_binary(path, "rb") as f:
+        while chunk := f.read(buffer_size):
+            buf = carry + chunk
+            if first:
+                buf = buf.lstrip()
+                if buf.startswith(b">"):
+                    buf = buf[1:]
+                first = False
+
+            parts = buf.split(b"\n>")
+            carry = parts.pop()
+            for part in parts:
+                yield _split_record(part)
+
+    if carry.strip():
+        yield _split_record(carry)
+
+
+class MetadataIndex:
+    """
+    Hash index over a tab-separated metadata file: key column value -> byte offset.
+
+    Only keys and offsets live in memory; the row itself is re-read on lookup.
+    """
+
+    def __init__(self, path: str | Path, key_column: str = "strain") -> None:
+        self.path = Path(path)
+        self.key_column = key_column
+        self._offsets: dict[str, int] = {}
+
+        with self.path.open("rb") as f:
+            self.columns = f.readline().decode("utf-8").rstrip("\r\n").split("\t")
+            if key_column not in self.columns:
+                raise ValueError(f"metadata has no {key_column!r} column")
+            key_pos = self.columns.index(key_column)
+
+            offset = f.tell()
+            for line in f:
+                fields = line.split(b"\t", key_pos + 1)
+                if len(fields) > key_pos:
+                    key = fields[key_pos].rstrip(b"\r\n").decode("utf-8")
+                    self._offsets.setdefault(key, offset)
+                offset += len(line)
+
+        self._handle = None
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._offsets
+
+    def get(self, key: str) -> dict[str, str] | None:
+        offset = self._offsets.get(key)
+        if offset is None:
+            return None
+        if self._handle is None:
+            self._handle = self.path.open("rb")
+        self._handle.seek(offset)
+        line = self._handle.readline().decode("utf-8").rstrip("\r\n")
+        row = next(csv.reader([line], delimiter="\t"))
+        return dict(zip(self.columns, row, strict=False))
+
+    def close(self) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+
+def _clean(value: str | None) -> str | None:
+    if value is None:
+        return None
+    value = value.strip()
+    if not value or value == "?":
+        return None
+    return value
+
+
+def metadata_to_minimal(
+    key: str,
+    sequence: str,
+    meta: dict[str, str] | None,
+    organism: str = SARS_COV_2,
+) -> dict[str, str | None]:
+    """
+    Map a FASTA record + its metadata row onto the minimal GenBank-like dict
+    that `normalize_genbank_minimal` already understands.
+    """
+    meta = meta or {}
+    accession = (
+        _clean(meta.get("genbank_accession"))
+        or _clean(meta.get("accession"))
+        or _clean(meta.get("gisaid_epi_isl"))
+        or key
+    )
+    country = _clean(meta.get("country"))
+    division = _clean(meta.get("division"))
+    location = f"{country}: {division}" if country and division else country
+
+    return {
+        "accession": accession,
+        "organism": _clean(meta.get("organism")) or organism,
+        "collection_date": _clean(meta.get("date")),
+        "location": location,
+        "host": _clean(meta.get("host")),
+        "sequence": sequence,
+    }
+
+
+def iter_fasta_records(
+    fasta_path: str | Path,
+    metadata_path: str | Path | None = None,
+    *,
+    key_column: str = "strain",
+    organism: str = SARS_COV_2,
+    source: str = "fasta",
+    buffer_size: int = _BUFFER_SIZE,
+) -> Iterator[CanonicalGenomeRecord]:
+    """
+    Stream CanonicalGenomeRecords from a FASTA file, joining metadata by key.
+
+    The FASTA key is the first whitespace-delimited token of each header
+    (the full header for GISAID-style `name|EPI_ISL|date` headers is kept
+    as-is up to the first space).
+    """
+    index = MetadataIndex(metadata_path, key_column=key_column) if metadata_path else None
+    try:
+        for header, sequence in iter_fasta(fasta_path, buffer_size=buffer_size):
+            key = header.split(None, 1)[0] if header else ""
+            meta = index.get(key) if index is not None else None
+            raw = metadata_to_minimal(key, sequence, meta, organism=organism)
+            yield dataclasses.replace(normalize_genbank_minimal(raw), source=source)
+    finally:
+        if index is not None:
+            index.close()
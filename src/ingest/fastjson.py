@@ -0,0 +1,67 @@
+"""
+fastjson.py
+JSON encoding and decoding for NDJSON records, with orjson when installed.
+
+orjson is optional (`pip install orjson`); without it everything falls back
+to the stdlib `json` module. Either way `dumps_record` returns exactly the
+text of the historical record format,
+
+    json.dumps(rec.__dict__, default=str)
+
+so files written with or without orjson, serially or in parallel, are
+byte-identical. Only the values orjson renders the same way as the stdlib
+(ASCII strings without DEL) go through orjson. That covers sequences, the
+bulk of every line; anything else uses the stdlib encoder, which escapes
+non-ASCII text.
+"""
+from __future__ import annotations
+
+import json
+from functools import cache
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None
+
+BACKEND = "orjson" if orjson is not None else "json"
+
+# json.dumps(obj, default=str) builds a new encoder per call; reuse one.
+_encode = json.JSONEncoder(default=str).encode
+
+
+@cache
+def _key(name: str) -> str:
+    return _encode(name) + ": "
+
+
+def _value(value: Any) -> str:
+    t = type(value)
+    if t is str:
+        if value.isascii() and "\x7f" not in value:
+            return orjson.dumps(value).decode("ascii")
+    elif value is None:
+        return "null"
+    elif t is int:
+        return int.__repr__(value)  # what the stdlib encoder emits
+    elif t is bool:
+        return "true" if value else "false"
+    return _encode(value)
+
+
+def dumps_record(rec: Any) -> str:
+    """One NDJSON line (without the newline) for a record dataclass."""
+    if orjson is None:
+        return _encode(rec.__dict__)
+    return "{" + ", ".join(_key(k) + _value(v) for k, v in rec.__dict__.items()) + "}"
+
+
+def loads(data: str | bytes) -> Any:
+    """Parse one JSON document; orjson when available, else the stdlib."""
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass  # NaN / Infinity and >64-bit ints are stdlib-only; let it decide
+    return json.loads(data)
@@ -0,0 +1,357 @@
+"""
+flatfile.py
+Network-free GenBank parsing and normalization.
+
+Everything here works on text and dicts already in hand, so NDJSON / FASTA
+ingest and analysis can use it without importing Biopython (only the
+SeqIO reference parser imports it, on first call). Network fetching lives
+in `ingest.genbank`, which re-exports these names.
+"""
+from __future__ import annotations
+
+import io
+from collections.abc import Iterable
+from datetime import date
+from typing import Any
+
+from .models import CanonicalGenomeRecord
+from .parallel import DEFAULT_CHUNK_SIZE
+from .sequences import canonicalize_sequence
+
+
+def parse_collection_date(raw: str | None) -> date | None:
+    """
+    Convert a GenBank-style collection date string into a Python date object.
+
+    GenBank often stores dates in partially-known forms:
+      - "YYYY-MM-DD"  (full date)
+      - "YYYY-MM"     (month known, day unknown)
+      - "YYYY"        (only the year is known)
+
+    This function normalizes all of those into real `date` objects
+    so that downstream code can sort, compare, and model them reliably.
+
+    If the date is missing or unknown, we return None.
+    """
+    # Month mapping
+    MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12,
+    }
+
+
+    # If the input is None or an empty string, we cannot parse a date.
+    # Returning None allows the rest of the pipeline to handle "unknown".
+    if not raw:
+        return None
+
+    # GenBank sometimes uses strings like "unknown" instead of a real date.
+    # Treat those as missing data.
+    s = str(raw).strip()
+    if s.lower() in {"unknown", "na", "n/a", "none"}:
+        return None
+    
+    # Split the string on "-" so:
+    #   "2024-08-19" -> ["2024", "08", "19"]
+    #   "2024-08"    -> ["2024", "08"]
+    #   "2024"       -> ["2024"]
+    parts = s.split("-")
+
+    # Case 1: full date (year, month, day)
+    if len(parts) == 3:
+        y, m, d = (p.strip() for p in parts)
+
+        try:
+            # If month is a name like "Dec"
+            m_key = m[:3].lower()
+            if m_key in MONTHS and not m.isdigit():
+                return date(int(y), MONTHS[m_key], int(d))
+
+            return date(int(y), int(m), int(d))
+        except ValueError:
+            # GenBank occasionally has malformed dates (e.g., Feb-30).
+            # Treat as unknown so ingestion doesn't crash.
+            return None
+
+    # Case 2: year and month only → assume day = 1
+    # This lets us still place the sample on a timeline.
+    if len(parts) == 2:
+        a, b = parts[0].strip(), parts[1].strip()
+
+        # GenBank sometimes uses "Dec-2019" (month name + year)
+        if a[:3].lower() in MONTHS and b.isdigit():
+            return date(int(b), MONTHS[a[:3].lower()], 1)
+
+        # Otherwise assume numeric "YYYY-MM"
+        y, m = a, b
+        return date(int(y), int(m), 1)
+
+
+    # Case 3: year only → assume January 1st
+    if len(parts) == 1:
+        y = parts[0]
+        return date(int(y), 1, 1)
+
+    # Anything else is malformed → treat as unknown
+    return None
+
+def parse_location(raw: str | None) -> tuple[str | None, str | None]:
+    """
+    Normalize a location string into (country, region).
+
+    Expected common format:
+      - "USA: Illinois" -> ("USA", "Illinois")
+    """
+    if not raw:
+        return (None, None)
+
+    s = str(raw).strip()
+    if not s:
+        return (None, None)
+
+    if ":" in s:
+        country, region = s.split(":", 1)
+        return (country.strip() or None, region.strip() or None)
+
+    return (s, None)
+
+
+# Flatfile layout (fixed columns, see the GenBank release notes).
+_HEADER_INDENT = 12
+_QUALIFIER_INDENT = 21
+_QUALIFIER_SPACER = " " * _QUALIFIER_INDENT
+
+# Lineage lines that have no ";" but still are not part of the organism name
+# (same list Biopython uses to tell a wrapped organism name from its taxonomy).
+_LINEAGE_ROOTS = {
+    "Bacteria.",
+    "Archaea.",
+    "Eukaryota.",
+    "Unclassified.",
+    "Viruses.",
+    "cellular organisms.",
+    "other sequences.",
+    "unclassified sequences.",
+}
+
+# ORIGIN lines are "   61 acgt acgt ..." - drop the digits and whitespace in one pass.
+_ORIGIN_JUNK = str.maketrans("", "", "0123456789 \t\r\n")
+
+
+def _parse_organism(header: str) -> str:
+    start = header.find("\n  ORGANISM")
+    if start == -1:
+        return ""
+
+    lines = header[start + 1 :].split("\n")
+    organism = lines[0][_HEADER_INDENT:].strip()
+    in_lineage = False
+    for line in lines[1:]:
+        if not line.startswith(" " * _HEADER_INDENT):
+            break
+        body = line[_HEADER_INDENT:].strip()
+        if in_lineage or ";" in line or body in _LINEAGE_ROOTS:
+            in_lineage = True
+        elif body != ".":
+            # Long organism names wrap onto a second line.
+            organism += " " + body
+    return organism
+
+
+def _first_feature_qualifiers(features: str) -> dict[str, list[str]]:
+    """Qualifiers of the first feature in a FEATURES block (usually `source`)."""
+    lines = features.split("\n")[1:]  # skip the "FEATURES  Location/Qualifiers" line
+
+    # The first feature starts on the first line with a key in columns 6-21.
+    start = next((i for i, ln in enumerate(lines) if ln[5:_QUALIFIER_INDENT].strip()), None)
+    if start is None:
+        return {}
+
+    body: list[str] = []
+    for line in lines[start + 1 :]:
+        if not line.startswith(_QUALIFIER_SPACER):
+            if line.strip():
+                break  # next feature
+            continue
+        if line.strip():
+            body.append(line[_QUALIFIER_INDENT:].strip())
+
+    qualifiers: dict[str, list[str]] = {}
+    i = 0
+    while i < len(body):
+        line = body[i]
+        i += 1
+        if not line.startswith("/"):
+            continue  # wrapped location line
+
+        key, eq, value = line[1:].partition("=")
+        if not eq:
+            qualifiers.setdefault(key, [""])
+            continue
+
+        parts = [value]
+        if value == '"':
+            pass  # a lone quote is kept as-is, like Biopython does
+        elif value.startswith('"'):
+            # Quoted values run until a line ends with the closing quote.
+            while not parts[-1].endswith('"') and i < len(body):
+                parts.append(body[i])
+                i += 1
+        else:
+            while i < len(body) and not body[i].startswith("/"):
+                parts.append(body[i])
+                i += 1
+
+        value = " ".join(parts)
+        if len(value) > 1 and value[0] == '"' and value[-1] == '"':
+            value = value[1:-1]
+        qualifiers.setdefault(key, []).append(value.replace('""', '"'))
+    return qualifiers
+
+
+def _location(qualifiers: Any) -> str | None:
+    # NCBI replaced /country with /geo_loc_name in 2024; older records keep /country.
+    return (qualifiers.get("country") or qualifiers.get("geo_loc_name") or [None])[0]
+
+
+def parse_genbank_minimal(text: str, accession: str) -> dict[str, Any]:
+    """
+    Extract the minimal intake dict straight from GenBank flatfile text.
+
+    This reads only what we need (organism, the first feature's
+    collection_date / country / host, and the ORIGIN sequence) instead of
+    building a full Biopython SeqRecord with every feature, which is
+    several times faster for large batches. Output matches
+    `parse_genbank_minimal_seqio` on the same text.
+    """
+    feat_at = text.find("\nFEATURES")
+    origin_at = text.find("\nORIGIN")
+    end_at = text.find("\n//", max(origin_at, 0))
+
+    header_end = min(i for i in (feat_at, origin_at, end_at, len(text)) if i != -1)
+    organism = _parse_organism(text[:header_end])
+
+    qualifiers: dict[str, list[str]] = {}
+    if feat_at != -1:
+        feat_end = min(i for i in (origin_at, end_at, len(text)) if i > feat_at)
+        qualifiers = _first_feature_qualifiers(text[feat_at + 1 : feat_end])
+
+    sequence = ""
+    if origin_at != -1:
+        origin = text[origin_at + 1 : end_at if end_at != -1 else len(text)]
+        sequence = origin.split("\n", 1)[1] if "\n" in origin else ""
+        sequence = sequence.translate(_ORIGIN_JUNK).upper()
+
+    return {
+        "accession": accession,
+        "organism": organism,
+        "collection_date": (qualifiers.get("collection_date") or [None])[0],
+        "location": _location(qualifiers),
+        "host": (qualifiers.get("host") or [None])[0],
+        "sequence": sequence,
+    }
+
+
+def parse_genbank_minimal_seqio(text: str, accession: str) -> dict[str, Any]:
+    """
+    Reference implementation of `parse_genbank_minimal` using Biopython's
+    SeqIO. Kept for parity tests and benchmarks.
+    """
+    from Bio import SeqIO
+
+    record = SeqIO.read(io.StringIO(text), "genbank")
+
+    # GenBank stores most useful metadata on the "source" feature.
+    # It is typically the first feature in the record.
+    source_feature = record.features[0] if record.features else None
+    qualifiers = source_feature.qualifiers if source_feature else {}
+
+    # Common qualifier keys we care about:
+    # - collection_date
+    # - country / geo_loc_name (often formatted like "USA: California")
+    # - host
+    collection_date = (qualifiers.get("collection_date") or [None])[0]
+    location = _location(qualifiers)
+    host = (qualifiers.get("host") or [None])[0]
+
+    organism = record.annotations.get("organism", "") or ""
+    sequence = str(record.seq)
+
+    # Return a minimal dict that our normalizer already knows how to handle.
+    return {
+        "accession": accession,
+        "organism": organism,
+        "collection_date": collection_date,
+        "location": location,
+        "host": host,
+        "sequence": sequence,
+    }
+
+
+def normalize_genbank_minimal(raw: dict[str, Any]) -> CanonicalGenomeRecord:
+    """
+    Convert a minimal GenBank-like dict into our CanonicalGenomeRecord.
+
+    Expected keys (MVP):
+      - accession
+      - organism
+      - collection_date (ISO string or partial)
+      - location ("Country: Region" or "Country")
+      - host (optional)
+      - sequence (string, optional)
+    """
+    accession = str(raw.get("accession", "")).strip()
+    organism = str(raw.get("organism", "")).strip()
+
+    # Required fields for our canonical contract.
+    if not accession:
+        raise ValueError("accession is required")
+    if not organism:
+        raise ValueError("organism is required")
+
+
+    collection_date = parse_collection_date(raw.get("collection_date"))
+    country, region = parse_location(raw.get("location"))
+
+    host_raw = raw.get("host")
+    host = str(host_raw).strip() if host_raw else None
+
+    # Canonicalize once here (case, U->T, whitespace, odd symbols) so no
+    # downstream stage repeats it per comparison.
+    seq_str = canonicalize_sequence(str(raw.get("sequence") or ""))
+    sequence_length = len(seq_str)
+
+    return CanonicalGenomeRecord(
+        accession=accession,
+        organism=organism,
+        collection_date=collection_date,
+        country=country,
+        region=region,
+        host=host,
+        sequence_length=sequence_length,
+        sequence=seq_str,
+        source="genbank",
+        normalized=True,
+    )
+
+
+def normalize_many_genbank_minimal(
+    raw_records: Iterable[dict[str, Any]],
+    workers: int = 1,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> list[CanonicalGenomeRecord]:
+    """
+    Normalize many minimal GenBank-like dicts into CanonicalGenomeRecord objects.
+    Preserves input order.
+
+    With `workers > 1` records are normalized in chunks of `chunk_size` on a
+    process pool; worthwhile for large batches of full-length genomes.
+    """
+    if workers <= 1:
+        return [normalize_genbank_minimal(r) for r in raw_records]
+
+    # Deferred: multiprocessing is slow to import and only needed here.
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(normalize_genbank_minimal, raw_records, chunksize=chunk_size))
@@ -0,0 +1,236 @@
+"""
+forecast.py
+Variant growth rates and short-term frequency forecasts.
+
+Counts are aggregated into weekly bins per region, then a multinomial
+logistic growth model is fitted for every region:
+
+    log(p_k(t) / p_0(t)) = a_k + b_k * t      (t in weeks)
+
+`b_k` is the weekly growth advantage of label k over the baseline label 0.
+All regions are fitted together with batched Newton steps (one stacked
+`np.linalg.solve` per iteration), never one Python loop per region.
+"""
+from __future__ import annotations
+
+import hashlib
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from .flatfile import parse_collection_date
+
+# Small ridge penalty keeps fits finite when a label is absent from a region.
+_RIDGE = 1e-3
+_NEWTON_STEPS = 25
+
+
+def _get(rec, key, default=None):
+    if isinstance(rec, dict):
+        return rec.get(key, default)
+    return getattr(rec, key, default)
+
+
+def week_start(d: date) -> date:
+    """Monday of the ISO week containing `d`."""
+    return d - timedelta(days=d.weekday())
+
+
+def weekly_counts(
+    records: Iterable[Any],
+    label: str | Callable[[Any], str | None],
+    region: str = "country",
+) -> pd.DataFrame:
+    """
+    Aggregate records into a (region, week) x label count table.
+
+    `label` is either a record field name (e.g. a lineage column) or a
+    function returning the label for a record (e.g. "has S:E484K").
+    It is required: `CanonicalGenomeRecord` carries no lineage field, so
+    canonical records need a function (or a dict field added upstream).
+    Records missing a date, region or label are skipped.
+    """
+    get_label = label if callable(label) else (lambda r: _get(r, label))
+
+    rows = []
+    for r in records:
+        d = _get(r, "collection_date")
+        if isinstance(d, str):
+            d = parse_collection_date(d)
+        reg = _get(r, region)
+        lab = get_label(r)
+        if d is None or not reg or lab is None:
+            continue
+        rows.append((reg, week_start(d), str(lab)))
+
+    if not rows:
+        return pd.DataFrame(
+            index=pd.MultiIndex.from_arrays([[], []], names=["region", "week"])
+        )
+
+    df = pd.DataFrame(rows, columns=["region", "week", "label"])
+    counts = df.groupby(["region", "week", "label"]).size().unstack("label", fill_value=0)
+    return counts.sort_index().astype(np.int64)
+
+
+@dataclass(frozen=True)
+class GrowthFit:
+    """
+    Fitted growth model for a set of regions.
+
+    intercept/slope have shape (regions, labels); column 0 is the baseline
+    label and is always zero. `t0` is each region's centering week.
+    """
+    regions: list[str]
+    labels: list[str]
+    t0: np.ndarray
+    intercept: np.ndarray
+    slope: np.ndarray
+
+    def growth_rates(self) -> pd.DataFrame:
+        """Long table of weekly growth advantage vs. the baseline label."""
+        wide = pd.DataFrame(self.slope, columns=self.labels)
+        wide.insert(0, "region", self.regions)
+        return wide.melt(id_vars="region", var_name="label", value_name="growth_rate_per_week")
+
+    def frequencies(self, weeks: Iterable[date]) -> pd.DataFrame:
+        """Modelled label frequencies for every region at the given weeks."""
+        weeks = list(weeks)
+        t = _week_number(weeks)[None, :] - self.t0[:, None]  # (R, T)
+        p = _softmax(self.intercept[:, None, :] + self.slope[:, None, :] * t[:, :, None])
+
+        index = pd.MultiIndex.from_product([self.regions, weeks], names=["region", "week"])
+        return pd.DataFrame(p.reshape(-1, len(self.labels)), index=index, columns=self.labels)
+
+    def forecast(self, last_week: date, horizon_weeks: int = 4) -> pd.DataFrame:
+        """Frequencies for the `horizon_weeks` weeks after `last_week`."""
+        start = week_start(last_week)
+        return self.frequencies(start + timedelta(weeks=i) for i in range(1, horizon_weeks + 1))
+
+
+def _week_number(weeks: Iterable[date]) -> np.ndarray:
+    return np.array([d.toordinal() / 7.0 for d in weeks], dtype=np.float64)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    z = logits - logits.max(axis=-1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=-1, keepdims=True)
+
+
+def _to_cube(counts: pd.DataFrame) -> tuple[list[str], list[date], list[str], np.ndarray]:
+    """Dense (regions, weeks, labels) array; missing (region, week) cells are zero."""
+    regions = list(counts.index.get_level_values("region").unique())
+    weeks = sorted(counts.index.get_level_values("week").unique())
+    labels = list(counts.columns)
+
+    full = pd.MultiIndex.from_product([regions, weeks], names=["region", "week"])
+    dense = counts.reindex(full, fill_value=0).to_numpy(dtype=np.float64)
+    return regions, weeks, labels, dense.reshape(len(regions), len(weeks), len(labels))
+
+
+def fit_growth(counts: pd.DataFrame, steps: int = _NEWTON_STEPS) -> GrowthFit:
+    """
+    Fit multinomial logistic growth for every region in `counts`
+    (as returned by `weekly_counts`) in one batched solve per Newton step.
+    """
+    regions, weeks, labels, c = _to_cube(counts)
+    R, T, K = c.shape
+    if R == 0 or K == 0:
+        return GrowthFit(regions, labels, np.zeros(R), np.zeros((R, K)), np.zeros((R, K)))
+
+    n = c.sum(axis=2)  # (R, T)
+    wk = _week_number(weeks)
+    # Center time per region (count-weighted) so intercept and slope are well-conditioned.
+    t0 = (n * wk[None, :]).sum(axis=1) / np.maximum(n.sum(axis=1), 1.0)
+    t = wk[None, :] - t0[:, None]  # (R, T)
+    x = np.stack([np.ones_like(t), t], axis=2)  # (R, T, 2) design per region
+
+    J = K - 1  # free labels (label 0 is the baseline)
+    P = 2 * J
+    beta = np.zeros((R, J, 2))
+    ridge = _RIDGE * np.eye(P)[None, :, :]
+
+    for _ in range(steps if J else 0):
+        free = beta[:, None, :, 0] + beta[:, None, :, 1] * t[:, :, None]  # (R, T, J)
+        p = _softmax(np.concatenate([np.zeros((R, T, 1)), free], axis=2))[:, :, 1:]
+
+        resid = c[:, :, 1:] - n[:, :, None] * p  # (R, T, J)
+        grad = np.einsum("rtj,rti->rji", resid, x).reshape(R, P) - _RIDGE * beta.reshape(R, P)
+
+        # Fisher information: N * (diag(p) - p p^T) expanded over the design.
+        cov = np.einsum("rtj,jl->rtjl", p, np.eye(J)) - p[:, :, :, None] * p[:, :, None, :]
+        w = n[:, :, None, None] * cov
+        hess = np.einsum("rtjl,rti,rtm->rjilm", w, x, x).reshape(R, P, P) + ridge
+
+        step = np.linalg.solve(hess, grad[:, :, None])[:, :, 0]
+        beta = beta + step.reshape(R, J, 2)
+        if np.abs(step).max() < 1e-8:
+            break
+
+    intercept = np.concatenate([np.zeros((R, 1)), beta[:, :, 0]], axis=1)
+    slope = np.concatenate([np.zeros((R, 1)), beta[:, :, 1]], axis=1)
+    return GrowthFit(regions, labels, t0, intercept, slope)
+
+
+def _region_fingerprints(counts: pd.DataFrame) -> dict[str, str]:
+    """Content hash of each region's weekly counts."""
+    out = {}
+    for reg, block in counts.groupby(level="region", sort=False):
+        h = hashlib.sha256()
+        h.update(pd.util.hash_pandas_object(block, index=True).to_numpy().tobytes())
+        out[reg] = h.hexdigest()
+    return out
+
+
+class ForecastCache:
+    """
+    Keeps the latest fit per region and only refits regions whose counts changed.
+
+    Each region's model depends only on that region's counts, so refitting a
+    subset is exact. A change in the label set invalidates everything, because
+    every region's parameter vector has one entry per label.
+    """
+
+    def __init__(self) -> None:
+        self._labels: list[str] | None = None
+        self._fingerprints: dict[str, str] = {}
+        self._params: dict[str, tuple[float, np.ndarray, np.ndarray]] = {}
+        self.last_refit: list[str] = []
+
+    def fit(self, counts: pd.DataFrame) -> GrowthFit:
+        labels = list(counts.columns)
+        if labels != self._labels:
+            self._labels = labels
+            self._fingerprints = {}
+            self._params = {}
+
+        prints = _region_fingerprints(counts)
+        changed = [reg for reg, fp in prints.items() if self._fingerprints.get(reg) != fp]
+
+        if changed:
+            sub = counts.loc[counts.index.get_level_values("region").isin(changed)]
+            fit = fit_growth(sub)
+            for i, reg in enumerate(fit.regions):
+                self._params[reg] = (fit.t0[i], fit.intercept[i], fit.slope[i])
+                self._fingerprints[reg] = prints[reg]
+
+        # Forget regions that disappeared from the input.
+        for reg in set(self._params) - set(prints):
+            del self._params[reg]
+            del self._fingerprints[reg]
+
+        self.last_refit = changed
+        regions = list(prints)
+        K = len(labels)
+        return GrowthFit(
+            regions=regions,
+            labels=labels,
+            t0=np.array([self._params[r][0] for r in regions]),
+            intercept=np.array([self._params[r][1] for r in regions]).reshape(len(regions), K),
+            slope=np.array([self._params[r][2] for r in regions]).reshape(len(regions), K),
+        )
@@ -3,6 +3,16 @@ genes.py
 """
 from __future__ import annotations
 
+from bisect import bisect_right
+from collections.abc import Iterable
+
+# SARS-CoV-2 reference (NC_045512.2), 1-based inclusive coordinates.
+SARS_COV_2_GENES: tuple[tuple[str, int, int], ...] = (
+    ("ORF1ab", 266, 21555),
+    ("S", 21563, 25384),
+    ("N", 28274, 29533),
+)
+
 
 def gene_for_position(pos: int) -> str | None:
     """
@@ -29,3 +39,22 @@ def gene_for_position(pos: int) -> str | None:
         return "N"
 
     return None
+
+
+class GeneMap:
+    """
+    Gene lookup for any organism from (name, start, end) annotations
+    (1-based, inclusive, non-overlapping). Lookups are a binary search.
+    """
+
+    def __init__(self, genes: Iterable[tuple[str, int, int]]) -> None:
+        self.genes = tuple(sorted(((str(n), int(s), int(e)) for n, s, e in genes), key=lambda g: g[1]))
+        self._starts = [start for _, start, _ in self.genes]
+
+    def __call__(self, pos: int) -> str | None:
+        i = bisect_right(self._starts, pos) - 1
+        if i >= 0:
+            name, _, end = self.genes[i]
+            if pos <= end:
+                return name
+        return None
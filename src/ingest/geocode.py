@@ -0,0 +1,237 @@
+"""
+geocode.py
+Offline country / region -> centroid lookup and a grid index over points.
+
+Records only carry the `country` / `region` strings from `parse_location`
+("USA: CA, San Diego County" -> ("USA", "CA, San Diego County")), so the
+dashboard has nothing to map. The gazetteer resolves those strings against a
+local table instead of a web geocoder:
+
+    data/gazetteer/
+        places.csv     # country,region,lat,lon (blank region = country centroid)
+        aliases.csv    # alias,name ("United States" -> "USA", "CA" -> "California")
+
+Names are matched on a normalized key (case, accents, punctuation and
+spacing folded), aliases are applied at both levels, and a region that is
+not in the table falls back to its country's centroid. Every distinct
+(country, region) pair is resolved once and memoized.
+
+`GridIndex` buckets points into fixed lat/lon cells for bounding-box and
+nearest-point queries without scanning every sample.
+"""
+from __future__ import annotations
+
+import csv
+import math
+import re
+import unicodedata
+from collections.abc import Iterable, Sequence
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_ROOT = Path("data/gazetteer")
+EARTH_RADIUS_KM = 6371.0088
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+Coordinates = tuple[float, float]
+
+
+def normalize_name(name: str | None) -> str:
+    """Hash key for a place name: "São Paulo " and "sao-paulo" both -> "sao paulo"."""
+    if not name:
+        return ""
+    folded = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode("ascii")
+    return _NON_WORD.sub(" ", folded.casefold()).strip()
+
+
+def haversine_km(lat1, lon1, lat2, lon2):
+    """Great-circle distance; works elementwise on NumPy arrays."""
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        np.sin((lat2 - lat1) / 2) ** 2
+        + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+
+
+class Gazetteer:
+    def __init__(self, root: str | Path = DEFAULT_ROOT) -> None:
+        self.root = Path(root)
+        self._places: dict[tuple[str, str], Coordinates] = {}
+        self._aliases: dict[str, str] = {}
+        self._memo: dict[tuple[str | None, str | None], Coordinates | None] = {}
+        self._load()
+
+    def _load(self) -> None:
+        places = self.root / "places.csv"
+        if not places.exists():
+            raise FileNotFoundError(f"Gazetteer not found: {places}")
+        with places.open(newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                key = (normalize_name(row["country"]), normalize_name(row["region"]))
+                self._places[key] = (float(row["lat"]), float(row["lon"]))
+
+        aliases = self.root / "aliases.csv"
+        if aliases.exists():
+            with aliases.open(newline="", encoding="utf-8") as f:
+                for row in csv.DictReader(f):
+                    self._aliases[normalize_name(row["alias"])] = normalize_name(row["name"])
+
+    def __len__(self) -> int:
+        return len(self._places)
+
+    def _canonical(self, name: str | None) -> str:
+        key = normalize_name(name)
+        return self._aliases.get(key, key)
+
+    def _resolve(self, country: str | None, region: str | None) -> Coordinates | None:
+        c = self._canonical(country)
+        if not c:
+            return None
+        if region:
+            # "CA, San Diego County": try the whole string, then the first part.
+            for candidate in (region, region.split(",", 1)[0]):
+                hit = self._places.get((c, self._canonical(candidate)))
+                if hit is not None:
+                    return hit
+        return self._places.get((c, ""))
+
+    def lookup(self, country: str | None, region: str | None = None) -> Coordinates | None:
+        """(lat, lon) for a place, its country's centroid if the region is unknown, else None."""
+        key = (country, region)
+        try:
+            return self._memo[key]
+        except KeyError:
+            hit = self._memo[key] = self._resolve(country, region)
+            return hit
+
+    def geocode(
+        self, countries: Sequence[str | None], regions: Sequence[str | None] | None = None
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Bulk lookup: float32 (lat, lon) arrays aligned with the inputs, NaN
+        where nothing matched. Each distinct pair is resolved once.
+        """
+        if regions is None:
+            regions = [None] * len(countries)
+        out = np.full((len(countries), 2), np.nan, dtype=np.float32)
+        for i, pair in enumerate(zip(countries, regions, strict=True)):
+            hit = self.lookup(*pair)
+            if hit is not None:
+                out[i] = hit
+        return out[:, 0], out[:, 1]
+
+    def points(self) -> tuple[list[tuple[str, str]], np.ndarray, np.ndarray]:
+        """Every gazetteer entry as (keys, lats, lons), e.g. to build a `GridIndex`."""
+        keys = list(self._places)
+        coords = np.array([self._places[k] for k in keys], dtype=np.float64).reshape(-1, 2)
+        return keys, coords[:, 0], coords[:, 1]
+
+
+class GridIndex:
+    """
+    Fixed-size lat/lon cell index over a set of points.
+
+    Points are sorted by cell id (row-major), so the points in a run of
+    cells along one latitude row are one contiguous slice found with
+    `searchsorted`. `nearest` wraps around the antimeridian; `bbox` takes
+    boxes with min_lon <= max_lon.
+    """
+
+    def __init__(self, lats: Iterable[float], lons: Iterable[float], cell_deg: float = 1.0) -> None:
+        if cell_deg <= 0:
+            raise ValueError("cell_deg must be positive")
+        self.cell_deg = cell_deg
+        self.n_rows = math.ceil(180 / cell_deg)
+        self.n_cols = math.ceil(360 / cell_deg)
+
+        lats = np.asarray(lats, dtype=np.float64)
+        lons = np.asarray(lons, dtype=np.float64)
+        valid = np.flatnonzero(~(np.isnan(lats) | np.isnan(lons)))
+        cells = self._cell_ids(lats[valid], lons[valid])
+        order = np.argsort(cells, kind="stable")
+
+        self.ids = valid[order]  # positions in the input arrays
+        self.cells = cells[order]
+        self.lats = lats[self.ids]
+        self.lons = lons[self.ids]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _row(self, lat):
+        return np.clip(((np.asarray(lat) + 90) // self.cell_deg).astype(np.int64), 0, self.n_rows - 1)
+
+    def _col(self, lon):
+        return np.clip(((np.asarray(lon) + 180) // self.cell_deg).astype(np.int64), 0, self.n_cols - 1)
+
+    def _cell_ids(self, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+        return self._row(lats) * self.n_cols + self._col(lons)
+
+    def _block(self, row_lo: int, row_hi: int, col_lo: int, col_hi: int) -> np.ndarray:
+        """Sorted-array positions of all points in the given (inclusive) cell block."""
+        row_lo, row_hi = max(row_lo, 0), min(row_hi, self.n_rows - 1)
+        col_lo, col_hi = max(col_lo, 0), min(col_hi, self.n_cols - 1)
+        if row_lo > row_hi or col_lo > col_hi:
+            return np.empty(0, dtype=np.int64)
+        rows = np.arange(row_lo, row_hi + 1)
+        starts = np.searchsorted(self.cells, rows * self.n_cols + col_lo, side="left")
+        stops = np.searchsorted(self.cells, rows * self.n_cols + col_hi, side="right")
+        return np.concatenate([np.arange(a, b) for a, b in zip(starts, stops, strict=True)])
+
+    def bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> np.ndarray:
+        """Input positions of every point inside the box (inclusive)."""
+        pos = self._block(
+            int(self._row(min_lat)), int(self._row(max_lat)),
+            int(self._col(min_lon)), int(self._col(max_lon)),
+        )
+        lat, lon = self.lats[pos], self.lons[pos]
+        inside = (lat >= min_lat) & (lat <= max_lat) & (lon >= min_lon) & (lon <= max_lon)
+        return np.sort(self.ids[pos[inside]])
+
+    def nearest(self, lat: float, lon: float) -> tuple[int, float] | None:
+        """(input position, distance in km) of the closest point, or None if empty."""
+        if not len(self):
+            return None
+        row, col = int(self._row(lat)), int(self._col(lon))
+        best: tuple[int, float] | None = None
+        for ring in range(max(self.n_rows, self.n_cols)):
+            # Nothing `ring` or more cells away can be closer than this; longitude
+            # cells shrink toward the poles, so bound with the widest latitude here.
+            if best is not None:
+                edge = min(90.0, abs(lat) + ring * self.cell_deg)
+                km_per_cell = self.cell_deg * math.pi / 180 * EARTH_RADIUS_KM
+                if (ring - 1) * km_per_cell * max(math.cos(math.radians(edge)), 1e-6) > best[1]:
+                    break
+            pos = self._ring(row, col, ring)
+            if len(pos):
+                dist = haversine_km(lat, lon, self.lats[pos], self.lons[pos])
+                i = int(np.argmin(dist))
+                if best is None or dist[i] < best[1]:
+                    best = (int(self.ids[pos[i]]), float(dist[i]))
+        return best
+
+    def _wrapped_block(self, row_lo: int, row_hi: int, col_lo: int, col_hi: int) -> np.ndarray:
+        """`_block` with column indices taken modulo the grid width (longitude wraps)."""
+        if col_hi - col_lo + 1 >= self.n_cols:
+            return self._block(row_lo, row_hi, 0, self.n_cols - 1)
+        lo, hi = col_lo % self.n_cols, col_hi % self.n_cols
+        if lo <= hi:
+            return self._block(row_lo, row_hi, lo, hi)
+        return np.concatenate(
+            [self._block(row_lo, row_hi, lo, self.n_cols - 1), self._block(row_lo, row_hi, 0, hi)]
+        )
+
+    def _ring(self, row: int, col: int, ring: int) -> np.ndarray:
+        if ring == 0:
+            return self._block(row, row, col, col)
+        parts = [
+            self._wrapped_block(row - ring, row - ring, col - ring, col + ring),
+            self._wrapped_block(row + ring, row + ring, col - ring, col + ring),
+            self._wrapped_block(row - ring + 1, row + ring - 1, col - ring, col - ring),
+        ]
+        if (col + ring - (col - ring)) % self.n_cols:  # the two sides are distinct columns
+            parts.append(self._wrapped_block(row - ring + 1, row + ring - 1, col + ring, col + ring))
+        return np.concatenate(parts)
@@ -0,0 +1,275 @@
+"""
+metrics.py
+Opt-in counters, gauges and histograms for the ingest / analytics hot paths.
+
+Instrumentation is off by default, and the disabled path is a single
+module-global check, so instrumented functions cost effectively nothing
+in normal runs. Turn it on with `enable()` or `PEA_METRICS=1`, then
+export with `to_json()` or `to_prometheus()`.
+
+    from ingest import metrics
+    metrics.enable()
+    df = summarize_genomes(records)
+    print(metrics.to_prometheus())
+
+Scripts expose this as `--metrics PATH` (JSON, or Prometheus text for a
+.prom / .txt path) and `--profile PATH` (cProfile stats, see `cli_instrumentation`).
+"""
+from __future__ import annotations
+
+import functools
+import io
+import json
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    import argparse
+    import cProfile
+
+# Seconds; roughly log-spaced from 100 us to 1 min.
+LATENCY_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 5000)
+
+_enabled = os.environ.get("PEA_METRICS", "").strip() not in {"", "0", "false", "no"}
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics)."""
+
+    def __init__(self, buckets: tuple[float, ...]) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def as_dict(self) -> dict[str, Any]:
+        cumulative, running = {}, 0
+        for bound, n in zip((*self.buckets, float("inf")), self.counts, strict=True):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"count": self.count, "sum": self.sum, "buckets": cumulative}
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.counters: dict[str, float] = {}
+        self.gauges: dict[str, float] = {}
+        self.histograms: dict[str, Histogram] = {}
+
+    def inc(self, name: str, n: float = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def set(self, name: str, value: float) -> None:
+        with self._lock:
+            self.gauges[name] = value
+
+    def observe(self, name: str, value: float, buckets: tuple[float, ...]) -> None:
+        with self._lock:
+            h = self.histograms.get(name)
+            if h is None:
+                h = self.histograms[name] = Histogram(buckets)
+            h.observe(value)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.gauges.clear()
+            self.histograms.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "counters": dict(self.counters),
+                "gauges": dict(self.gauges),
+                "histograms": {k: h.as_dict() for k, h in self.histograms.items()},
+            }
+
+
+REGISTRY = Registry()
+
+
+# -- recording (all no-ops unless enabled) --------------------------------
+
+def count(name: str, n: float = 1) -> None:
+    if _enabled:
+        REGISTRY.inc(name, n)
+
+
+def gauge(name: str, value: float) -> None:
+    if _enabled:
+        REGISTRY.set(name, value)
+
+
+def observe(name: str, value: float, buckets: tuple[float, ...] = COUNT_BUCKETS) -> None:
+    if _enabled:
+        REGISTRY.observe(name, value, buckets)
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> _Stage:
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        REGISTRY.observe(
+            f"{self.name}.seconds", time.perf_counter() - self.t0, LATENCY_BUCKETS
+        )
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> _NullStage:
+        return self
+
+    def __exit__(self, *exc) -> None:
+        return None
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str) -> _Stage | _NullStage:
+    """Context manager recording wall time into the `<name>.seconds` histogram."""
+    return _Stage(name) if _enabled else _NULL_STAGE
+
+
+def timed(name: str):
+    """Decorator form of `stage` for whole functions."""
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            with _Stage(name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# -- export ---------------------------------------------------------------
+
+def reset() -> None:
+    REGISTRY.reset()
+
+
+def snapshot() -> dict[str, Any]:
+    return REGISTRY.snapshot()
+
+
+def to_json(indent: int | None = 2) -> str:
+    return json.dumps(snapshot(), indent=indent, sort_keys=True)
+
+
+def _prom_name(name: str) -> str:
+    return "pea_" + "".join(c if c.isalnum() else "_" for c in name)
+
+
+def to_prometheus() -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    snap = snapshot()
+    lines: list[str] = []
+    for name, value in sorted(snap["counters"].items()):
+        metric = _prom_name(name) + "_total"
+        lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+    for name, value in sorted(snap["gauges"].items()):
+        metric = _prom_name(name)
+        lines += [f"# TYPE {metric} gauge", f"{metric} {value}"]
+    for name, h in sorted(snap["histograms"].items()):
+        metric = _prom_name(name)
+        lines.append(f"# TYPE {metric} histogram")
+        lines += [f'{metric}_bucket{{le="{le}"}} {n}' for le, n in h["buckets"].items()]
+        lines += [f"{metric}_sum {h['sum']}", f"{metric}_count {h['count']}"]
+    return "\n".join(lines) + "\n"
+
+
+def write(path: str | Path) -> None:
+    """Write metrics to `path`: Prometheus text for .prom/.txt, JSON otherwise."""
+    p = Path(path)
+    p.parent.mkdir(parents=True, exist_ok=True)
+    text = to_prometheus() if p.suffix in {".prom", ".txt"} else to_json() + "\n"
+    p.write_text(text, encoding="utf-8")
+
+
+# -- script support -------------------------------------------------------
+
+def add_cli_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument(
+        "--profile",
+        metavar="PATH",
+        help="Run under cProfile and write stats to PATH (view with pstats or snakeviz)",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="PATH",
+        help="Collect stage timings and counters; write JSON (or Prometheus text for .prom)",
+    )
+
+
+@contextmanager
+def profile(path: str | Path, top: int = 25) -> Iterator[cProfile.Profile]:
+    """Profile the block, dump stats to `path` and print the top entries to stderr."""
+    import cProfile
+    import pstats
+
+    prof = cProfile.Profile()
+    prof.enable()
+    try:
+        yield prof
+    finally:
+        prof.disable()
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        prof.dump_stats(str(path))
+        out = io.StringIO()
+        pstats.Stats(prof, stream=out).sort_stats("cumulative").print_stats(top)
+        print(out.getvalue(), file=sys.stderr)
+
+
+@contextmanager
+def cli_instrumentation(args: argparse.Namespace) -> Iterator[None]:
+    """Honour --profile / --metrics from `add_cli_arguments` around a script's work."""
+    metrics_path = getattr(args, "metrics", None)
+    profile_path = getattr(args, "profile", None)
+    if metrics_path:
+        enable()
+    try:
+        if profile_path:
+            with profile(profile_path):
+                yield
+        else:
+            yield
+    finally:
+        if metrics_path:
+            write(metrics_path)
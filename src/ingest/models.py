@@ -23,4 +23,7 @@ class CanonicalGenomeRecord:
     host: str | None
     sequence_length: int
     source: str = "genbank"
-    sequence: str | None = None
\ No newline at end of file
+    sequence: str | None = None
+    # True once `sequence` is in canonical form (ingest.sequences), so the
+    # mutation diff can skip re-normalizing it.
+    normalized: bool = False
\ No newline at end of file
@@ -0,0 +1,295 @@
+"""
+mutation_index.py
+Inverted index from substitutions (pos, ref, alt) to the genomes carrying them.
+
+Finding every genome with a given substitution otherwise means re-running
+`diff_sequences` over the archive. The index is built once from
+mutation-calling output and stored as a directory of flat files:
+
+    meta.json          # format, counts
+    accessions.json    # genome id -> accession
+    keys.npy           # sorted uint64 keys: pos << 16 | ord(ref) << 8 | ord(alt)
+    offsets.npy        # uint64 byte offset of each key's posting list (+ end)
+    postings.bin       # posting lists: ascending genome ids, delta + varint coded
+
+Arrays and postings are memory-mapped on open, so opening is cheap and a
+query only touches the posting lists it reads. Lists are decoded with NumPy
+and combined through a boolean mask over genome ids (no sorting):
+
+    index = MutationIndex.open("data/derived/mutation_index")
+    index.query("A23063T AND (G23012A OR S:E484K)")
+
+Query terms are nucleotide substitutions written `<ref><pos><alt>`, or
+amino-acid names listed in AMINO_ACID_ALIASES (SARS-CoV-2 Spike, mapped to
+the single-nucleotide change that produces them). AND binds tighter than OR.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import shutil
+from array import array
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from .mutations import Mutation
+
+_FORMAT = 1
+
+DEFAULT_PATH = Path("data/derived/mutation_index")
+
+# Spike substitutions of note, as the nucleotide change (NC_045512.2 coordinates)
+# that produces them. Terms not listed here must be given in nucleotide form.
+AMINO_ACID_ALIASES: dict[str, str] = {
+    "S:K417N": "G22813T",
+    "S:L452R": "T22917G",
+    "S:T478K": "C22995A",
+    "S:E484K": "G23012A",
+    "S:N501Y": "A23063T",
+    "S:D614G": "A23403G",
+    "S:P681H": "C23604A",
+    "S:P681R": "C23604G",
+}
+
+_NUCLEOTIDE_TERM = re.compile(r"^([A-Za-z])(\d+)([A-Za-z])$")
+_TOKEN = re.compile(r"\(|\)|[^\s()]+")
+
+
+def mutation_key(pos: int, ref: str, alt: str) -> int:
+    return (int(pos) << 16) | (ord(ref.upper()) << 8) | ord(alt.upper())
+
+
+# -- delta + varint (LEB128) coding -----------------------------------------
+
+def encode_postings(ids: np.ndarray) -> bytes:
+    """Ascending unique ids -> first id then gaps, 7 bits per byte, high bit = more follows."""
+    deltas = np.diff(np.asarray(ids, dtype=np.uint64), prepend=np.uint64(0))
+    nbytes = np.ones(len(deltas), dtype=np.int64)
+    for k in range(1, 10):
+        nbytes += deltas >= (np.uint64(1) << np.uint64(7 * k))
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    starts = np.cumsum(nbytes) - nbytes
+    for k in range(int(nbytes.max(initial=0))):
+        sel = nbytes > k
+        byte = (deltas[sel] >> np.uint64(7 * k)) & np.uint64(0x7F)
+        more = (nbytes[sel] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[sel] + k] = byte | more
+    return out.tobytes()
+
+
+def decode_postings(data: np.ndarray) -> np.ndarray:
+    """Inverse of `encode_postings` for a uint8 array, vectorized."""
+    data = np.asarray(data, dtype=np.uint8)
+    if not len(data):
+        return np.empty(0, dtype=np.uint32)
+    is_end = (data & 0x80) == 0
+    if is_end.all():  # dense lists: every gap fits in one byte
+        return np.cumsum(data, dtype=np.uint32)
+    starts = np.flatnonzero(np.concatenate(([True], is_end[:-1])))
+    group = np.cumsum(np.concatenate(([0], is_end[:-1].astype(np.int64))))
+    shift = (7 * (np.arange(len(data)) - starts[group])).astype(np.uint64)
+    values = np.add.reduceat((data & 0x7F).astype(np.uint64) << shift, starts)
+    return np.cumsum(values).astype(np.uint32)
+
+
+# -- building ---------------------------------------------------------------
+
+class MutationIndexBuilder:
+    """Accumulates (accession, mutations) calls; `write` persists the index."""
+
+    def __init__(self) -> None:
+        self.accessions: list[str] = []
+        self._ids: dict[str, int] = {}
+        self._postings: dict[int, array] = {}
+
+    def add(self, accession: str, mutations: Iterable[Mutation]) -> None:
+        gid = self._ids.get(accession)
+        if gid is None:
+            gid = self._ids[accession] = len(self.accessions)
+            self.accessions.append(accession)
+        for m in mutations:
+            if len(m.ref) != 1 or len(m.alt) != 1:
+                continue  # substitutions only
+            key = mutation_key(m.pos, m.ref, m.alt)
+            ids = self._postings.get(key)
+            if ids is None:
+                ids = self._postings[key] = array("I")
+            if not ids or ids[-1] != gid:
+                ids.append(gid)
+
+    def add_many(self, calls: Iterable[tuple[str, Iterable[Mutation]]]) -> MutationIndexBuilder:
+        for accession, mutations in calls:
+            self.add(accession, mutations)
+        return self
+
+    def write(self, path: str | Path) -> Path:
+        root = Path(path)
+        tmp = root.with_name(root.name + ".tmp")
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+
+        keys = np.array(sorted(self._postings), dtype=np.uint64)
+        offsets = np.zeros(len(keys) + 1, dtype=np.uint64)
+        with (tmp / "postings.bin").open("wb") as f:
+            for i, key in enumerate(keys.tolist()):
+                # Genomes re-added out of order are the only unsorted case.
+                ids = np.unique(np.frombuffer(self._postings[key], dtype=np.uint32))
+                blob = encode_postings(ids)
+                f.write(blob)
+                offsets[i + 1] = offsets[i] + len(blob)
+
+        np.save(tmp / "keys.npy", keys)
+        np.save(tmp / "offsets.npy", offsets)
+        (tmp / "accessions.json").write_text(json.dumps(self.accessions), encoding="utf-8")
+        (tmp / "meta.json").write_text(
+            json.dumps({"format": _FORMAT, "genomes": len(self.accessions), "keys": len(keys)}),
+            encoding="utf-8",
+        )
+
+        if root.exists():
+            shutil.rmtree(root)
+        os.replace(tmp, root)
+        return root
+
+
+def build_mutation_index(calls: Iterable[tuple[str, Iterable[Mutation]]], path: str | Path) -> Path:
+    """Build and write an index from (accession, mutations) pairs, e.g. `GenomeDB.iter_mutations()`."""
+    return MutationIndexBuilder().add_many(calls).write(path)
+
+
+# -- querying ---------------------------------------------------------------
+
+class MutationIndex:
+    def __init__(
+        self,
+        accessions: list[str],
+        keys: np.ndarray,
+        offsets: np.ndarray,
+        postings: np.ndarray,
+    ) -> None:
+        self.accessions = accessions
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+
+    @classmethod
+    def open(cls, path: str | Path) -> MutationIndex:
+        root = Path(path)
+        meta = json.loads((root / "meta.json").read_text(encoding="utf-8"))
+        if meta.get("format") != _FORMAT:
+            raise ValueError(f"Unsupported mutation index format in {root}: {meta.get('format')}")
+        blob = root / "postings.bin"
+        postings = (
+            np.memmap(blob, dtype=np.uint8, mode="r")
+            if blob.stat().st_size
+            else np.empty(0, dtype=np.uint8)
+        )
+        return cls(
+            accessions=json.loads((root / "accessions.json").read_text(encoding="utf-8")),
+            keys=np.load(root / "keys.npy", mmap_mode="r"),
+            offsets=np.load(root / "offsets.npy", mmap_mode="r"),
+            postings=postings,
+        )
+
+    def __len__(self) -> int:
+        return len(self.accessions)
+
+    def genome_ids(self, pos: int, ref: str, alt: str) -> np.ndarray:
+        """Sorted genome ids carrying the substitution (empty if none)."""
+        key = mutation_key(pos, ref, alt)
+        i = int(np.searchsorted(self.keys, np.uint64(key)))
+        if i == len(self.keys) or int(self.keys[i]) != key:
+            return np.empty(0, dtype=np.uint32)
+        return decode_postings(self.postings[int(self.offsets[i]) : int(self.offsets[i + 1])])
+
+    def term_ids(self, term: str) -> np.ndarray:
+        """Genome ids for one query term (`A23063T` or an AMINO_ACID_ALIASES name)."""
+        nucleotide = AMINO_ACID_ALIASES.get(term.upper(), term)
+        match = _NUCLEOTIDE_TERM.match(nucleotide)
+        if match is None:
+            raise ValueError(
+                f"Unrecognized mutation {term!r}: use <ref><pos><alt> (e.g. A23063T) "
+                "or a name from AMINO_ACID_ALIASES"
+            )
+        ref, pos, alt = match.groups()
+        return self.genome_ids(int(pos), ref, alt)
+
+    def query_ids(self, expression: str) -> np.ndarray:
+        return _QueryParser(self, expression).parse()
+
+    def query(self, expression: str) -> list[str]:
+        """Accessions matching a boolean expression of mutations (AND / OR / parentheses)."""
+        return [self.accessions[i] for i in self.query_ids(expression).tolist()]
+
+
+class _QueryParser:
+    """Recursive descent: or_expr := and_expr (OR and_expr)*; and_expr := atom (AND atom)*."""
+
+    def __init__(self, index: MutationIndex, expression: str) -> None:
+        self.index = index
+        self.tokens = _TOKEN.findall(expression)
+        self.i = 0
+        self.terms: dict[str, np.ndarray] = {}  # each posting list is decoded once
+
+    def _peek(self) -> str | None:
+        return self.tokens[self.i] if self.i < len(self.tokens) else None
+
+    def _next(self) -> str:
+        tok = self._peek()
+        if tok is None:
+            raise ValueError("Unexpected end of mutation query")
+        self.i += 1
+        return tok
+
+    def parse(self) -> np.ndarray:
+        ids = self._or()
+        if self._peek() is not None:
+            raise ValueError(f"Unexpected {self._peek()!r} in mutation query")
+        return ids
+
+    def _or(self) -> np.ndarray:
+        ids = self._and()
+        while (self._peek() or "").upper() == "OR":
+            self._next()
+            ids = self._union(ids, self._and())
+        return ids
+
+    def _and(self) -> np.ndarray:
+        ids = self._atom()
+        while (self._peek() or "").upper() == "AND":
+            self._next()
+            ids = self._intersect(ids, self._atom())
+        return ids
+
+    # Ids are dense in [0, genomes), so set operations go through a boolean
+    # mask: O(genomes + list lengths), with no sorting.
+    def _mask(self, ids: np.ndarray) -> np.ndarray:
+        mask = np.zeros(len(self.index), dtype=bool)
+        mask[ids] = True
+        return mask
+
+    def _union(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        mask = self._mask(a)
+        mask[b] = True
+        return np.flatnonzero(mask).astype(np.uint32)
+
+    def _intersect(self, a: np.ndarray, b: np.ndarray) -> np.ndarray:
+        small, large = (a, b) if len(a) <= len(b) else (b, a)
+        return small[self._mask(large)[small]]
+
+    def _atom(self) -> np.ndarray:
+        tok = self._next()
+        if tok == "(":
+            ids = self._or()
+            if self._next() != ")":
+                raise ValueError("Unbalanced parentheses in mutation query")
+            return ids
+        if tok == ")" or tok.upper() in {"AND", "OR"}:
+            raise ValueError(f"Unexpected {tok!r} in mutation query")
+        ids = self.terms.get(tok)
+        if ids is None:
+            ids = self.terms[tok] = self.index.term_ids(tok)
+        return ids
@@ -3,9 +3,13 @@ mutations.py
 """
 from __future__ import annotations
 
+from collections.abc import Callable
 from dataclasses import dataclass
+from functools import lru_cache
 
+from . import metrics
 from .genes import gene_for_position
+from .sequences import canonicalize_sequence, masked_lookup
 
 
 @dataclass(frozen=True)
@@ -16,22 +20,52 @@ class Mutation:
     gene: str | None = None
 
 
-def diff_sequences(ref: str, sample: str) -> list[Mutation]:
+# One reference is compared against every genome in a batch; canonicalize it once.
+_canonical_reference = lru_cache(maxsize=8)(canonicalize_sequence)
+
+
+def _differing_positions(ref: str, sample: str) -> list[int]:
+    """1-based positions where two equal-length canonical sequences differ, masked bases skipped."""
+    import numpy as np  # deferred: keeps `import ingest.mutations` light
+
+    r = np.frombuffer(ref.encode("ascii"), dtype=np.uint8)
+    s = np.frombuffer(sample.encode("ascii"), dtype=np.uint8)
+    masked = masked_lookup()
+    hits = np.flatnonzero((r != s) & ~masked[r] & ~masked[s])
+    return (hits + 1).tolist()
+
+
+@metrics.timed("mutations.diff")
+def diff_sequences(
+    ref: str,
+    sample: str,
+    gene_lookup: Callable[[int], str | None] = gene_for_position,
+    *,
+    normalized: bool = False,
+) -> list[Mutation]:
+    # `gene_lookup` maps a 1-based position to a gene (SARS-CoV-2 by default;
+    # see ingest.references for other organisms).
+    #
+    # Both sequences are compared in canonical form (ingest.sequences): case,
+    # U/T and whitespace never produce mutations, and N or any IUPAC ambiguity
+    # code on either side is masked. Pass `normalized=True` for samples that
+    # were canonicalized at ingest (`record.normalized`) to skip that pass.
+    ref = _canonical_reference(ref)
+    if not normalized:
+        sample = canonicalize_sequence(sample)
+
     # Real-world sequences are often trimmed/partial.
     # For v1, diff only the overlapping region.
     L = min(len(ref), len(sample))
     ref = ref[:L]
     sample = sample[:L]
 
-    # if len(ref) != len(sample):
-    #     raise ValueError("Sequences must be the same length")
-
     mutations: list[Mutation] = []
+    if ref != sample:
+        mutations = [
+            Mutation(pos=i, ref=ref[i - 1], alt=sample[i - 1], gene=gene_lookup(i))
+            for i in _differing_positions(ref, sample)
+        ]
 
-    for i, (r, s) in enumerate(zip(ref, sample, strict=True), start=1):
-        if r.upper() == "N" or s.upper() == "N":
-            continue
-        if r != s:
-            mutations.append(Mutation(pos=i, ref=r, alt=s, gene=gene_for_position(i)))
-
+    metrics.observe("mutations.per_genome", len(mutations))
     return mutations
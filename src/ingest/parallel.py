@@ -0,0 +1,30 @@
+"""
+parallel.py
+Small helpers shared by the thread- and process-pool code paths.
+"""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from typing import TYPE_CHECKING, Any
+
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
+
+# Records per task when work is shipped to a process pool: large enough to
+# amortize pickling, small enough to keep every worker busy.
+DEFAULT_CHUNK_SIZE = 256
+
+
+def bounded_map(pool: Executor, fn: Callable[[Any], Any], items: Iterable[Any], window: int) -> Iterator:
+    """
+    Like `pool.map`, but lazy: at most `window` results are in flight, so a
+    long input is never submitted all at once. Results come back in order.
+    """
+    pending: deque = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= max(1, window):
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
@@ -0,0 +1,291 @@
+"""
+pipeline.py
+Stage-based pipeline runner with content-hashed, on-disk intermediate artifacts.
+
+The architecture flow (ingest -> normalize -> compare to reference ->
+identify mutations -> map genes -> score) is declared as a small DAG of
+`Stage`s. Input data is split into partitions (e.g. accession batches);
+each partition runs through the DAG independently, so partitions run
+concurrently.
+
+Every stage output is stored under `cache_dir/<stage>/<key>.pkl`, where the
+key hashes the stage name, its version/params and the keys of its inputs.
+Re-running with unchanged inputs loads the artifact instead of recomputing,
+and a stage whose cached output is already on disk never even loads its
+upstream artifacts.
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+import pickle
+import time
+from collections.abc import Callable, Hashable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Any
+
+from .genbank import fetch_many_genbank_minimal, normalize_many_genbank_minimal
+from .mutations import Mutation, diff_sequences
+from .risk import score_mutations
+
+
+@dataclass(frozen=True)
+class Stage:
+    """
+    One step of the pipeline.
+
+    `fn` receives the partition input when `deps` is empty, otherwise the
+    outputs of `deps` in order. Bump `version` (or change `params`) to
+    invalidate cached outputs after changing what `fn` does.
+    """
+    name: str
+    fn: Callable[..., Any]
+    deps: tuple[str, ...] = ()
+    version: str = "1"
+    params: tuple[tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True)
+class StageRun:
+    stage: str
+    partition: Hashable
+    seconds: float
+    items: int
+    cached: bool
+
+
+@dataclass
+class PipelineReport:
+    """Per-stage timings collected while the pipeline ran."""
+    runs: list[StageRun] = field(default_factory=list)
+    wall_seconds: float = 0.0
+
+    def summary(self) -> list[dict[str, Any]]:
+        """One row per stage: time, items, throughput and cache hits."""
+        rows: dict[str, dict[str, Any]] = {}
+        for r in self.runs:
+            row = rows.setdefault(
+                r.stage,
+                {"stage": r.stage, "seconds": 0.0, "items": 0, "partitions": 0, "cached": 0},
+            )
+            row["seconds"] += r.seconds
+            row["items"] += r.items
+            row["partitions"] += 1
+            row["cached"] += int(r.cached)
+        for row in rows.values():
+            row["items_per_second"] = row["items"] / row["seconds"] if row["seconds"] else None
+        return list(rows.values())
+
+    def format(self) -> str:
+        lines = [f"{'stage':<14}{'seconds':>10}{'items':>9}{'items/s':>11}{'cached':>10}"]
+        for row in self.summary():
+            rate = f"{row['items_per_second']:.1f}" if row["items_per_second"] else "-"
+            cached = f"{row['cached']}/{row['partitions']}"
+            lines.append(
+                f"{row['stage']:<14}{row['seconds']:>10.3f}{row['items']:>9}{rate:>11}{cached:>10}"
+            )
+        lines.append(f"total wall time: {self.wall_seconds:.3f}s")
+        return "\n".join(lines)
+
+
+@dataclass
+class PipelineResult:
+    outputs: dict[Hashable, dict[str, Any]]
+    report: PipelineReport
+
+
+def content_hash(*parts: Any) -> str:
+    """Stable hex digest of picklable values (used for partition inputs and keys)."""
+    h = hashlib.sha256()
+    for part in parts:
+        data = part if isinstance(part, bytes) else pickle.dumps(part, protocol=4)
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.hexdigest()
+
+
+def _count(value: Any) -> int:
+    try:
+        return len(value)
+    except TypeError:
+        return 1
+
+
+class Pipeline:
+    """
+    Run a DAG of stages over independent partitions.
+
+      pipe = Pipeline(genome_stages(email, ref_seq), cache_dir="data/cache")
+      result = pipe.run({"batch-0": accessions[:100], "batch-1": accessions[100:]})
+      print(result.report.format())
+
+    Partitions run concurrently on `workers` threads; stages inside one
+    partition run in dependency order.
+
+    The runner is thread-only. Stages are plain callables, often closures
+    that cannot be pickled, so there is no process-pool mode. Threads overlap
+    the network-bound fetch stage and the NumPy comparison in
+    `diff_sequences`; a pure-Python CPU stage gains nothing from more
+    workers and should parallelize inside itself, as
+    `normalize_many_genbank_minimal(workers=...)` does.
+    """
+
+    def __init__(
+        self,
+        stages: Iterable[Stage],
+        cache_dir: str | Path | None = None,
+        workers: int = 4,
+    ) -> None:
+        self.stages = {s.name: s for s in stages}
+        for s in self.stages.values():
+            missing = [d for d in s.deps if d not in self.stages]
+            if missing:
+                raise ValueError(f"stage {s.name!r} depends on unknown stage(s) {missing}")
+        # Raises graphlib.CycleError on cycles.
+        self.order = list(
+            TopologicalSorter({s.name: s.deps for s in self.stages.values()}).static_order()
+        )
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.workers = workers
+
+    def leaves(self) -> list[str]:
+        used = {d for s in self.stages.values() for d in s.deps}
+        return [name for name in self.order if name not in used]
+
+    # -- cache ------------------------------------------------------------
+
+    def _artifact(self, stage: str, key: str) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        return self.cache_dir / stage / f"{key}.pkl"
+
+    @staticmethod
+    def _save(path: Path, value: Any) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with tmp.open("wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def keys(self, data: Any) -> dict[str, str]:
+        """Cache key of every stage for one partition input."""
+        input_key = content_hash(data)
+        keys: dict[str, str] = {}
+        for name in self.order:
+            s = self.stages[name]
+            upstream = [keys[d] for d in s.deps] if s.deps else [input_key]
+            keys[name] = content_hash(s.name, s.version, s.params, *upstream)
+        return keys
+
+    # -- execution --------------------------------------------------------
+
+    def _run_partition(
+        self, partition: Hashable, data: Any, targets: list[str]
+    ) -> tuple[dict[str, Any], list[StageRun]]:
+        keys = self.keys(data)
+        values: dict[str, Any] = {}
+        runs: list[StageRun] = []
+
+        def get(name: str) -> Any:
+            if name in values:
+                return values[name]
+            s = self.stages[name]
+            path = self._artifact(name, keys[name])
+
+            t0 = time.perf_counter()
+            if path is not None and path.exists():
+                with path.open("rb") as f:
+                    value = pickle.load(f)
+                runs.append(StageRun(name, partition, time.perf_counter() - t0, _count(value), True))
+            else:
+                args = [get(d) for d in s.deps] if s.deps else [data]
+                t0 = time.perf_counter()
+                value = s.fn(*args)
+                elapsed = time.perf_counter() - t0
+                if path is not None:
+                    self._save(path, value)
+                runs.append(StageRun(name, partition, elapsed, _count(value), False))
+            values[name] = value
+            return value
+
+        return {t: get(t) for t in targets}, runs
+
+    def run(
+        self,
+        partitions: Mapping[Hashable, Any] | Iterable[Any],
+        targets: Iterable[str] | None = None,
+    ) -> PipelineResult:
+        """
+        Run the pipeline for every partition and return the `targets`
+        outputs (default: the leaf stages) keyed by partition.
+        A plain iterable of partitions is keyed by position.
+        """
+        if not isinstance(partitions, Mapping):
+            partitions = dict(enumerate(partitions))
+        targets = list(targets) if targets is not None else self.leaves()
+        unknown = [t for t in targets if t not in self.stages]
+        if unknown:
+            raise ValueError(f"unknown target stage(s) {unknown}")
+
+        report = PipelineReport()
+        outputs: dict[Hashable, dict[str, Any]] = {}
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max(1, self.workers)) as pool:
+            futures = {
+                p: pool.submit(self._run_partition, p, data, targets)
+                for p, data in partitions.items()
+            }
+            for p, fut in futures.items():
+                outputs[p], runs = fut.result()
+                report.runs.extend(runs)
+        report.wall_seconds = time.perf_counter() - t0
+        return PipelineResult(outputs=outputs, report=report)
+
+
+def partition(items: Iterable[Any], size: int) -> dict[int, list[Any]]:
+    """Split items into fixed-size batches {0: [...], 1: [...], ...}."""
+    if size <= 0:
+        raise ValueError("size must be positive")
+    items = list(items)
+    return {i // size: items[i : i + size] for i in range(0, len(items), size)}
+
+
+# -- the genome analysis flow ---------------------------------------------
+
+def _identify(reference_sequence: str) -> Callable[[list], list[list[Mutation]]]:
+    def identify(records: list) -> list[list[Mutation]]:
+        return [
+            diff_sequences(reference_sequence, r.sequence, normalized=getattr(r, "normalized", False))
+            if r.sequence
+            else []
+            for r in records
+        ]
+    return identify
+
+
+def _map_genes(mutation_lists: list[list[Mutation]]) -> list[list[str]]:
+    return [sorted({m.gene for m in ms if m.gene is not None}) for ms in mutation_lists]
+
+
+def _score(mutation_lists: list[list[Mutation]]) -> list[dict[str, Any]]:
+    return [score_mutations(ms) for ms in mutation_lists]
+
+
+def genome_stages(email: str, reference_sequence: str) -> list[Stage]:
+    """
+    The ARCHITECTURE.md flow as pipeline stages. Partition inputs are lists
+    of accessions; the reference hash is part of every comparison key, so
+    changing the reference re-runs comparison and downstream stages only.
+    """
+    ref = (("reference_sha256", hashlib.sha256(reference_sequence.encode()).hexdigest()),)
+    return [
+        Stage("fetch", lambda accessions: fetch_many_genbank_minimal(accessions, email=email)),
+        Stage("normalize", normalize_many_genbank_minimal, deps=("fetch",)),
+        Stage("mutations", _identify(reference_sequence), deps=("normalize",), params=ref),
+        Stage("genes", _map_genes, deps=("mutations",)),
+        Stage("score", _score, deps=("mutations",)),
+    ]
@@ -0,0 +1,117 @@
+"""
+qc.py
+Sequence quality checks that run before mutation calling and scoring.
+
+All metrics are computed with NumPy over the raw sequence bytes, so a
+30 kb genome costs a few vectorized passes instead of a Python loop.
+"""
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+
+import numpy as np
+
+# Byte-level lookup tables (indexed by the uint8 value of each base).
+_UPPER = np.arange(256, dtype=np.uint8)
+_UPPER[ord("a"):ord("z") + 1] -= 32
+
+_IS_ACGT = np.zeros(256, dtype=bool)
+_IS_ACGT[[ord(c) for c in "ACGT"]] = True
+
+# IUPAC ambiguity codes other than N (N is tracked separately).
+_IS_AMBIGUOUS = np.zeros(256, dtype=bool)
+_IS_AMBIGUOUS[[ord(c) for c in "RYKMSWBDHV"]] = True
+
+_N = ord("N")
+
+
+@dataclass(frozen=True)
+class QCMetrics:
+    """Per-genome quality metrics (stored as `qc_*` columns in summaries)."""
+    n_fraction: float
+    ambiguous_bases: int
+    longest_n_run: int
+    reference_coverage: float
+    reference_differences: int
+
+    def as_columns(self) -> dict[str, float | int]:
+        return {f"qc_{k}": v for k, v in asdict(self).items()}
+
+
+@dataclass(frozen=True)
+class QCThresholds:
+    """
+    Limits a genome must stay within to be scored.
+    Defaults are deliberately lenient: they only catch clearly broken input.
+    """
+    max_n_fraction: float = 0.5
+    max_ambiguous_bases: int = 500
+    max_longest_n_run: int = 15000
+    min_reference_coverage: float = 0.5
+    max_reference_differences: int = 500
+
+
+def _as_bytes(seq: str) -> np.ndarray:
+    raw = np.frombuffer(seq.encode("ascii", errors="replace"), dtype=np.uint8)
+    return _UPPER[raw]
+
+
+def _longest_run(mask: np.ndarray) -> int:
+    if not mask.any():
+        return 0
+    edges = np.diff(np.concatenate(([0], mask.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return int((ends - starts).max())
+
+
+def compute_qc(sequence: str, reference: str) -> QCMetrics:
+    """
+    Compute QC metrics for one sample against a reference sequence.
+
+    - n_fraction: share of the sample that is N
+    - ambiguous_bases: IUPAC ambiguity codes other than N (R, Y, K, ...)
+    - longest_n_run: longest stretch of consecutive Ns
+    - reference_coverage: share of reference positions covered by a real base (A/C/G/T)
+    - reference_differences: A/C/G/T differences from the reference in the overlap.
+      This is not a private-mutation count (nothing is subtracted for the
+      genome's lineage); it catches misassembled or wrong-organism input.
+    """
+    s = _as_bytes(sequence or "")
+    r = _as_bytes(reference or "")
+
+    if len(s) == 0:
+        return QCMetrics(0.0, 0, 0, 0.0, 0)
+
+    is_n = s == _N
+    s_real = _IS_ACGT[s]
+
+    L = min(len(s), len(r))
+    overlap_real = s_real[:L]
+    coverage = float(overlap_real.sum() / len(r)) if len(r) else 0.0
+    differences = int(((s[:L] != r[:L]) & overlap_real & _IS_ACGT[r[:L]]).sum())
+
+    return QCMetrics(
+        n_fraction=float(is_n.mean()),
+        ambiguous_bases=int(_IS_AMBIGUOUS[s].sum()),
+        longest_n_run=_longest_run(is_n),
+        reference_coverage=coverage,
+        reference_differences=differences,
+    )
+
+
+def qc_failures(metrics: QCMetrics, thresholds: QCThresholds | None = None) -> list[str]:
+    """Return a list of human-readable failures; empty means the genome passes."""
+    t = thresholds or QCThresholds()
+    failures = []
+    if metrics.n_fraction > t.max_n_fraction:
+        failures.append(f"n_fraction={metrics.n_fraction:.2f}")
+    if metrics.ambiguous_bases > t.max_ambiguous_bases:
+        failures.append(f"ambiguous_bases={metrics.ambiguous_bases}")
+    if metrics.longest_n_run > t.max_longest_n_run:
+        failures.append(f"longest_n_run={metrics.longest_n_run}")
+    if metrics.reference_coverage < t.min_reference_coverage:
+        failures.append(f"reference_coverage={metrics.reference_coverage:.2f}")
+    if metrics.reference_differences > t.max_reference_differences:
+        failures.append(f"reference_differences={metrics.reference_differences}")
+    return failures
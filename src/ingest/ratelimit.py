@@ -0,0 +1,149 @@
+"""
+ratelimit.py
+Token-bucket rate limiting, shared by threads or by processes.
+
+    limiter = RateLimiter(rate=3.0, burst=1)              # threads in this process
+    limiter = FileRateLimiter("data/.ncbi.rate", 3.0)     # every process on the host
+    limiter.acquire()                                     # blocks until a request may start
+
+A bucket holds up to `burst` tokens and refills at `rate` per second; each
+request takes one. A caller that finds the bucket empty reserves its token
+anyway (the balance goes negative) and sleeps until it would have refilled,
+so concurrent callers queue in order and the lock is never held while
+sleeping.
+
+`FileRateLimiter` keeps the bucket in a small file guarded by an OS file
+lock, so separately started workers share one budget. Both use
+`time.monotonic()`, which is system-wide on the platforms we run on, so the
+shared state is only meaningful between processes on the same machine.
+
+Time spent throttled is recorded as `<name>.wait_seconds` (histogram) and
+`<name>.throttled` (counter) when metrics are enabled.
+"""
+from __future__ import annotations
+
+import os
+import struct
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO
+
+from . import metrics
+
+_STATE = struct.Struct("<dd")  # tokens, updated (monotonic seconds)
+
+
+def _refill(tokens: float, updated: float, now: float, rate: float, burst: int) -> float:
+    # A clock that went backwards (a new boot, a patched clock) just means no refill.
+    return min(float(burst), tokens + max(0.0, now - updated) * rate)
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests per second, `burst` back to back."""
+
+    def __init__(self, rate: float, burst: int = 1, name: str = "ratelimit") -> None:
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        if burst < 1:
+            raise ValueError("burst must be >= 1")
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+
+    def reset(self) -> None:
+        """Forget past requests (the bucket starts full)."""
+        with self._lock:
+            self._tokens = float(self.burst)
+            self._updated = time.monotonic()
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = _refill(self._tokens, self._updated, now, self.rate, self.burst)
+            self._updated = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: int = 1) -> float:
+        """Block until `tokens` requests may start; returns the seconds waited."""
+        wait = self._reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+            metrics.count(f"{self.name}.throttled")
+        metrics.observe(f"{self.name}.wait_seconds", wait, metrics.LATENCY_BUCKETS)
+        return wait
+
+    __call__ = acquire
+
+
+@contextmanager
+def _file_lock(f: IO[bytes]) -> Iterator[None]:
+    if os.name == "nt":
+        import msvcrt
+
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, _STATE.size)
+        try:
+            yield
+        finally:
+            f.seek(0)
+            msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, _STATE.size)
+    else:
+        import fcntl
+
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    Token bucket stored in `path`, shared by every process (and thread) that
+    opens a limiter on the same file. The file is created on first use;
+    opening a limiter never resets a bucket other processes are using.
+    """
+
+    def __init__(self, path: str | Path, rate: float, burst: int = 1, name: str = "ratelimit") -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.touch(exist_ok=True)
+        super().__init__(rate, burst, name)
+
+    @contextmanager
+    def _state(self) -> Iterator[list[float]]:
+        # The thread lock covers this process; the file lock covers the others.
+        with self._lock, self.path.open("r+b") as f, _file_lock(f):
+            raw = f.read(_STATE.size)
+            state = list(_STATE.unpack(raw)) if len(raw) == _STATE.size else [float(self.burst), 0.0]
+            yield state
+            f.seek(0)
+            f.write(_STATE.pack(*state))
+            f.truncate()
+
+    def reset(self) -> None:
+        with self._state() as state:
+            state[:] = [float(self.burst), time.monotonic()]
+
+    def _reserve(self, tokens: int) -> float:
+        with self._state() as state:
+            now = time.monotonic()
+            available = _refill(state[0], state[1], now, self.rate, self.burst)
+            state[:] = [available - tokens, now]
+            return max(0.0, -state[0] / self.rate)
+
+
+def rate_limiter(
+    rate: float, burst: int = 1, name: str = "ratelimit", path: str | Path | None = None
+) -> RateLimiter:
+    """A `FileRateLimiter` when `path` is given (cross-process), else an in-process one."""
+    if path:
+        return FileRateLimiter(path, rate, burst, name)
+    return RateLimiter(rate, burst, name)
@@ -0,0 +1,370 @@
+"""
+references.py
+Per-organism reference registry with prebuilt, memory-mapped artifacts.
+
+Each organism has a pinned reference sequence and gene annotation, listed
+in `registry.json` under the registry root:
+
+    data/references/
+        registry.json                 # organisms, aliases, accession, genes, k
+        NC_045512.2.fasta             # pinned reference (scripts/build_references.py)
+        build/NC_045512.2/            # generated on first use (git-ignored)
+            sequence.u8               # reference bytes, memory-mapped
+            kmer_codes.npy            # sorted 2-bit packed k-mers (uint32)
+            kmer_positions.npy        # 0-based start of each k-mer
+            meta.json                 # written last; sha256 marks staleness
+
+Records are routed by `CanonicalGenomeRecord.organism` (case-insensitive,
+aliases allowed), so a mixed-pathogen batch is scored in one pass with the
+right reference and genes for every record.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+from .fasta import iter_fasta
+from .genes import GeneMap
+from .mutations import Mutation, diff_sequences
+from .sequences import canonicalize_sequence
+
+DEFAULT_ROOT = Path("data/references")
+DEFAULT_K = 11  # 4**11 = 4M possible k-mers: unique enough for viral genomes
+_BUILD_FORMAT = 1
+_REGISTRY_FILE = "registry.json"
+
+# 2-bit base codes; anything that is not A/C/G/T breaks a k-mer.
+_INVALID = 255
+_CODE = np.full(256, _INVALID, dtype=np.uint8)
+for _i, _b in enumerate(b"ACGT"):
+    _CODE[_b] = _i
+    _CODE[_b + 32] = _i  # lowercase
+
+
+@dataclass(frozen=True)
+class ReferenceSpec:
+    organism: str
+    accession: str
+    fasta: str
+    genes: tuple[tuple[str, int, int], ...]
+    aliases: tuple[str, ...] = ()
+    k: int = DEFAULT_K
+
+    @classmethod
+    def from_dict(cls, d: dict[str, Any]) -> ReferenceSpec:
+        return cls(
+            organism=d["organism"],
+            accession=d["accession"],
+            fasta=d["fasta"],
+            genes=tuple((str(n), int(s), int(e)) for n, s, e in d.get("genes", [])),
+            aliases=tuple(d.get("aliases", ())),
+            k=int(d.get("k", DEFAULT_K)),
+        )
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "organism": self.organism,
+            "aliases": list(self.aliases),
+            "accession": self.accession,
+            "fasta": self.fasta,
+            "genes": [list(g) for g in self.genes],
+            "k": self.k,
+        }
+
+
+def _kmer_codes(seq: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+    """(codes, positions) of every A/C/G/T-only k-mer in `seq`, unsorted."""
+    if not 1 <= k <= 16:
+        raise ValueError("k must be between 1 and 16 (k-mers are packed into uint32)")
+    n = len(seq) - k + 1
+    if n <= 0:
+        return np.empty(0, np.uint32), np.empty(0, np.uint32)
+
+    codes = _CODE[seq]
+    invalid = np.concatenate(([0], np.cumsum(codes == _INVALID)))
+    valid = (invalid[k:] - invalid[:-k]) == 0
+
+    packed = np.zeros(n, dtype=np.uint32)
+    for j in range(k):
+        packed = (packed << 2) | (codes[j : j + n] & 3).astype(np.uint32)
+
+    positions = np.flatnonzero(valid).astype(np.uint32)
+    return packed[valid], positions
+
+
+def _sequence_sha256(sequence: str) -> str:
+    return hashlib.sha256(sequence.encode("ascii")).hexdigest()
+
+
+@dataclass
+class Reference:
+    """A loaded reference: memory-mapped sequence, gene map and k-mer index."""
+    spec: ReferenceSpec
+    array: np.ndarray
+    kmer_codes: np.ndarray
+    kmer_positions: np.ndarray
+    sha256: str
+    genes: GeneMap = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.genes = GeneMap(self.spec.genes)
+
+    @property
+    def organism(self) -> str:
+        return self.spec.organism
+
+    @property
+    def accession(self) -> str:
+        return self.spec.accession
+
+    def __len__(self) -> int:
+        return len(self.array)
+
+    @cached_property
+    def sequence(self) -> str:
+        # Decoded once per Reference, for diff_sequences; k-mer lookups and
+        # `array` keep reading the shared memory map.
+        return self.array.tobytes().decode("ascii")
+
+    def gene_for_position(self, pos: int) -> str | None:
+        return self.genes(pos)
+
+    def identify_mutations(self, record: Any) -> list[Mutation]:
+        """`score_genome(identify_mutations=...)` hook diffing against this reference."""
+        sample = record.get("sequence") if isinstance(record, dict) else getattr(record, "sequence", None)
+        if not sample:
+            return []
+        normalized = (
+            record.get("normalized", False) if isinstance(record, dict) else getattr(record, "normalized", False)
+        )
+        return diff_sequences(self.sequence, sample, gene_lookup=self.genes, normalized=bool(normalized))
+
+    def kmer_hits(self, kmer: str) -> np.ndarray:
+        """0-based reference positions where `kmer` (length k) occurs."""
+        if len(kmer) != self.spec.k:
+            raise ValueError(f"k-mer must have length {self.spec.k}")
+        codes, _ = _kmer_codes(np.frombuffer(kmer.encode("ascii"), dtype=np.uint8), self.spec.k)
+        if len(codes) == 0:
+            return np.empty(0, np.uint32)
+        lo = int(np.searchsorted(self.kmer_codes, codes[0], side="left"))
+        hi = int(np.searchsorted(self.kmer_codes, codes[0], side="right"))
+        return np.sort(self.kmer_positions[lo:hi])
+
+    def locate(self, fragment: str, samples: int = 64) -> int | None:
+        """
+        0-based reference offset where `fragment` most likely starts, by
+        k-mer voting (None if no k-mer matches). Useful for placing
+        trimmed or partial genomes before diffing.
+        """
+        arr = np.frombuffer(fragment.encode("ascii", errors="replace"), dtype=np.uint8)
+        codes, positions = _kmer_codes(arr, self.spec.k)
+        if len(codes) == 0:
+            return None
+        step = max(1, len(codes) // samples)
+        codes, positions = codes[::step], positions[::step]
+
+        lo = np.searchsorted(self.kmer_codes, codes, side="left")
+        hi = np.searchsorted(self.kmer_codes, codes, side="right")
+        votes: Counter[int] = Counter()
+        for a, b, frag_pos in zip(lo, hi, positions, strict=True):
+            for ref_pos in self.kmer_positions[a:b]:
+                votes[int(ref_pos) - int(frag_pos)] += 1
+        return votes.most_common(1)[0][0] if votes else None
+
+
+class ReferenceRegistry:
+    """
+    Organism -> Reference lookup backed by `registry.json` under `root`.
+
+    Artifacts are built once per reference (and rebuilt if the pinned
+    sequence or k changes), then memory-mapped, so every process shares
+    the same pages and loading costs nothing beyond opening the files.
+    """
+
+    def __init__(self, root: str | Path = DEFAULT_ROOT) -> None:
+        self.root = Path(root)
+        self._lock = threading.Lock()
+        self._loaded: dict[str, Reference] = {}
+        self.specs: list[ReferenceSpec] = []
+        self._names: dict[str, ReferenceSpec] = {}
+        registry = self.root / _REGISTRY_FILE
+        if registry.exists():
+            data = json.loads(registry.read_text(encoding="utf-8"))
+            for d in data.get("references", []):
+                self._index(ReferenceSpec.from_dict(d))
+
+    def _index(self, spec: ReferenceSpec) -> None:
+        self.specs = [s for s in self.specs if s.accession != spec.accession] + [spec]
+        self._names = {}
+        for s in self.specs:
+            for name in (s.organism, *s.aliases):
+                self._names[name.strip().lower()] = s
+
+    def organisms(self) -> list[str]:
+        return [s.organism for s in self.specs]
+
+    def resolve(self, organism: str | None) -> ReferenceSpec | None:
+        if not organism:
+            return None
+        return self._names.get(organism.strip().lower())
+
+    # -- registration -----------------------------------------------------
+
+    def register(
+        self,
+        organism: str,
+        accession: str,
+        sequence: str,
+        genes: tuple[tuple[str, int, int], ...] | list,
+        aliases: tuple[str, ...] | list = (),
+        k: int = DEFAULT_K,
+    ) -> ReferenceSpec:
+        """Pin a reference: write its FASTA, add it to registry.json and build it."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        spec = ReferenceSpec(
+            organism=organism,
+            accession=accession,
+            fasta=f"{accession}.fasta",
+            genes=tuple((str(n), int(s), int(e)) for n, s, e in genes),
+            aliases=tuple(aliases),
+            k=k,
+        )
+        self.pin(spec, sequence)
+
+        with self._lock:
+            self._index(spec)
+            self._loaded.pop(spec.accession, None)
+            payload = {"references": [s.to_dict() for s in self.specs]}
+            tmp = self.root / (_REGISTRY_FILE + ".tmp")
+            tmp.write_text(json.dumps(payload, indent=2) + "\n", encoding="utf-8")
+            os.replace(tmp, self.root / _REGISTRY_FILE)
+        self.build(spec)
+        return spec
+
+    def pin(self, spec: ReferenceSpec, sequence: str) -> Path:
+        """Write the pinned FASTA for an already-listed reference."""
+        self.root.mkdir(parents=True, exist_ok=True)
+        body = "\n".join(sequence[i : i + 70] for i in range(0, len(sequence), 70))
+        path = self.root / spec.fasta
+        path.write_text(f">{spec.accession} {spec.organism}\n{body}\n", encoding="ascii")
+        return path
+
+    def is_pinned(self, spec: ReferenceSpec) -> bool:
+        return (self.root / spec.fasta).exists()
+
+    # -- artifacts --------------------------------------------------------
+
+    def _build_dir(self, spec: ReferenceSpec) -> Path:
+        return self.root / "build" / spec.accession
+
+    def _read_sequence(self, spec: ReferenceSpec) -> str:
+        path = self.root / spec.fasta
+        if not path.exists():
+            raise FileNotFoundError(
+                f"reference {spec.accession} is not pinned yet ({path} missing); "
+                "run `python -m scripts.build_references` to fetch and build it"
+            )
+        for _, seq in iter_fasta(path):
+            return canonicalize_sequence(seq)
+        raise ValueError(f"{spec.fasta} contains no sequence")
+
+    def _read_meta(self, spec: ReferenceSpec) -> dict[str, Any] | None:
+        meta_path = self._build_dir(spec) / "meta.json"
+        if not meta_path.exists():
+            return None
+        return json.loads(meta_path.read_text(encoding="utf-8"))
+
+    def _fasta_stat(self, spec: ReferenceSpec) -> list[int]:
+        st = (self.root / spec.fasta).stat()
+        return [st.st_size, st.st_mtime_ns]
+
+    @classmethod
+    def _is_current(cls, spec: ReferenceSpec, meta: dict[str, Any] | None, sha256: str) -> bool:
+        if meta is None:
+            return False
+        built = {k: v for k, v in meta.items() if k != "fasta"}
+        return built == cls._meta(spec, sha256)
+
+    @staticmethod
+    def _meta(spec: ReferenceSpec, sha256: str) -> dict[str, Any]:
+        return {"format": _BUILD_FORMAT, "accession": spec.accession, "k": spec.k, "sha256": sha256}
+
+    def _write_meta(self, spec: ReferenceSpec, sha256: str) -> None:
+        # The FASTA's size and mtime let later opens skip re-reading and hashing it.
+        meta = {**self._meta(spec, sha256), "fasta": self._fasta_stat(spec)}
+        (self._build_dir(spec) / "meta.json").write_text(json.dumps(meta), encoding="utf-8")
+
+    def build(self, spec: ReferenceSpec, force: bool = False) -> Path:
+        """Write sequence.u8 and the k-mer index for `spec` unless they are current."""
+        out = self._build_dir(spec)
+        meta = self._read_meta(spec)
+        if (
+            not force
+            and meta is not None
+            and self.is_pinned(spec)
+            and meta.get("fasta") == self._fasta_stat(spec)
+            and self._is_current(spec, meta, meta.get("sha256", ""))
+        ):
+            return out  # FASTA untouched since the last build
+
+        sequence = self._read_sequence(spec)
+        sha256 = _sequence_sha256(sequence)
+        if not force and self._is_current(spec, meta, sha256):
+            self._write_meta(spec, sha256)  # touched but unchanged: refresh the stat only
+            return out
+
+        out.mkdir(parents=True, exist_ok=True)
+        (out / "meta.json").unlink(missing_ok=True)  # invalid until the rebuild finishes
+
+        arr = np.frombuffer(sequence.encode("ascii"), dtype=np.uint8)
+        codes, positions = _kmer_codes(arr, spec.k)
+        order = np.argsort(codes, kind="stable")
+
+        arr.tofile(out / "sequence.u8")
+        np.save(out / "kmer_codes.npy", codes[order])
+        np.save(out / "kmer_positions.npy", positions[order])
+        self._write_meta(spec, sha256)
+        return out
+
+    def build_all(self, force: bool = False) -> list[Path]:
+        return [self.build(s, force=force) for s in self.specs]
+
+    # -- lookup -----------------------------------------------------------
+
+    def _load(self, spec: ReferenceSpec) -> Reference:
+        out = self.build(spec)
+        meta = json.loads((out / "meta.json").read_text(encoding="utf-8"))
+        return Reference(
+            spec=spec,
+            array=np.memmap(out / "sequence.u8", dtype=np.uint8, mode="r"),
+            kmer_codes=np.load(out / "kmer_codes.npy", mmap_mode="r"),
+            kmer_positions=np.load(out / "kmer_positions.npy", mmap_mode="r"),
+            sha256=meta["sha256"],
+        )
+
+    def get(self, organism: str | None) -> Reference | None:
+        """Reference for an organism name or alias, or None if unregistered."""
+        spec = self.resolve(organism)
+        if spec is None:
+            return None
+        ref = self._loaded.get(spec.accession)
+        if ref is None:
+            with self._lock:
+                ref = self._loaded.get(spec.accession)
+                if ref is None:
+                    ref = self._loaded[spec.accession] = self._load(spec)
+        return ref
+
+    def for_record(self, record: Any) -> Reference | None:
+        """Route a record (dict or CanonicalGenomeRecord) by its organism."""
+        organism = record.get("organism") if isinstance(record, dict) else getattr(record, "organism", None)
+        return self.get(organism)
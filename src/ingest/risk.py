@@ -20,6 +20,11 @@ _LOW_MAX = 2
 _MODERATE_MAX = 6  # 3–6 inclusive is Moderate; 7+ is High
 
 
+def rules_fingerprint() -> str:
+    """The weights and thresholds, as text; part of persistent score-cache keys."""
+    return repr((sorted(_GENE_WEIGHTS.items()), _LOW_MAX, _MODERATE_MAX))
+
+
 def _gene_label(gene: str) -> str:
     """Human-friendly names for explanations."""
     return {
@@ -5,10 +5,20 @@ End-to-end scoring orchestration (dependency-injection friendly).
 
 from __future__ import annotations
 
+import functools
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
 from typing import Any
 
+from ingest import metrics
+from ingest.genes import SARS_COV_2_GENES, GeneMap
 from ingest.mutations import Mutation, diff_sequences
-from ingest.risk import score_mutations
+from ingest.risk import rules_fingerprint, score_mutations
 
 
 def _identify_mutations(record: Any):
@@ -28,7 +38,7 @@ def _identify_mutations(record: Any):
         if not ref or not sample:
             return []
         try:
-            return diff_sequences(ref, sample)
+            return diff_sequences(ref, sample, normalized=bool(record.get("normalized")))
         except ValueError:
             # Length mismatch (partial/trimmed sequences) -> treat as unscorable for v1
             return []
@@ -40,7 +50,7 @@ def _identify_mutations(record: Any):
         return []
 
     try:
-        return diff_sequences(ref, sample)
+        return diff_sequences(ref, sample, normalized=bool(getattr(record, "normalized", False)))
     except ValueError:
         return []
 
@@ -67,6 +77,7 @@ def _compute_risk(mutations: list[Mutation]) -> dict[str, Any]:
 
     return score_mutations(mutations)
 
+@metrics.timed("scoring.score_genome")
 def score_genome(
     record,
     *,
@@ -79,10 +90,13 @@ def score_genome(
     map_genes = map_genes or _map_genes
     compute_risk = compute_risk or score_mutations
 
-    mutations = identify_mutations(record)
-    genes_affected = map_genes(mutations)
+    with metrics.stage("scoring.identify_mutations"):
+        mutations = identify_mutations(record)
+    with metrics.stage("scoring.map_genes"):
+        genes_affected = map_genes(mutations)
 
-    risk = compute_risk(mutations)
+    with metrics.stage("scoring.compute_risk"):
+        risk = compute_risk(mutations)
     risk_score = float(risk.get("score", 0.0))
 
     accession = record["accession"] if isinstance(record, dict) else record.accession
@@ -98,3 +112,141 @@ def score_genome(
         "risk_by_gene": risk.get("by_gene", {}),
         "risk_explanation": risk.get("explanation", ""),
     }
+
+
+# ---------------------------------------------------------------------------
+# Score memoization
+#
+# Surveillance datasets contain many byte-identical genomes (resubmissions,
+# the same sample under several accessions). Scores depend only on the
+# sequence, the reference, the gene annotation and the scoring rules, so they
+# are cached under a digest of those and fanned back out to every accession
+# that shares them.
+# ---------------------------------------------------------------------------
+
+# Fields that do not depend on the record itself (accession / source do).
+_SEQUENCE_FIELDS = (
+    "num_mutations",
+    "genes_affected",
+    "risk_score",
+    "risk_level",
+    "risk_by_gene",
+    "risk_explanation",
+)
+
+# Bump whenever the same sequences can score differently, so saved caches
+# are discarded rather than served stale. 2: canonical diff (case, U/T,
+# IUPAC ambiguity masking). 3: keys include gene map and scoring rules.
+_CACHE_FORMAT = 3
+
+# Bump when score_genome logic changes in ways the risk weights don't capture.
+SCORING_VERSION = 1
+
+
+def sequence_digest(sequence: str) -> str:
+    """Short, stable digest of a sequence (128-bit BLAKE2b, hex)."""
+    return hashlib.blake2b(sequence.encode("utf-8"), digest_size=16).hexdigest()
+
+
+# The same reference string is passed for every record in a run; str hashes
+# are cached on the object, so this lookup avoids re-digesting 30 kb each time.
+_reference_digest = functools.lru_cache(maxsize=8)(sequence_digest)
+
+
+@functools.lru_cache(maxsize=32)
+def _scoring_digest(genes: tuple[tuple[str, int, int], ...]) -> str:
+    return sequence_digest(repr((SCORING_VERSION, rules_fingerprint(), genes)))
+
+
+def score_key(sequence: str, reference_sequence: str, genes: GeneMap | None = None) -> str:
+    """
+    Cache key for scoring `sequence` against `reference_sequence`, annotated
+    with `genes` (the default SARS-CoV-2 genes when None). The key also covers
+    SCORING_VERSION and the risk weights, so changing any of them misses.
+    """
+    annotation = genes.genes if genes is not None else SARS_COV_2_GENES
+    return (
+        f"{_scoring_digest(annotation)}:{_reference_digest(reference_sequence)}"
+        f":{sequence_digest(sequence)}"
+    )
+
+
+def _copy_fields(value: dict[str, Any]) -> dict[str, Any]:
+    # Rows must not share the cached genes_affected list / risk_by_gene dict.
+    return {k: v.copy() if isinstance(v, list | dict) else v for k, v in value.items()}
+
+
+class ScoreCache:
+    """
+    Bounded LRU of sequence-dependent score fields, keyed by `score_key`.
+
+    A cache can be saved to and loaded from JSON, so repeated runs over a
+    growing dataset only score genomes they have not seen before.
+    """
+
+    def __init__(self, maxsize: int = 100_000) -> None:
+        if maxsize <= 0:
+            raise ValueError("maxsize must be positive")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._data: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._data
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            value = self._data.get(key)
+            if value is None:
+                return None
+            self._data.move_to_end(key)
+            return _copy_fields(value)
+
+    def put(self, key: str, value: dict[str, Any]) -> None:
+        with self._lock:
+            self._data[key] = _copy_fields({k: value[k] for k in _SEQUENCE_FIELDS if k in value})
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def get_or_score(self, key: str, score: Callable[[], dict[str, Any]]) -> dict[str, Any]:
+        """Cached fields for `key`, calling `score()` only on a miss."""
+        cached = self.get(key)
+        if cached is not None:
+            self.hits += 1
+            metrics.count("scoring.cache_hits")
+            return cached
+        self.misses += 1
+        metrics.count("scoring.cache_misses")
+        result = score()
+        self.put(key, result)
+        return result
+
+    def save(self, path: str | Path) -> None:
+        """Write the cache as JSON (least- to most-recently used), atomically."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            payload = {"format": _CACHE_FORMAT, "entries": list(self._data.items())}
+        tmp = p.with_name(p.name + ".tmp")
+        tmp.write_text(json.dumps(payload), encoding="utf-8")
+        os.replace(tmp, p)
+
+    @classmethod
+    def load(cls, path: str | Path, maxsize: int = 100_000) -> ScoreCache:
+        """Load a saved cache; a missing or unreadable file gives an empty one."""
+        cache = cls(maxsize=maxsize)
+        try:
+            payload = json.loads(Path(path).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return cache
+        if payload.get("format") != _CACHE_FORMAT:
+            return cache
+        for key, value in payload.get("entries", []):
+            cache.put(key, value)
+        return cache
@@ -0,0 +1,61 @@
+"""
+sequences.py
+Canonical nucleotide alphabet, applied once per genome at ingest.
+
+`canonicalize_sequence` is a single `bytes.translate` pass:
+
+    - lowercase (soft-masked) bases are uppercased
+    - U becomes T (RNA submissions)
+    - IUPAC ambiguity codes (R, Y, K, M, S, W, B, D, H, V) and N are kept,
+      so QC can still count them; they form the *masked* class that
+      `diff_sequences` never reports as a mutation
+    - "-" gaps are kept ("." becomes "-"); any other symbol becomes N
+    - whitespace and digits (line numbers in flatfiles) are removed
+
+Records produced by `normalize_genbank_minimal` carry `normalized=True`, so
+downstream code can skip the pass entirely.
+"""
+from __future__ import annotations
+
+import string
+from functools import cache
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import numpy as np
+
+ACGT = "ACGT"
+AMBIGUITY_CODES = "RYKMSWBDHV"
+MASKED = "N" + AMBIGUITY_CODES
+GAP = "-"
+
+
+def _translate_table() -> bytes:
+    table = bytearray(b"N" * 256)
+    for c in ACGT + MASKED:
+        table[ord(c)] = table[ord(c.lower())] = ord(c)
+    table[ord("U")] = table[ord("u")] = ord("T")
+    table[ord(GAP)] = table[ord(".")] = ord(GAP)
+    return bytes(table)
+
+
+_TABLE = _translate_table()
+_DELETE = (string.whitespace + string.digits).encode("ascii")
+
+
+def canonicalize_sequence(sequence: str | None) -> str:
+    """Canonical uppercase DNA for a raw sequence (see module docstring); "" for None."""
+    if not sequence:
+        return ""
+    raw = sequence.encode("ascii", errors="replace")  # non-ASCII -> "?" -> N
+    return raw.translate(_TABLE, _DELETE).decode("ascii")
+
+
+@cache
+def masked_lookup() -> np.ndarray:
+    """Boolean table indexed by byte value: True for N and ambiguity codes."""
+    import numpy as np  # deferred: flatfile and mutations import this module
+
+    table = np.zeros(256, dtype=bool)
+    table[list(MASKED.encode("ascii"))] = True
+    return table
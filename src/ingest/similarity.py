@@ -0,0 +1,222 @@
+"""
+similarity.py
+Approximate "closest genomes" search using MinHash + LSH over mutation sets.
+
+Each genome is reduced to its set of mutations (as produced by
+`ingest.mutations.diff_sequences`). Two genomes that share most of their
+mutations are close relatives, so Jaccard similarity of those sets is a
+good, cheap stand-in for a proper phylogenetic distance.
+"""
+from __future__ import annotations
+
+import json
+import zlib
+from collections.abc import Iterable
+from pathlib import Path
+
+import numpy as np
+
+from .mutations import Mutation
+
+DEFAULT_PATH = Path("data/derived/similarity_index.npz")
+
+# Hash permutations are (a * x + b) mod p with p = 2**31 - 1, so every
+# intermediate product fits in uint64 without overflowing.
+_PRIME = np.uint64((1 << 31) - 1)
+_EMPTY = np.uint32((1 << 31) - 1)
+
+# Multiplier used to fold the rows of one band into a single uint64 bucket key.
+_BAND_MIX = np.uint64(0x9E3779B97F4A7C15)
+
+
+def mutation_token(m: Mutation) -> str:
+    """Stable text token for one mutation, e.g. 'A23403G'."""
+    return f"{m.ref}{m.pos}{m.alt}"
+
+
+class MinHashIndex:
+    """
+    In-memory MinHash/LSH index keyed by accession.
+
+    - `num_perm` hash functions give each genome a fixed-size signature.
+    - Signatures are split into `bands`; genomes that agree on any whole band
+      become candidates, and candidates are ranked by estimated Jaccard.
+    - Band buckets are kept as sorted arrays and rebuilt lazily after adds,
+      so a query is a handful of binary searches, not a scan of the archive.
+    """
+
+    def __init__(self, num_perm: int = 64, bands: int = 16, seed: int = 1) -> None:
+        if num_perm <= 0 or bands <= 0 or num_perm % bands != 0:
+            raise ValueError("num_perm must be a positive multiple of bands")
+
+        self.num_perm = num_perm
+        self.bands = bands
+        self.seed = seed
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, int(_PRIME), size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, int(_PRIME), size=num_perm, dtype=np.uint64)
+
+        self._accessions: list[str] = []
+        self._row_of: dict[str, int] = {}
+        self._sigs = np.empty((0, num_perm), dtype=np.uint32)
+        self._keys = np.empty((0, bands), dtype=np.uint64)
+
+        # Lazily rebuilt per-band bucket arrays (see _ensure_sorted).
+        self._sorted_keys: np.ndarray | None = None
+        self._order: np.ndarray | None = None
+
+    def __len__(self) -> int:
+        return len(self._accessions)
+
+    def __contains__(self, accession: str) -> bool:
+        return accession in self._row_of
+
+    def signature(self, mutations: Iterable[Mutation]) -> np.ndarray:
+        """Compute the MinHash signature for one mutation set."""
+        tokens = {mutation_token(m) for m in mutations}
+        if not tokens:
+            return np.full(self.num_perm, _EMPTY, dtype=np.uint32)
+
+        hashed = np.fromiter(
+            (zlib.crc32(t.encode("ascii")) for t in tokens),
+            dtype=np.uint64,
+            count=len(tokens),
+        )
+        # (num_perm, n_tokens) permuted hashes; keep the minimum per permutation.
+        permuted = (self._a[:, None] * hashed[None, :] + self._b[:, None]) % _PRIME
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _band_keys(self, sigs: np.ndarray) -> np.ndarray:
+        """Fold each band of each signature into one uint64 bucket key."""
+        rows = self.num_perm // self.bands
+        banded = sigs.reshape(len(sigs), self.bands, rows).astype(np.uint64)
+        keys = np.zeros((len(sigs), self.bands), dtype=np.uint64)
+        for r in range(rows):
+            keys = keys * _BAND_MIX + banded[:, :, r]
+        return keys
+
+    def add(self, accession: str, mutations: Iterable[Mutation]) -> None:
+        """Add (or replace) one genome."""
+        self.add_many([(accession, mutations)])
+
+    def add_many(self, items: Iterable[tuple[str, Iterable[Mutation]]]) -> None:
+        """
+        Add many genomes at once.
+        Re-adding an accession replaces its previous signature.
+        """
+        new_acc: list[str] = []
+        new_sigs: list[np.ndarray] = []
+        pending: dict[str, int] = {}  # accession -> position in new_acc
+
+        for accession, mutations in items:
+            sig = self.signature(mutations)
+            row = self._row_of.get(accession)
+            if row is not None:
+                self._sigs[row] = sig
+                self._keys[row] = self._band_keys(sig[None, :])[0]
+                continue
+            i = pending.get(accession)
+            if i is not None:
+                new_sigs[i] = sig  # repeated within the batch: last one wins
+                continue
+            pending[accession] = len(new_acc)
+            new_acc.append(accession)
+            new_sigs.append(sig)
+
+        if new_sigs:
+            sigs = np.vstack(new_sigs)
+            start = len(self._accessions)
+            self._row_of.update((a, start + i) for i, a in enumerate(new_acc))
+            self._accessions.extend(new_acc)
+            self._sigs = np.vstack([self._sigs, sigs])
+            self._keys = np.vstack([self._keys, self._band_keys(sigs)])
+
+        self._sorted_keys = None
+        self._order = None
+
+    def _ensure_sorted(self) -> None:
+        if self._order is not None:
+            return
+        # One sorted key column per band, plus the row order that produced it.
+        self._order = np.argsort(self._keys.T, axis=1, kind="stable")
+        self._sorted_keys = np.take_along_axis(self._keys.T, self._order, axis=1)
+
+    def query(self, mutations: Iterable[Mutation], k: int = 10) -> list[tuple[str, float]]:
+        """
+        Return up to `k` nearest accessions as (accession, estimated Jaccard distance),
+        closest first. Only LSH candidates are considered, so very distant genomes
+        are never returned.
+        """
+        if not self._accessions or k <= 0:
+            return []
+
+        self._ensure_sorted()
+        sig = self.signature(mutations)
+        qkeys = self._band_keys(sig[None, :])[0]
+
+        hits = []
+        for b in range(self.bands):
+            lo = np.searchsorted(self._sorted_keys[b], qkeys[b], side="left")
+            hi = np.searchsorted(self._sorted_keys[b], qkeys[b], side="right")
+            if hi > lo:
+                hits.append(self._order[b, lo:hi])
+        if not hits:
+            return []
+
+        candidates = np.unique(np.concatenate(hits))
+        similarity = (self._sigs[candidates] == sig[None, :]).mean(axis=1)
+
+        # Sort by similarity (desc), then row (asc) for stable tie-breaking.
+        top = np.lexsort((candidates, -similarity))[:k]
+        return [
+            (self._accessions[candidates[i]], float(1.0 - similarity[i]))
+            for i in top
+        ]
+
+    def save(self, path: str | Path) -> None:
+        """Persist the index as a single .npz file."""
+        p = Path(path)
+        p.parent.mkdir(parents=True, exist_ok=True)
+        meta = {"num_perm": self.num_perm, "bands": self.bands, "seed": self.seed}
+        with p.open("wb") as f:
+            np.savez(
+                f,
+                meta=np.array(json.dumps(meta)),
+                accessions=np.array(self._accessions, dtype=str),
+                signatures=self._sigs,
+                band_keys=self._keys,
+            )
+
+    @classmethod
+    def load(cls, path: str | Path) -> MinHashIndex:
+        """Load an index written by `save`."""
+        with np.load(Path(path), allow_pickle=False) as data:
+            meta = json.loads(str(data["meta"]))
+            index = cls(num_perm=meta["num_perm"], bands=meta["bands"], seed=meta["seed"])
+            index._accessions = [str(a) for a in data["accessions"]]
+            index._sigs = data["signatures"].astype(np.uint32)
+            index._keys = data["band_keys"].astype(np.uint64)
+
+        index._row_of = {a: i for i, a in enumerate(index._accessions)}
+        return index
+
+
+def update_index_file(
+    path: str | Path,
+    items: Iterable[tuple[str, Iterable[Mutation]]],
+    **params,
+) -> MinHashIndex:
+    """
+    Ingest helper: load the index at `path` (or start a new one with
+    `params`), add the new genomes, and write it back.
+
+    Only the new genomes are hashed, but the .npz is read and rewritten in
+    full, so each call costs O(genomes already indexed) in I/O. Batch many
+    genomes per call rather than calling it once per genome.
+    """
+    p = Path(path)
+    index = MinHashIndex.load(p) if p.exists() else MinHashIndex(**params)
+    index.add_many(items)
+    index.save(p)
+    return index
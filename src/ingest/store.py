@@ -0,0 +1,211 @@
+"""
+store.py
+Append-only, deduplicating record store built from NDJSON segments.
+
+Layout under the store root:
+
+    segments/segment-000001.ndjson   # one file per ingest batch (+ .idx sidecar)
+    manifest.log                     # append-only: accession -> segment
+
+Each ingest batch becomes a new segment, and the manifest gains one line per
+accepted record, so a daily ingest costs time proportional to the new
+records rather than the archive. Compaction merges segments, drops
+superseded versions and rewrites the manifest; it can run in a background
+thread while appends continue.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from .io import get_record, index_path, iter_ndjson, write_ndjson
+from .models import CanonicalGenomeRecord
+
+_MANIFEST = "manifest.log"
+_SEGMENT_DIR = "segments"
+
+
+def split_version(accession: str) -> tuple[str, int]:
+    """
+    Split a versioned accession into (base, version).
+
+      "NC_045512.2" -> ("NC_045512", 2)
+      "PX908454"    -> ("PX908454", 0)
+    """
+    base, dot, version = accession.rpartition(".")
+    if dot and base and version.isdigit():
+        return base, int(version)
+    return accession, 0
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    accession: str
+    version: int
+    segment: str
+
+
+class SegmentStore:
+    """Append-only segment store keyed by accession (latest version wins)."""
+
+    def __init__(self, root: str | Path) -> None:
+        self.root = Path(root)
+        self.segment_dir = self.root / _SEGMENT_DIR
+        self.segment_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._entries: dict[str, ManifestEntry] = {}
+        self._load_manifest()
+
+    # -- manifest ---------------------------------------------------------
+
+    @property
+    def manifest_path(self) -> Path:
+        return self.root / _MANIFEST
+
+    def _load_manifest(self) -> None:
+        if not self.manifest_path.exists():
+            return
+        with self.manifest_path.open("r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.rstrip("\n").split("\t")
+                if len(parts) != 3:
+                    continue  # torn write from a crash; the segment is simply ignored
+                accession, version, segment = parts
+                base, _ = split_version(accession)
+                self._entries[base] = ManifestEntry(accession, int(version), segment)
+
+    @staticmethod
+    def _manifest_line(e: ManifestEntry) -> str:
+        return f"{e.accession}\t{e.version}\t{e.segment}\n"
+
+    # -- segments ---------------------------------------------------------
+
+    def segments(self) -> list[str]:
+        return sorted(p.name for p in self.segment_dir.glob("segment-*.ndjson"))
+
+    def _next_segment_name(self) -> str:
+        existing = self.segments()
+        n = int(existing[-1][len("segment-"):-len(".ndjson")]) + 1 if existing else 1
+        return f"segment-{n:06d}.ndjson"
+
+    def _remove_segment(self, name: str) -> None:
+        path = self.segment_dir / name
+        path.unlink(missing_ok=True)
+        index_path(path).unlink(missing_ok=True)
+
+    # -- public API -------------------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, accession: str) -> bool:
+        base, version = split_version(accession)
+        e = self._entries.get(base)
+        return e is not None and e.version >= version
+
+    def append(self, records: Iterable[CanonicalGenomeRecord]) -> int:
+        """
+        Write new or newer-version records as a new segment.
+        Records already stored at the same or a higher version are skipped.
+        Returns the number of records written.
+        """
+        with self._lock:
+            fresh: dict[str, CanonicalGenomeRecord] = {}
+            for rec in records:
+                base, version = split_version(rec.accession)
+                current = self._entries.get(base)
+                if current is not None and current.version >= version:
+                    continue
+                prior = fresh.get(base)
+                if prior is not None and split_version(prior.accession)[1] >= version:
+                    continue
+                fresh[base] = rec
+
+            if not fresh:
+                return 0
+
+            segment = self._next_segment_name()
+            write_ndjson(fresh.values(), self.segment_dir / segment)
+
+            # The manifest is written after the segment, so a crash in between
+            # leaves an orphan segment that readers never look at.
+            new_entries = {
+                base: ManifestEntry(rec.accession, split_version(rec.accession)[1], segment)
+                for base, rec in fresh.items()
+            }
+            with self.manifest_path.open("a", encoding="utf-8") as f:
+                f.writelines(self._manifest_line(e) for e in new_entries.values())
+                f.flush()
+                os.fsync(f.fileno())
+            self._entries.update(new_entries)
+            return len(fresh)
+
+    def get(self, accession: str) -> CanonicalGenomeRecord | None:
+        """Latest stored record for an accession (versioned or not)."""
+        base, _ = split_version(accession)
+        e = self._entries.get(base)
+        if e is None:
+            return None
+        return get_record(self.segment_dir / e.segment, e.accession)
+
+    def iter_records(self) -> Iterator[CanonicalGenomeRecord]:
+        """Stream every live record (latest version of each accession) once."""
+        live = {(e.segment, e.accession) for e in self._entries.values()}
+        for segment in self.segments():
+            for rec in iter_ndjson(self.segment_dir / segment):
+                if (segment, rec.accession) in live:
+                    yield rec
+
+    def compact(self) -> int:
+        """
+        Merge all current segments into one, dropping superseded versions.
+
+        The merged segment is written without holding the lock; only the
+        manifest swap is locked, and entries that were updated by appends
+        during compaction keep pointing at their newer segment.
+        Returns the number of segments removed.
+        """
+        with self._lock:
+            old = self.segments()
+            if len(old) <= 1:
+                return 0
+            live = {
+                (e.segment, e.accession) for e in self._entries.values() if e.segment in old
+            }
+            target = self._next_segment_name()
+            # Reserve the name so concurrent appends pick the one after it.
+            (self.segment_dir / target).touch()
+
+        def merged() -> Iterator[CanonicalGenomeRecord]:
+            for segment in old:
+                for rec in iter_ndjson(self.segment_dir / segment):
+                    if (segment, rec.accession) in live:
+                        yield rec
+
+        write_ndjson(merged(), self.segment_dir / target)
+
+        with self._lock:
+            old_set = set(old)
+            for base, e in list(self._entries.items()):
+                if e.segment in old_set:
+                    self._entries[base] = ManifestEntry(e.accession, e.version, target)
+
+            tmp = self.manifest_path.with_suffix(".tmp")
+            with tmp.open("w", encoding="utf-8") as f:
+                f.writelines(self._manifest_line(e) for e in self._entries.values())
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.manifest_path)
+
+            for segment in old:
+                self._remove_segment(segment)
+        return len(old)
+
+    def compact_in_background(self) -> threading.Thread:
+        """Start `compact()` on a daemon thread and return it (join to wait)."""
+        t = threading.Thread(target=self.compact, name="segment-compaction", daemon=True)
+        t.start()
+        return t
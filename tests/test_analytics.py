@@ -140,3 +140,87 @@ def test_summarize_genomes_handles_empty_input(monkeypatch):
     # If analytics returns empty DF with no columns, that's acceptable for now.
     # If you update analytics to always include columns, this will still pass.
     # (We don't assert df["scorable"] here to avoid KeyError.)
+
+
+def test_summarize_genomes_rejects_low_quality_genomes_before_scoring(monkeypatch):
+    import ingest.analytics as analytics
+
+    scored = []
+
+    def fake_score_genome(rec):
+        scored.append(rec["accession"])
+        return {
+            "accession": rec["accession"],
+            "source": rec.get("source", "genbank"),
+            "num_mutations": 0,
+            "genes_affected": [],
+            "risk_score": 0.0,
+            "risk_level": "Low",
+            "risk_explanation": "No gene-attributed mutations detected.",
+        }
+
+    monkeypatch.setattr(analytics, "score_genome", fake_score_genome)
+
+    records = [
+        {"accession": "NC_045512", "source": "genbank", "sequence": "A" * 2000},
+        {"accession": "GOOD", "source": "genbank", "sequence": "A" * 2000},
+        {"accession": "MOSTLY_N", "source": "genbank", "sequence": "N" * 1800 + "A" * 200},
+    ]
+
+    df = analytics.summarize_genomes(records)
+
+    assert "MOSTLY_N" not in scored
+    row = df.loc[df["accession"] == "MOSTLY_N"].iloc[0]
+    assert bool(row["scorable"]) is False
+    assert row["skip_reason"].startswith("qc_failed")
+    assert row["qc_n_fraction"] == 0.9
+    assert row["qc_longest_n_run"] == 1800
+
+    good = df.loc[df["accession"] == "GOOD"].iloc[0]
+    assert bool(good["scorable"]) is True
+    assert good["qc_reference_coverage"] == 1.0
+
+
+def test_summarize_genomes_emits_per_gene_counts_and_spike_query():
+    from ingest.analytics import gene_columns, summarize_genomes, with_gene_mutations
+
+    ref = "A" * 25000
+    spike = ref[:21599] + "CC" + ref[21601:]  # two Spike SNPs (pos 21600-21601)
+    mixed = ref[:999] + "G" + spike[1000:]  # plus one ORF1ab SNP
+
+    df = summarize_genomes(
+        [
+            {"accession": "NC_045512.2", "sequence": ref},
+            {"accession": "SPIKE", "sequence": spike},
+            {"accession": "MIXED", "sequence": mixed},
+            {"accession": "SHORT", "sequence": "A" * 10},
+        ]
+    ).set_index("accession")
+
+    assert gene_columns(df) == ["mutations_ORF1ab", "mutations_S", "mutations_N"]
+    assert df["mutations_S"].dtype == "int32"
+    assert df.loc["MIXED", ["mutations_ORF1ab", "mutations_S"]].tolist() == [1, 2]
+    assert df.loc["SHORT", "mutations_S"] == 0
+
+    assert sorted(with_gene_mutations(df, "S", 2).index) == ["MIXED", "SPIKE"]
+    assert with_gene_mutations(df, "ORF1ab").index.tolist() == ["MIXED"]
+    assert with_gene_mutations(df, "E").empty
+
+
+def test_summarize_genomes_does_not_recanonicalize_normalized_records(monkeypatch):
+    import ingest.mutations as mutations
+    from ingest.analytics import summarize_genomes
+    from ingest.flatfile import normalize_genbank_minimal
+
+    ref = "ACGT" * 500
+    records = [
+        normalize_genbank_minimal({"accession": acc, "organism": "SARS-CoV-2", "sequence": seq})
+        for acc, seq in [("NC_045512.2", ref), ("A1", "t" + ref[1:].lower())]
+    ]
+    calls = []
+    monkeypatch.setattr(mutations, "canonicalize_sequence", lambda s: calls.append(s) or s)
+
+    df = summarize_genomes(records)
+
+    assert calls == []
+    assert df.set_index("accession").loc["A1", "num_mutations"] == 1
@@ -0,0 +1,36 @@
+from benchmarks.run import BENCHMARKS, compare, measure
+from benchmarks.synthetic import synthetic_genome, synthetic_reference
+
+
+def test_synthetic_genome_parameters():
+    ref = synthetic_reference(10_000)
+    assert len(ref) == 10_000 and set(ref) <= set("ACGT")
+
+    sample = synthetic_genome(ref, mutation_density=1e-2, seed=1)
+    assert sum(a != b for a, b in zip(ref, sample, strict=True)) == 100
+
+    gappy = synthetic_genome(ref, mutation_density=0, n_runs=1, n_run_length=300)
+    assert gappy.count("N") == 300 and "N" * 300 in gappy
+
+    assert len(synthetic_genome(ref, truncate=500)) == 9_500
+
+    assert synthetic_genome(ref, seed=3) == synthetic_genome(ref, seed=3)
+
+
+def test_every_benchmark_runs_at_small_scale(tmp_path, monkeypatch):
+    import tempfile
+
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    for bench in BENCHMARKS.values():
+        result = measure(bench, 50, repeat=1)
+        assert result["best_seconds"] >= 0
+    assert list(tmp_path.iterdir()) == []  # setup scratch directories are removed
+
+
+def test_compare_flags_slowdowns_beyond_tolerance():
+    baseline = {"results": [{"benchmark": "x", "scale": 10, "best_seconds": 1.0}]}
+    fast = [{"benchmark": "x", "scale": 10, "best_seconds": 1.1}]
+    slow = [{"benchmark": "x", "scale": 10, "best_seconds": 2.0}]
+
+    assert compare(fast, baseline) == []
+    assert compare(slow, baseline) == [("x@10", 2.0)]
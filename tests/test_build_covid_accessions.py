@@ -0,0 +1,113 @@
+"""
+Unit tests for scripts/build_covid_accessions.py against a local stub Entrez server.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+ALL_ACCESSIONS = [f"PX{i:06d}.1" for i in range(25)] + ["PX000003.1"]  # one duplicate
+
+
+class _StubEntrez(BaseHTTPRequestHandler):
+    requests: list = []
+
+    def do_GET(self):  # noqa: N802 (http.server API)
+        url = urlparse(self.path)
+        q = {k: v[0] for k, v in parse_qs(url.query).items()}
+        _StubEntrez.requests.append((url.path, q))
+
+        if url.path.endswith("/esearch.fcgi"):
+            assert q["usehistory"] == "y"
+            body = json.dumps(
+                {"esearchresult": {"count": str(len(ALL_ACCESSIONS)), "webenv": "WE1", "querykey": "1"}}
+            ).encode()
+            ctype = "application/json"
+        elif url.path.endswith("/efetch.fcgi"):
+            assert (q["WebEnv"], q["query_key"]) == ("WE1", "1")
+            start, size = int(q["retstart"]), int(q["retmax"])
+            body = "".join(a + "\n" for a in ALL_ACCESSIONS[start : start + size]).encode()
+            ctype = "text/plain"
+        else:
+            self.send_error(404)
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_entrez(monkeypatch):
+    from ingest import genbank
+
+    monkeypatch.setattr(genbank, "_rate_limit", lambda: None)
+    _StubEntrez.requests = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubEntrez)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/entrez/eutils"
+    server.shutdown()
+    server.server_close()
+
+
+def test_iter_accessions_pages_through_history_server(stub_entrez):
+    from scripts.build_covid_accessions import iter_accessions
+
+    out = list(iter_accessions("q", "x@example.com", limit=100, page_size=4, workers=3, base=stub_entrez))
+
+    assert out == [f"PX{i:06d}.1" for i in range(25)]
+    fetches = [q for path, q in _StubEntrez.requests if path.endswith("/efetch.fcgi")]
+    assert sorted(int(q["retstart"]) for q in fetches) == list(range(0, 26, 4))
+    assert all("id" not in q for q in fetches)
+
+
+def test_iter_accessions_respects_limit(stub_entrez):
+    from scripts.build_covid_accessions import iter_accessions
+
+    out = list(iter_accessions("q", "x@example.com", limit=6, page_size=4, base=stub_entrez))
+
+    assert out == [f"PX{i:06d}.1" for i in range(6)]
+
+
+def test_write_accessions_streams_to_file(tmp_path, stub_entrez):
+    from scripts.build_covid_accessions import iter_accessions, write_accessions
+
+    p = tmp_path / "acc.txt"
+    n = write_accessions(iter_accessions("q", "x@example.com", limit=10, page_size=3, base=stub_entrez), p)
+
+    assert n == 10
+    assert p.read_text().splitlines()[-1] == "PX000009.1"
+
+
+def test_iter_accessions_limit_counts_unique_accessions(monkeypatch, stub_entrez):
+    from scripts.build_covid_accessions import iter_accessions
+
+    monkeypatch.setitem(globals(), "ALL_ACCESSIONS", ["PX1.1", "PX2.1", "PX1.1", "PX3.1", "PX4.1", "PX5.1"])
+    out = list(iter_accessions("q", "x@example.com", limit=4, page_size=2, base=stub_entrez))
+
+    assert out == ["PX1.1", "PX2.1", "PX3.1", "PX4.1"]
+
+
+def test_write_accessions_keeps_previous_file_on_failure(tmp_path):
+    from scripts.build_covid_accessions import write_accessions
+
+    p = tmp_path / "acc.txt"
+    p.write_text("OLD.1\n")
+
+    def broken():
+        yield "PX000000.1"
+        raise OSError("connection reset")
+
+    with pytest.raises(OSError):
+        write_accessions(broken(), p)
+
+    assert p.read_text() == "OLD.1\n"
+    assert list(tmp_path.iterdir()) == [p]
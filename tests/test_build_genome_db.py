@@ -0,0 +1,90 @@
+"""
+scripts/build_genome_db.py: repeated loads only rescore what they write.
+"""
+import sys
+from datetime import date
+
+from ingest.db import GenomeDB
+from ingest.io import write_ndjson
+from ingest.models import CanonicalGenomeRecord
+
+REF = "A" * 22000
+
+
+def _rec(acc, country, d, sequence=REF):
+    return CanonicalGenomeRecord(
+        accession=acc,
+        organism="Severe acute respiratory syndrome coronavirus 2",
+        collection_date=d,
+        country=country,
+        region=None,
+        host="Homo sapiens",
+        sequence_length=len(sequence),
+        sequence=sequence,
+    )
+
+
+def _spike(n):
+    return REF[:21599] + "C" * n + REF[21599 + n :]
+
+
+def _run(monkeypatch, tmp_path, records, name):
+    import scripts.build_genome_db as script
+
+    ndjson = tmp_path / f"{name}.ndjson"
+    write_ndjson(records, ndjson)
+    monkeypatch.setattr(
+        sys, "argv",
+        ["build_genome_db", "--ndjson", str(ndjson), "--db", "genomes.sqlite", "--cube", "cube.parquet"],
+    )
+    script.main()
+
+
+def test_second_load_scores_and_indexes_only_new_records(monkeypatch, tmp_path):
+    import scripts.build_genome_db as script
+    from ingest.cube import SpaceTimeCube
+
+    monkeypatch.chdir(tmp_path)  # no reference registry -> diff against NC_045512.2
+    _run(monkeypatch, tmp_path, [_rec("NC_045512.2", None, None), _rec("USA1", "USA", date(2021, 3, 5), _spike(2))], "a")
+
+    seen = []
+    summarize = script.summarize_genomes
+
+    def spy(records, **kwargs):
+        records = list(records)
+        seen.extend(r.accession for r in records)
+        return summarize(records, **kwargs)
+
+    monkeypatch.setattr(script, "summarize_genomes", spy)
+    _run(monkeypatch, tmp_path, [_rec("IND1", "India", date(2021, 3, 9), _spike(1))], "b")
+
+    assert seen == ["NC_045512.2", "IND1"]  # the reference is only carried along
+    with GenomeDB("genomes.sqlite") as db:
+        assert db.scored_accessions() == {"NC_045512.2", "USA1", "IND1"}
+        assert {acc: len(ms) for acc, ms in db.iter_mutations()} == {"USA1": 2, "IND1": 1}
+    assert SpaceTimeCube.load("cube.parquet").genomes == 3
+
+
+def test_loads_add_their_genomes_to_the_similarity_index(monkeypatch, tmp_path):
+    from ingest.similarity import DEFAULT_PATH, MinHashIndex
+
+    monkeypatch.chdir(tmp_path)
+    _run(monkeypatch, tmp_path, [_rec("NC_045512.2", None, None), _rec("USA1", "USA", date(2021, 3, 5), _spike(2))], "a")
+    _run(monkeypatch, tmp_path, [_rec("IND1", "India", date(2021, 3, 9), _spike(1))], "b")
+
+    index = MinHashIndex.load(DEFAULT_PATH)
+    assert len(index) == 3
+    assert all(acc in index for acc in ("NC_045512.2", "USA1", "IND1"))
+    assert index.query([], k=1)[0][0] == "NC_045512.2"  # no mutations: the reference itself
+
+
+def test_loads_rebuild_the_mutation_index(monkeypatch, tmp_path):
+    from ingest.mutation_index import DEFAULT_PATH, MutationIndex
+
+    monkeypatch.chdir(tmp_path)
+    _run(monkeypatch, tmp_path, [_rec("NC_045512.2", None, None), _rec("USA1", "USA", date(2021, 3, 5), _spike(2))], "a")
+    _run(monkeypatch, tmp_path, [_rec("IND1", "India", date(2021, 3, 9), _spike(1))], "b")
+
+    index = MutationIndex.open(DEFAULT_PATH)
+    assert sorted(index.query("A21600C")) == ["IND1", "USA1"]
+    assert index.query("A21601C") == ["USA1"]
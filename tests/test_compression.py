@@ -0,0 +1,86 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from ingest.compression import detect_compression, iter_lines, open_binary, read_seek_table
+from ingest.fasta import iter_fasta
+from ingest.io import iter_ndjson, load_ndjson, write_ndjson
+from ingest.models import CanonicalGenomeRecord
+
+
+def _records(n: int) -> list[CanonicalGenomeRecord]:
+    return [
+        CanonicalGenomeRecord(
+            accession=f"A{i}",
+            organism="Virus",
+            collection_date=date(2021, 1, 1),
+            country="USA",
+            region=None,
+            host=None,
+            sequence_length=4,
+            sequence="ACGT",
+        )
+        for i in range(n)
+    ]
+
+
+@pytest.mark.parametrize("suffix", [".ndjson.gz", ".ndjson.xz"])
+def test_ndjson_round_trips_through_stdlib_codecs(tmp_path: Path, suffix):
+    p = tmp_path / f"genomes{suffix}"
+    write_ndjson(_records(5), p)
+
+    assert detect_compression(p) == ("gzip" if suffix.endswith("gz") else "xz")
+    assert [r.accession for r in load_ndjson(p)] == [f"A{i}" for i in range(5)]
+
+
+def test_compression_is_detected_from_magic_bytes_not_name(tmp_path: Path):
+    src = tmp_path / "genomes.ndjson.gz"
+    write_ndjson(_records(2), src)
+    misnamed = tmp_path / "genomes.ndjson"
+    misnamed.write_bytes(src.read_bytes())
+
+    assert [r.accession for r in load_ndjson(misnamed)] == ["A0", "A1"]
+
+
+def test_iter_ndjson_can_start_at_a_record_offset(tmp_path: Path):
+    p = tmp_path / "genomes.ndjson.gz"
+    write_ndjson(_records(10), p)
+
+    assert [r.accession for r in iter_ndjson(p, start=7)] == ["A7", "A8", "A9"]
+
+
+def test_fasta_reader_handles_gzip(tmp_path: Path):
+    p = tmp_path / "sequences.fasta.gz"
+    with open_binary(p, "wb") as f:
+        f.write(b">s1\nAC\nGT\n>s2\nTT\n")
+
+    assert list(iter_fasta(p, buffer_size=4)) == [("s1", "ACGT"), ("s2", "TT")]
+
+
+def test_zstd_output_is_seekable_and_starts_at_any_record(tmp_path: Path):
+    pytest.importorskip("zstandard")
+    p = tmp_path / "genomes.ndjson.zst"
+    write_ndjson(_records(25), p, frame_records=4, threads=2)
+
+    with p.open("rb") as f:
+        table = read_seek_table(f)
+    assert table is not None and len(table) == 7
+
+    assert len(load_ndjson(p)) == 25
+    for start in (0, 3, 4, 9, 24, 30):
+        got = [r.accession for r in iter_ndjson(p, start=start)]
+        assert got == [f"A{i}" for i in range(start, 25)]
+
+
+def test_appended_zstd_remains_readable(tmp_path: Path):
+    pytest.importorskip("zstandard")
+    p = tmp_path / "genomes.ndjson.zst"
+    write_ndjson(_records(3), p, frame_records=2)
+
+    with open_binary(p, "ab") as f:
+        f.write(b'{"accession": "LATE", "organism": "Virus"}\n')
+
+    lines = list(iter_lines(p))
+    assert len(lines) == 4
+    assert [r.accession for r in iter_ndjson(p, start=2)] == ["A2", "LATE"]
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from src.ingest.cube import SpaceTimeCube
+
+
+def _summary(rows):
+    return pd.DataFrame(
+        [
+            {
+                "accession": f"A{i}",
+                "date": d,
+                "country": country,
+                "region": region,
+                "risk_level": level,
+                "genes_affected": genes,
+                "risk_score": score,
+                "scorable": level != "N/A",
+            }
+            for i, (d, country, region, level, genes, score) in enumerate(rows)
+        ]
+    )
+
+
+ROWS = [
+    (date(2021, 3, 1), "USA", "California", "High", "S", 9.0),
+    (date(2021, 3, 3), "USA", "California", "High", "S", 7.0),  # same ISO week
+    ("2021-03-10", "USA", "Texas", "Low", "N", 1.0),
+    (date(2021, 3, 2), "India", None, "Moderate", "N, S", 4.0),
+    (None, "India", "Kerala", "N/A", "", 0.0),
+]
+
+
+def test_cube_collapses_genomes_into_cells():
+    cube = SpaceTimeCube.from_summary(_summary(ROWS))
+
+    assert len(cube) == 4
+    assert cube.genomes == 5
+    total = cube.rollup().iloc[0]
+    assert (total["count"], total["scored"], total["risk_sum"]) == (5, 4, 21.0)
+    assert total["risk_mean"] == pytest.approx(21.0 / 4)
+
+
+def test_rollup_and_drilldown():
+    cube = SpaceTimeCube.from_summary(_summary(ROWS))
+
+    weekly = cube.rollup("week", "risk_level", country="USA")
+    assert weekly[["week", "risk_level", "count"]].values.tolist() == [
+        [date(2021, 3, 1), "High", 2],
+        [date(2021, 3, 8), "Low", 1],
+    ]
+
+    by_region = cube.drilldown("region", country="USA").set_index("region")
+    assert by_region.loc["California", "risk_mean"] == 8.0
+    assert by_region.loc["Texas", "count"] == 1
+
+    india = cube.rollup("country", country=["India"]).iloc[0]
+    assert (india["count"], india["scored"]) == (2, 1)
+
+    with pytest.raises(KeyError):
+        cube.rollup("lineage")
+
+
+def test_incremental_update_matches_full_rebuild(tmp_path):
+    path = tmp_path / "cube.parquet"
+    assert len(SpaceTimeCube.load(path)) == 0
+
+    cube = SpaceTimeCube.load(path).update(_summary(ROWS[:2]))
+    cube.save(path)
+    cube = SpaceTimeCube.load(path).update(_summary(ROWS[2:]))
+    cube.save(path)
+
+    full = SpaceTimeCube.from_summary(_summary(ROWS))
+    loaded = SpaceTimeCube.load(path)
+    for dims in [("week",), ("country", "region"), ("risk_level", "genes"), ()]:
+        pd.testing.assert_frame_equal(
+            loaded.rollup(*dims).reset_index(drop=True),
+            full.rollup(*dims).reset_index(drop=True),
+            check_dtype=False,
+        )
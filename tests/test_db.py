@@ -0,0 +1,136 @@
+from datetime import date
+
+import pytest
+
+from src.ingest.analytics import summarize_genomes
+from src.ingest.db import GenomeDB
+from src.ingest.models import CanonicalGenomeRecord
+from src.ingest.mutations import Mutation, diff_sequences
+
+REF = "A" * 22000
+
+
+def _rec(acc, country, d, sequence=REF):
+    return CanonicalGenomeRecord(
+        accession=acc,
+        organism="Severe acute respiratory syndrome coronavirus 2",
+        collection_date=d,
+        country=country,
+        region=None,
+        host="Homo sapiens",
+        sequence_length=len(sequence),
+        sequence=sequence,
+    )
+
+
+def _spike(n):
+    # n Spike SNPs starting at 21600
+    return REF[:21599] + "C" * n + REF[21599 + n :]
+
+
+RECORDS = [
+    _rec("NC_045512.2", None, None),
+    _rec("USA1", "USA", date(2021, 3, 5), _spike(2)),
+    _rec("USA2", "USA", date(2021, 4, 2), _spike(1)),
+    _rec("USA3", "USA", date(2021, 3, 20)),
+    _rec("IND1", "India", date(2021, 3, 9), _spike(1)),
+]
+
+
+@pytest.fixture
+def db():
+    with GenomeDB(":memory:", batch_size=2) as db:
+        db.insert_records(RECORDS)
+        db.index_mutations(RECORDS, lambda r: diff_sequences(REF, r.sequence))
+        yield db
+
+
+def _accessions(records):
+    return [r.accession for r in records]
+
+
+def test_records_round_trip_and_upsert(db):
+    assert len(db) == 5
+    assert db.get("USA1") == RECORDS[1]
+    assert db.get("missing") is None
+    assert db.countries() == ["India", "USA"]
+
+    db.insert_records([_rec("USA1", "Canada", date(2021, 3, 5), _spike(2))])
+    assert len(db) == 5
+    assert db.get("USA1").country == "Canada"
+    # Updating a record keeps its mutations.
+    assert _accessions(db.select_records(gene="S")) == ["IND1", "USA1", "USA2"]
+
+
+def test_filters_combine_as_sql(db):
+    march = {"since": date(2021, 3, 1), "until": date(2021, 3, 31)}
+    assert _accessions(db.select_records(country="USA", **march)) == ["USA1", "USA3"]
+    assert _accessions(db.select_records(country="USA", gene="S", **march)) == ["USA1"]
+    assert _accessions(db.select_records(gene="S", min_gene_mutations=2)) == ["USA1"]
+    assert _accessions(db.select_records(mutation=(21600, "C"))) == ["IND1", "USA1", "USA2"]
+    assert _accessions(db.select_records(mutation=(21601, "G"))) == []
+
+
+def test_queries_use_indexes(db):
+    plan = db.query_plan(country="USA", since=date(2021, 3, 1), mutation=(21600, "C"))
+    assert "records_country_date" in plan
+    assert "mutations_pos_alt" in plan
+    assert "SCAN r" not in plan
+
+
+def test_reindexing_replaces_mutations(db):
+    db.index_mutations([RECORDS[1]], lambda r: [Mutation(pos=1, ref="A", alt="T", gene=None)])
+    assert _accessions(db.select_records(mutation=(1, "T"))) == ["USA1"]
+    assert "USA1" not in _accessions(db.select_records(gene="S"))
+
+
+def test_summary_scores_round_trip_with_filters(db):
+    summary = summarize_genomes(db.select_records())
+    assert db.scored_accessions() == set()
+    assert db.insert_summary(summary) == 5
+    assert db.scored_accessions() == set(summary["accession"])
+
+    qc = db.get_qc("USA1")
+    assert qc.reference_differences == 2 and qc.reference_coverage == 1.0
+    assert db.get_qc("missing") is None
+
+    df = db.summary_frame(country="USA")
+    assert df["accession"].tolist() == ["USA1", "USA2", "USA3"]
+    expected = summary.set_index("accession").loc[df["accession"]]
+    assert df["risk_score"].tolist() == expected["risk_score"].tolist()
+    assert df["scorable"].dtype == bool
+    assert df["qc_reference_differences"].tolist() == expected["qc_reference_differences"].tolist()
+
+    high = _accessions(db.select_records(risk_level=df.loc[0, "risk_level"]))
+    assert "USA1" in high
+
+
+def test_file_database_persists(tmp_path):
+    path = tmp_path / "db" / "genomes.sqlite"
+    with GenomeDB(path) as db:
+        db.insert_records(RECORDS[:2])
+    with GenomeDB(path) as db:
+        assert _accessions(db.select_records()) == ["NC_045512.2", "USA1"]
+
+
+def test_unknown_filter_is_rejected(db):
+    with pytest.raises(TypeError):
+        list(db.select_records(lineage="B.1.1.7"))
+
+
+
+def test_missing_summary_text_is_stored_as_null(db):
+    import pandas as pd
+
+    summary = summarize_genomes(db.select_records())
+    summary["skip_reason"] = summary["skip_reason"].astype(object)
+    summary.loc[0, "skip_reason"] = float("nan")
+    summary["risk_explanation"] = None
+    db.insert_summary(summary)
+
+    acc = summary.loc[0, "accession"]
+    row = db.conn.execute(
+        "SELECT typeof(skip_reason), typeof(risk_explanation) FROM scores WHERE accession = ?", (acc,)
+    ).fetchone()
+    assert tuple(row) == ("null", "null")
+    assert pd.isna(db.summary_frame().set_index("accession").loc[acc, "skip_reason"])
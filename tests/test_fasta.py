@@ -0,0 +1,78 @@
+from datetime import date
+from pathlib import Path
+
+import pytest
+
+from ingest.fasta import MetadataIndex, iter_fasta, iter_fasta_records
+
+FASTA = (
+    ">hCoV-19/USA/IL-1/2021 extra words\n"
+    "ACGTACGTAC\n"
+    "GTACGT\n"
+    ">hCoV-19/UK/X-2/2021\r\n"
+    "NNNNACGT\r\n"
+    ">no-metadata\n"
+    "AC GT\n"
+)
+
+METADATA = (
+    "strain\tgenbank_accession\tdate\tcountry\tdivision\thost\n"
+    "hCoV-19/UK/X-2/2021\t?\t2021-02\tUnited Kingdom\t?\tHuman\n"
+    "hCoV-19/USA/IL-1/2021\tMW000001.1\t2021-01-15\tUSA\tIllinois\tHuman\n"
+)
+
+
+@pytest.fixture
+def export(tmp_path: Path) -> tuple[Path, Path]:
+    fasta = tmp_path / "sequences.fasta"
+    meta = tmp_path / "metadata.tsv"
+    fasta.write_bytes(FASTA.encode("utf-8"))
+    meta.write_text(METADATA, encoding="utf-8")
+    return fasta, meta
+
+
+@pytest.mark.parametrize("buffer_size", [3, 7, 1 << 20])
+def test_iter_fasta_is_independent_of_buffer_size(export, buffer_size):
+    fasta, _ = export
+
+    out = list(iter_fasta(fasta, buffer_size=buffer_size))
+
+    assert out == [
+        ("hCoV-19/USA/IL-1/2021 extra words", "ACGTACGTACGTACGT"),
+        ("hCoV-19/UK/X-2/2021", "NNNNACGT"),
+        ("no-metadata", "ACGT"),
+    ]
+
+
+def test_metadata_index_looks_up_rows_by_key(export):
+    _, meta = export
+    index = MetadataIndex(meta)
+
+    row = index.get("hCoV-19/USA/IL-1/2021")
+    index.close()
+
+    assert len(index) == 2
+    assert row["genbank_accession"] == "MW000001.1"
+    assert index.get("missing") is None
+
+
+def test_iter_fasta_records_joins_metadata_through_normalizer(export):
+    fasta, meta = export
+
+    recs = list(iter_fasta_records(fasta, meta, buffer_size=5))
+
+    assert [r.accession for r in recs] == ["MW000001.1", "hCoV-19/UK/X-2/2021", "no-metadata"]
+
+    us = recs[0]
+    assert us.collection_date == date(2021, 1, 15)
+    assert (us.country, us.region) == ("USA", "Illinois")
+    assert us.host == "Human"
+    assert us.sequence_length == 16
+    assert us.source == "fasta"
+
+    uk = recs[1]
+    assert (uk.country, uk.region) == ("United Kingdom", None)
+    assert uk.collection_date == date(2021, 2, 1)
+
+    assert recs[2].country is None
+    assert recs[2].organism == "Severe acute respiratory syndrome coronavirus 2"
@@ -0,0 +1,84 @@
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from ingest.forecast import ForecastCache, fit_growth, weekly_counts
+
+
+def _records(country: str, rate: float, weeks: int = 12, per_week: int = 200):
+    """Deterministic counts where label B grows at `rate` logits/week vs. A."""
+    start = date(2021, 1, 4)
+    recs = []
+    for w in range(weeks):
+        p_b = 1.0 / (1.0 + np.exp(-(rate * (w - weeks / 2))))
+        n_b = int(round(per_week * p_b))
+        d = start + timedelta(weeks=w)
+        recs += [{"collection_date": d, "country": country, "lineage": "B"}] * n_b
+        recs += [{"collection_date": d, "country": country, "lineage": "A"}] * (per_week - n_b)
+    return recs
+
+
+def test_weekly_counts_bins_by_monday_and_skips_incomplete_records():
+    recs = [
+        {"collection_date": "2021-01-06", "country": "USA", "lineage": "A"},
+        {"collection_date": date(2021, 1, 10), "country": "USA", "lineage": "B"},
+        {"collection_date": None, "country": "USA", "lineage": "A"},
+        {"collection_date": "2021-01-06", "country": None, "lineage": "A"},
+    ]
+
+    counts = weekly_counts(recs, label="lineage")
+
+    assert list(counts.columns) == ["A", "B"]
+    assert counts.loc[("USA", date(2021, 1, 4))].tolist() == [1, 1]
+
+
+def test_fit_growth_recovers_growth_rate_for_every_region():
+    counts = weekly_counts(_records("USA", 0.5) + _records("UK", -0.3), label="lineage")
+
+    rates = fit_growth(counts).growth_rates().set_index(["region", "label"])["growth_rate_per_week"]
+
+    assert rates[("USA", "B")] == pytest.approx(0.5, abs=0.02)
+    assert rates[("UK", "B")] == pytest.approx(-0.3, abs=0.02)
+    assert rates[("USA", "A")] == 0.0
+
+
+def test_forecast_extends_trend():
+    fit = fit_growth(weekly_counts(_records("USA", 0.5), label="lineage"))
+
+    fc = fit.forecast(date(2021, 3, 22), horizon_weeks=2)
+
+    assert len(fc) == 2
+    assert np.allclose(fc.sum(axis=1), 1.0)
+    assert fc["B"].iloc[1] > fc["B"].iloc[0] > 0.9
+
+
+def test_forecast_cache_refits_only_changed_regions():
+    cache = ForecastCache()
+    usa, uk = _records("USA", 0.5), _records("UK", -0.3)
+
+    first = cache.fit(weekly_counts(usa + uk, label="lineage"))
+    assert sorted(cache.last_refit) == ["UK", "USA"]
+
+    extra = [{"collection_date": date(2021, 1, 4), "country": "UK", "lineage": "B"}]
+    second = cache.fit(weekly_counts(usa + uk + extra, label="lineage"))
+
+    assert cache.last_refit == ["UK"]
+    usa_first = first.slope[first.regions.index("USA")]
+    usa_second = second.slope[second.regions.index("USA")]
+    assert np.array_equal(usa_first, usa_second)
+
+
+def test_weekly_counts_takes_a_label_function_for_canonical_records():
+    from ingest.models import CanonicalGenomeRecord
+
+    def rec(d, seq):
+        return CanonicalGenomeRecord(
+            accession=seq, organism="x", collection_date=d, country="USA",
+            region=None, host=None, sequence_length=len(seq), sequence=seq,
+        )
+
+    recs = [rec(date(2021, 1, 5), "ACGT"), rec(date(2021, 1, 6), "ACGA"), rec(date(2021, 1, 7), "ACGT")]
+    counts = weekly_counts(recs, label=lambda r: "T" if r.sequence.endswith("T") else "other")
+
+    assert counts.loc[("USA", date(2021, 1, 4))].to_dict() == {"T": 2, "other": 1}
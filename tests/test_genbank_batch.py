@@ -73,4 +73,23 @@ def test_fetch_and_normalize_many_chains_both(monkeypatch):
 
     out = fetch_and_normalize_many(["A1"], email="x@example.com")
 
-    assert out == ["NORMALIZED"]
\ No newline at end of file
+    assert out == ["NORMALIZED"]
+
+
+def test_iter_fetch_and_normalize_streams_one_record_at_a_time(monkeypatch):
+    from src.ingest import genbank
+
+    fetched = []
+
+    def fake_fetch_one(accession: str, email: str):
+        fetched.append(accession)
+        return {"accession": accession, "organism": "Test", "sequence": "ACGT"}
+
+    monkeypatch.setattr(genbank, "fetch_genbank_minimal", fake_fetch_one)
+
+    stream = genbank.iter_fetch_and_normalize(["A1", "A2"], email="x@example.com")
+
+    first = next(stream)
+    assert first.accession == "A1"
+    assert fetched == ["A1"]
+    assert [r.accession for r in stream] == ["A2"]
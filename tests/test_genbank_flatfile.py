@@ -0,0 +1,53 @@
+"""
+Unit tests for the lightweight GenBank flatfile parser.
+"""
+from pathlib import Path
+
+import pytest
+
+from ingest import genbank
+from ingest.genbank import parse_genbank_minimal, parse_genbank_minimal_seqio
+
+FIXTURES = sorted((Path(__file__).parent / "fixtures" / "genbank").glob("*.gb"))
+
+
+@pytest.mark.parametrize("path", FIXTURES, ids=lambda p: p.stem)
+def test_fast_parser_matches_seqio_on_fixture_corpus(path: Path):
+    text = path.read_text(encoding="utf-8")
+
+    assert parse_genbank_minimal(text, path.stem) == parse_genbank_minimal_seqio(text, path.stem)
+
+
+def test_fast_parser_extracts_source_qualifiers():
+    text = (Path(__file__).parent / "fixtures" / "genbank" / "MW000001.gb").read_text()
+
+    out = parse_genbank_minimal(text, "MW000001.1")
+
+    assert out["organism"] == "Severe acute respiratory syndrome coronavirus 2"
+    assert out["collection_date"] == "2020-12-14"
+    # Wrapped qualifier lines are joined; later features are ignored.
+    assert out["location"] == "USA: Illinois, Cook County"
+    assert out["host"] == "Homo sapiens"
+    assert out["sequence"].startswith("ATTAAAGGTT")
+    assert len(out["sequence"]) == 120
+
+
+def test_fast_parser_reads_geo_loc_name_when_country_is_absent():
+    text = (Path(__file__).parent / "fixtures" / "genbank" / "PP000001.gb").read_text()
+
+    assert parse_genbank_minimal(text, "PP000001.1")["location"] == "USA: Illinois, Cook County"
+
+
+def test_fetch_genbank_minimal_uses_flatfile_parser(monkeypatch):
+    import io
+
+    text = (Path(__file__).parent / "fixtures" / "genbank" / "OK091006.gb").read_text()
+
+    monkeypatch.setattr(genbank, "_rate_limit", lambda: None)
+    monkeypatch.setattr(genbank.Entrez, "efetch", lambda **kwargs: io.StringIO(text))
+
+    out = genbank.fetch_genbank_minimal("OK091006.1", email="x@example.com")
+
+    assert out["accession"] == "OK091006.1"
+    assert out["location"] == "United Kingdom"
+    assert out["sequence"].startswith("NNNNNACGTA")
@@ -12,3 +12,11 @@ def test_gene_for_position_orf1ab():
 def test_gene_for_position_n():
     # N gene: 28274–29533 (SARS-CoV-2 reference)
     assert gene_for_position(28274) == "N"
+
+
+def test_gene_map_matches_sars_cov_2_lookup():
+    from src.ingest.genes import SARS_COV_2_GENES, GeneMap
+
+    genes = GeneMap(SARS_COV_2_GENES)
+    for pos in (1, 265, 266, 21555, 21556, 21563, 25384, 25385, 28274, 29533, 29534):
+        assert genes(pos) == gene_for_position(pos)
@@ -0,0 +1,87 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from src.ingest.analytics import summarize_genomes
+from src.ingest.geocode import Gazetteer, GridIndex, haversine_km, normalize_name
+
+
+@pytest.fixture(scope="module")
+def gazetteer():
+    return Gazetteer(Path(__file__).parents[1] / "data" / "gazetteer")
+
+
+def test_normalize_name_folds_case_accents_and_punctuation():
+    assert normalize_name("  São-Paulo ") == "sao paulo"
+    assert normalize_name("U.S.A.") == "u s a"
+    assert normalize_name(None) == ""
+
+
+def test_lookup_uses_aliases_regions_and_country_fallback(gazetteer):
+    usa = gazetteer.lookup("USA")
+    assert gazetteer.lookup("United States of America") == usa
+    assert gazetteer.lookup("USA", "Atlantis") == usa  # unknown region -> country centroid
+
+    ca = gazetteer.lookup("USA", "CA, San Diego County")
+    assert ca == gazetteer.lookup("usa", "California") != usa
+    assert gazetteer.lookup("Georgia") != gazetteer.lookup("USA", "Georgia")
+    assert gazetteer.lookup("Nowhere") is None
+    assert gazetteer.lookup(None) is None
+
+
+def test_bulk_geocode_returns_float32_with_nan_for_misses(gazetteer):
+    lat, lon = gazetteer.geocode(["Japan", "Nowhere", "UK"], [None, None, "Scotland"])
+    assert lat.dtype == np.float32
+    assert np.isnan(lat[1]) and not np.isnan(lat[0])
+    assert (lat[2], lon[2]) == pytest.approx(gazetteer.lookup("United Kingdom", "Scotland"))
+
+
+def test_grid_index_bbox_and_nearest_match_brute_force():
+    rng = np.random.default_rng(0)
+    lats = rng.uniform(-80, 80, 5000)
+    lons = rng.uniform(-179, 179, 5000)
+    lats[7] = np.nan
+    grid = GridIndex(lats, lons, cell_deg=5.0)
+
+    got = grid.bbox(10, -20, 35.5, 40)
+    want = np.flatnonzero((lats >= 10) & (lats <= 35.5) & (lons >= -20) & (lons <= 40))
+    assert got.tolist() == want.tolist()
+
+    for lat, lon in [(0.0, 0.0), (51.5, -0.1), (-33.9, 151.2), (79.0, 170.0)]:
+        dist = haversine_km(lat, lon, lats, lons)
+        i, km = grid.nearest(lat, lon)
+        assert i == int(np.nanargmin(dist))
+        assert km == pytest.approx(float(np.nanmin(dist)))
+
+    assert GridIndex([], []).nearest(0, 0) is None
+
+
+def test_nearest_wraps_around_the_antimeridian():
+    grid = GridIndex([0.0, 0.0], [170.0, -179.9], cell_deg=1.0)
+
+    i, km = grid.nearest(0.0, 179.9)
+    assert i == 1
+    assert km == pytest.approx(haversine_km(0.0, 179.9, 0.0, -179.9))
+
+    rng = np.random.default_rng(1)
+    lats, lons = rng.uniform(-60, 60, 300), rng.uniform(-180, 180, 300)
+    grid = GridIndex(lats, lons, cell_deg=7.0)  # 360 / 7 leaves a narrow last column
+    for lon in (-179.95, 179.95, 178.0):
+        assert grid.nearest(5.0, lon)[0] == int(np.argmin(haversine_km(5.0, lon, lats, lons)))
+
+
+def test_nearest_region_from_gazetteer_points(gazetteer):
+    keys, lats, lons = gazetteer.points()
+    i, _ = GridIndex(lats, lons).nearest(30.6, 114.3)  # Wuhan
+    assert keys[i] == ("china", "wuhan")
+
+
+def test_summarize_genomes_geocodes_records_without_coordinates(gazetteer):
+    df = summarize_genomes(
+        [{"accession": "A1", "sequence": "", "country": "India", "region": "Kerala"},
+         {"accession": "A2", "sequence": "", "lat": 1.0, "lon": 2.0, "country": "India"}],
+        gazetteer=gazetteer,
+    )
+    assert (df.loc[0, "lat"], df.loc[0, "lon"]) == gazetteer.lookup("India", "Kerala")
+    assert (df.loc[1, "lat"], df.loc[1, "lon"]) == (1.0, 2.0)
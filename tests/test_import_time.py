@@ -0,0 +1,13 @@
+"""
+Import-time budget: network-free modules must not pull in Biopython or
+pandas (and the pure-Python paths not even NumPy) when they are imported.
+"""
+import pytest
+
+from benchmarks.bench_import_time import BUDGETS, check
+
+
+@pytest.mark.parametrize("budget", BUDGETS, ids=lambda b: b.module)
+def test_import_stays_within_budget(budget):
+    _, _, problems = check(budget)
+    assert problems == []
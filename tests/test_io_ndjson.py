@@ -17,3 +17,140 @@ def test_load_ndjson_reads_records(tmp_path: Path):
     assert len(records) == 2
     assert records[0].accession == "A1"
     assert records[1].accession == "A2"
+
+
+def _rec(accession: str, sequence: str = "ACGT"):
+    from src.ingest.models import CanonicalGenomeRecord
+
+    return CanonicalGenomeRecord(
+        accession=accession,
+        organism="Virus",
+        collection_date=None,
+        country="USA",
+        region=None,
+        host=None,
+        sequence_length=len(sequence),
+        sequence=sequence,
+    )
+
+
+def test_write_ndjson_emits_index_and_get_record_seeks_to_it(tmp_path: Path):
+    from src.ingest.io import get_record, index_path, write_ndjson
+
+    p = tmp_path / "genomes.ndjson"
+    write_ndjson([_rec(f"A{i}", "ACGT" * i) for i in range(1, 50)], p)
+
+    assert index_path(p).exists()
+    rec = get_record(p, "A17")
+    assert rec.accession == "A17"
+    assert rec.sequence == "ACGT" * 17
+    assert get_record(p, "A1").sequence == "ACGT"
+    assert get_record(p, "missing") is None
+
+
+def test_get_record_rebuilds_stale_index_after_append(tmp_path: Path):
+    from src.ingest.io import get_record, write_ndjson
+
+    p = tmp_path / "genomes.ndjson"
+    write_ndjson([_rec("A1")], p)
+
+    with p.open("a", encoding="utf-8") as f:
+        f.write('{"accession": "B2", "organism": "Virus", "sequence": "TTTT"}\n')
+
+    assert get_record(p, "B2").sequence == "TTTT"
+    assert get_record(p, "A1").accession == "A1"
+
+
+def test_get_record_builds_missing_index(tmp_path: Path):
+    from src.ingest.io import get_record, index_path, write_ndjson
+
+    p = tmp_path / "genomes.ndjson"
+    write_ndjson([_rec("A1"), _rec("A2", "GG")], p)
+    index_path(p).unlink()
+
+    assert get_record(p, "A2").sequence == "GG"
+    assert index_path(p).exists()
+
+
+def test_append_ndjson_repairs_torn_line_and_resumes(tmp_path: Path):
+    from src.ingest.io import append_ndjson, load_ndjson, read_accessions
+
+    p = tmp_path / "genomes.ndjson"
+    append_ndjson([_rec("A1"), _rec("A2")], p)
+    with p.open("a", encoding="utf-8") as f:
+        f.write('{"accession": "A3", "orga')  # crash mid-write
+
+    assert read_accessions(p) == {"A1", "A2"}
+
+    append_ndjson([_rec("A3")], p)
+    assert [r.accession for r in load_ndjson(p)] == ["A1", "A2", "A3"]
+
+
+def test_read_accession_file_skips_comments_and_duplicates(tmp_path: Path):
+    from src.ingest.io import read_accession_file
+
+    p = tmp_path / "acc.txt"
+    p.write_text("# header\nA1\n\nA2  # note\nA1\n", encoding="utf-8")
+
+    assert read_accession_file(p) == ["A1", "A2"]
+
+
+def test_dumps_record_matches_stdlib_format():
+    import json
+    from dataclasses import replace
+    from datetime import date
+
+    from src.ingest.fastjson import dumps_record
+
+    base = _rec("A1", "ACGTN" * 100)
+    for rec in (
+        base,
+        replace(base, collection_date=date(2021, 3, 4), normalized=True),
+        replace(base, region="São Paulo", host='a "quoted"\tname\x7f', country=None),
+    ):
+        assert dumps_record(rec) == json.dumps(rec.__dict__, default=str)
+
+
+def test_fastjson_loads_falls_back_for_stdlib_only_json():
+    import math
+
+    from src.ingest.fastjson import loads
+
+    assert loads(b'{"a": 1}') == {"a": 1}
+    assert math.isnan(loads('{"x": NaN}')["x"])
+
+
+def test_write_ndjson_parallel_is_byte_identical(tmp_path: Path):
+    from src.ingest.io import index_path, load_ndjson, write_ndjson, write_ndjson_parallel
+
+    records = [_rec(f"A{i}", "ACGT" * (i + 1)) for i in range(25)]
+    serial = tmp_path / "serial.ndjson"
+    parallel = tmp_path / "parallel.ndjson"
+
+    write_ndjson(records, serial)
+    write_ndjson_parallel(iter(records), parallel, workers=2, chunk_size=4)
+
+    assert parallel.read_bytes() == serial.read_bytes()
+    # Index entries match too (the header differs only by mtime).
+    assert index_path(parallel).read_bytes()[32:] == index_path(serial).read_bytes()[32:]
+    assert load_ndjson(parallel) == records
+
+
+def test_normalize_many_genbank_minimal_with_workers_preserves_order():
+    from src.ingest.flatfile import normalize_many_genbank_minimal
+
+    raws = [{"accession": f"A{i}", "organism": "X", "sequence": "acgt"} for i in range(10)]
+
+    assert normalize_many_genbank_minimal(raws, workers=2, chunk_size=3) == normalize_many_genbank_minimal(raws)
+
+
+def test_dumps_record_without_orjson(monkeypatch):
+    import json
+
+    from src.ingest import fastjson
+
+    monkeypatch.setattr(fastjson, "orjson", None)
+    rec = _rec("A1", "ACGT")
+
+    assert fastjson.dumps_record(rec) == json.dumps(rec.__dict__, default=str)
+    assert fastjson.loads('{"a": 1}') == {"a": 1}
@@ -0,0 +1,93 @@
+import json
+
+import pytest
+
+from ingest import metrics
+from ingest.analytics import summarize_genomes
+
+
+@pytest.fixture
+def enabled_metrics():
+    metrics.reset()
+    metrics.enable()
+    yield metrics
+    metrics.enable(False)
+    metrics.reset()
+
+
+def test_disabled_metrics_record_nothing():
+    metrics.reset()
+    metrics.enable(False)
+    metrics.count("x")
+    metrics.observe("y", 3)
+    with metrics.stage("z"):
+        pass
+    assert metrics.snapshot() == {"counters": {}, "gauges": {}, "histograms": {}}
+
+
+def test_histogram_buckets_are_cumulative(enabled_metrics):
+    for v in (0, 1, 3, 3, 10_000):
+        metrics.observe("mutations", v)
+
+    h = metrics.snapshot()["histograms"]["mutations"]
+    assert h["count"] == 5 and h["sum"] == 10_007
+    assert h["buckets"]["0"] == 1
+    assert h["buckets"]["5"] == 4
+    assert h["buckets"]["+Inf"] == 5
+
+
+def test_summarize_genomes_reports_stage_timings(enabled_metrics):
+    ref = "ACGT" * 300
+    sample = ref[:299] + "A" + ref[300:]
+    summarize_genomes(
+        [
+            {"accession": "NC_045512.2", "sequence": ref},
+            {"accession": "S1", "sequence": sample},
+            {"accession": "S2", "sequence": "ACGT"},
+        ]
+    )
+
+    snap = metrics.snapshot()
+    assert snap["counters"]["analytics.records"] == 3
+    assert snap["counters"]["analytics.records_skipped"] == 1
+    assert snap["gauges"]["analytics.records_per_second"] > 0
+    for name in ("analytics.qc", "analytics.score", "mutations.diff", "scoring.compute_risk"):
+        assert snap["histograms"][f"{name}.seconds"]["count"] >= 2
+    assert snap["histograms"]["mutations.per_genome"]["sum"] == 1
+
+
+def test_exports(enabled_metrics, tmp_path):
+    metrics.count("io.records_read", 2)
+    metrics.gauge("analytics.records_per_second", 5.0)
+    with metrics.stage("analytics.qc"):
+        pass
+
+    prom = metrics.to_prometheus()
+    assert "# TYPE pea_io_records_read_total counter\npea_io_records_read_total 2" in prom
+    assert "pea_analytics_records_per_second 5.0" in prom
+    assert 'pea_analytics_qc_seconds_bucket{le="+Inf"} 1' in prom
+    assert "pea_analytics_qc_seconds_count 1" in prom
+
+    metrics.write(tmp_path / "m.json")
+    assert json.loads((tmp_path / "m.json").read_text())["counters"] == {"io.records_read": 2}
+    metrics.write(tmp_path / "m.prom")
+    assert (tmp_path / "m.prom").read_text() == prom
+
+
+def test_cli_instrumentation_writes_profile_and_metrics(tmp_path, capsys):
+    import argparse
+    import pstats
+
+    p = argparse.ArgumentParser()
+    metrics.add_cli_arguments(p)
+    args = p.parse_args(["--profile", str(tmp_path / "run.prof"), "--metrics", str(tmp_path / "m.json")])
+    try:
+        with metrics.cli_instrumentation(args):
+            metrics.count("work")
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+
+    assert pstats.Stats(str(tmp_path / "run.prof")).total_calls > 0
+    assert json.loads((tmp_path / "m.json").read_text())["counters"] == {"work": 1}
+    assert "cumulative" in capsys.readouterr().err
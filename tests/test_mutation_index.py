@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+
+from src.ingest.db import GenomeDB
+from src.ingest.models import CanonicalGenomeRecord
+from src.ingest.mutation_index import (
+    MutationIndex,
+    build_mutation_index,
+    decode_postings,
+    encode_postings,
+)
+from src.ingest.mutations import Mutation, diff_sequences
+
+
+def _m(token):
+    return Mutation(pos=int(token[1:-1]), ref=token[0], alt=token[-1])
+
+
+CALLS = [
+    ("G1", [_m("A23063T"), _m("G23012A")]),  # N501Y + E484K
+    ("G2", [_m("A23063T")]),
+    ("G3", [_m("G23012A"), _m("A23403G")]),
+    ("G4", []),
+    ("G5", [_m("A23063T"), _m("A23403G"), _m("C1T")]),
+]
+
+
+@pytest.fixture
+def index(tmp_path):
+    return MutationIndex.open(build_mutation_index(CALLS, tmp_path / "idx"))
+
+
+def test_varint_round_trip_across_byte_widths():
+    ids = np.array([0, 1, 127, 128, 300, 16_384, 2_000_000, 2**32 - 1], dtype=np.uint32)
+    blob = encode_postings(ids)
+    assert len(blob) < ids.nbytes
+    assert decode_postings(np.frombuffer(blob, dtype=np.uint8)).tolist() == ids.tolist()
+    assert decode_postings(np.frombuffer(encode_postings(np.array([], np.uint32)), np.uint8)).size == 0
+
+
+def test_single_terms_and_aliases(index):
+    assert len(index) == 5
+    assert index.query("A23063T") == ["G1", "G2", "G5"]
+    assert index.query("S:N501Y") == index.query("a23063t")
+    assert index.query("T1C") == []
+    assert isinstance(index.keys, np.memmap)
+
+
+def test_boolean_queries(index):
+    assert index.query("S:E484K AND S:N501Y") == ["G1"]
+    assert index.query("S:E484K OR S:D614G") == ["G1", "G3", "G5"]
+    # AND binds tighter than OR
+    assert index.query("S:D614G OR S:E484K AND S:N501Y") == ["G1", "G3", "G5"]
+    assert index.query("(S:D614G OR S:E484K) AND S:N501Y") == ["G1", "G5"]
+
+
+@pytest.mark.parametrize("bad", ["", "S:E484K AND", "(A23063T", "A23063T)", "S:Q999X", "AND A1T"])
+def test_malformed_queries_raise(index, bad):
+    with pytest.raises(ValueError):
+        index.query(bad)
+
+
+def test_index_from_database_mutations(tmp_path):
+    ref = "A" * 24000
+    sample = ref[:23062] + "T" + ref[23063:]
+    recs = [
+        CanonicalGenomeRecord("X1", "SARS-CoV-2", None, None, None, None, len(ref), sequence=sample),
+        CanonicalGenomeRecord("X2", "SARS-CoV-2", None, None, None, None, len(ref), sequence=ref),
+    ]
+    with GenomeDB(":memory:") as db:
+        db.insert_records(recs)
+        db.index_mutations(recs, lambda r: diff_sequences(ref, r.sequence))
+        index = MutationIndex.open(build_mutation_index(db.iter_mutations(), tmp_path / "idx"))
+
+    assert index.query("S:N501Y") == ["X1"]
+
+
+def test_rebuild_replaces_existing_index(tmp_path):
+    path = tmp_path / "idx"
+    build_mutation_index(CALLS, path)
+    build_mutation_index(CALLS[:1], path)
+    assert MutationIndex.open(path).query("A23063T") == ["G1"]
+    assert not (tmp_path / "idx.tmp").exists()
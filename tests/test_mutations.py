@@ -45,3 +45,18 @@ def test_diff_sequences_mutations_include_gene():
     muts = diff_sequences(ref, sample)
 
     assert muts == [Mutation(pos=21563, ref="C", alt="G", gene="S")]
+
+
+def test_diff_sequences_ignores_case_and_rna_alphabet():
+    assert diff_sequences("ACGT", "acgu") == []
+
+
+def test_diff_sequences_masks_iupac_ambiguity_codes():
+    # R (A/G) and Y (C/T) are as uncertain as N, on either side.
+    assert diff_sequences("ACGTA", "RYGTC") == [Mutation(pos=5, ref="A", alt="C")]
+    assert diff_sequences("AKGT", "ACGT") == []
+
+
+def test_diff_sequences_trusts_normalized_flag():
+    # A sample canonicalized at ingest is used as-is.
+    assert diff_sequences("ACGT", "AGGT", normalized=True) == [Mutation(pos=2, ref="C", alt="G")]
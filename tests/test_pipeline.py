@@ -0,0 +1,116 @@
+import graphlib
+import threading
+
+import pytest
+
+from src.ingest.models import CanonicalGenomeRecord
+from src.ingest.pipeline import Pipeline, Stage, content_hash, genome_stages, partition
+
+
+def _counting_stages(calls):
+    def track(name, fn):
+        def wrapped(*args):
+            calls.append(name)
+            return fn(*args)
+        return wrapped
+
+    return [
+        Stage("double", track("double", lambda xs: [x * 2 for x in xs])),
+        Stage("total", track("total", lambda xs: sum(xs)), deps=("double",)),
+        Stage("count", track("count", lambda xs: len(xs)), deps=("double",)),
+    ]
+
+
+def test_pipeline_runs_stages_in_dependency_order():
+    calls = []
+    result = Pipeline(_counting_stages(calls)).run({"a": [1, 2, 3]})
+
+    assert result.outputs == {"a": {"total": 12, "count": 3}}
+    assert calls[0] == "double" and sorted(calls[1:]) == ["count", "total"]
+
+
+def test_cached_stages_are_skipped_on_rerun(tmp_path):
+    calls = []
+    pipe = Pipeline(_counting_stages(calls), cache_dir=tmp_path)
+
+    first = pipe.run({"a": [1, 2], "b": [3]})
+    calls.clear()
+    second = pipe.run({"a": [1, 2], "b": [3]})
+
+    assert calls == []
+    assert second.outputs == first.outputs
+    assert all(r.cached for r in second.report.runs)
+    # Leaf artifacts were found, so the upstream "double" was never loaded.
+    assert {r.stage for r in second.report.runs} == {"total", "count"}
+
+
+def test_changed_partition_and_version_invalidate_only_affected_work(tmp_path):
+    calls = []
+    Pipeline(_counting_stages(calls), cache_dir=tmp_path).run({"a": [1, 2], "b": [3]})
+
+    calls.clear()
+    Pipeline(_counting_stages(calls), cache_dir=tmp_path).run({"a": [1, 2], "b": [4]})
+    assert sorted(calls) == ["count", "double", "total"]
+
+    calls.clear()
+    stages = _counting_stages(calls)
+    stages[1] = Stage("total", lambda xs: sum(xs) + 1, deps=("double",), version="2")
+    out = Pipeline(stages, cache_dir=tmp_path).run({"a": [1, 2]})
+    assert out.outputs["a"]["total"] == 7
+    assert calls == []  # "double" loaded from cache, "count" cached
+
+
+def test_partitions_run_concurrently():
+    barrier = threading.Barrier(3, timeout=5)
+
+    def wait(xs):
+        barrier.wait()  # deadlocks unless all three partitions are in flight together
+        return xs
+
+    result = Pipeline([Stage("wait", wait)], workers=3).run([[1], [2], [3]])
+    assert result.outputs == {0: {"wait": [1]}, 1: {"wait": [2]}, 2: {"wait": [3]}}
+
+
+def test_report_summarizes_time_and_throughput():
+    result = Pipeline(_counting_stages([])).run(partition(range(10), 4))
+
+    rows = {r["stage"]: r for r in result.report.summary()}
+    assert rows["double"]["items"] == 10
+    assert rows["double"]["partitions"] == 3
+    assert rows["total"]["cached"] == 0
+    assert "double" in result.report.format()
+
+
+def test_invalid_graphs_are_rejected():
+    with pytest.raises(ValueError):
+        Pipeline([Stage("a", len, deps=("missing",))])
+    with pytest.raises(graphlib.CycleError):
+        Pipeline([Stage("a", len, deps=("b",)), Stage("b", len, deps=("a",))])
+
+
+def test_content_hash_is_stable():
+    assert content_hash(["A", "B"]) == content_hash(["A", "B"])
+    assert content_hash(["A", "B"]) != content_hash(["B", "A"])
+
+
+def test_genome_stages_score_records(monkeypatch):
+    from src.ingest import pipeline
+
+    ref = "ACGT" * 300
+    sample = ref[:299] + "A" + ref[300:]  # position 300 is in ORF1ab (ref "T")
+
+    def fake_fetch(accessions, email):
+        return [
+            {"accession": a, "organism": "SARS-CoV-2", "sequence": sample}
+            for a in accessions
+        ]
+
+    monkeypatch.setattr(pipeline, "fetch_many_genbank_minimal", fake_fetch)
+    result = Pipeline(genome_stages("me@example.com", ref)).run(
+        {"batch": ["AAA1.1", "AAA2.1"]}, targets=["normalize", "genes", "score"]
+    )
+
+    out = result.outputs["batch"]
+    assert all(isinstance(r, CanonicalGenomeRecord) for r in out["normalize"])
+    assert out["genes"] == [["ORF1ab"], ["ORF1ab"]]
+    assert [s["score"] for s in out["score"]] == [1, 1]
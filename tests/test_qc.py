@@ -0,0 +1,40 @@
+from ingest.qc import QCThresholds, compute_qc, qc_failures
+
+
+def test_compute_qc_counts_ns_ambiguity_and_runs():
+    ref = "ACGTACGTAC"
+    sample = "ACNNNCGRAC"
+
+    m = compute_qc(sample, ref)
+
+    assert m.n_fraction == 0.3
+    assert m.ambiguous_bases == 1
+    assert m.longest_n_run == 3
+    assert m.reference_coverage == 0.6
+    assert m.reference_differences == 0
+
+
+def test_compute_qc_reference_differences_ignore_case_and_masked_bases():
+    ref = "ACGTACGTAC"
+    sample = "acgtTCGTAN"
+
+    m = compute_qc(sample, ref)
+
+    assert m.reference_differences == 1  # only position 5 (A -> T)
+    assert m.reference_coverage == 0.9
+
+
+def test_compute_qc_coverage_is_relative_to_reference_length():
+    m = compute_qc("ACGTA", "ACGTACGTAC")
+
+    assert m.reference_coverage == 0.5
+    assert m.n_fraction == 0.0
+
+
+def test_qc_failures_reports_each_exceeded_threshold():
+    m = compute_qc("N" * 80 + "A" * 20, "A" * 100)
+
+    failures = qc_failures(m, QCThresholds(max_n_fraction=0.5, max_longest_n_run=50))
+
+    assert failures == ["n_fraction=0.80", "longest_n_run=80", "reference_coverage=0.20"]
+    assert qc_failures(compute_qc("A" * 100, "A" * 100)) == []
@@ -0,0 +1,112 @@
+import json
+import random
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from ingest.analytics import summarize_genomes
+from ingest.genes import SARS_COV_2_GENES
+from ingest.models import CanonicalGenomeRecord
+from ingest.references import ReferenceRegistry
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def _random_seq(n, seed):
+    rng = random.Random(seed)
+    return "".join(rng.choice("ACGT") for _ in range(n))
+
+
+@pytest.fixture
+def registry(tmp_path):
+    reg = ReferenceRegistry(tmp_path / "refs")
+    reg.register("Virus alpha", "ALPHA1.1", _random_seq(3000, 1), [("A", 1, 1500), ("B", 1501, 3000)], aliases=["alpha"])
+    reg.register("Virus beta", "BETA1.1", _random_seq(2000, 2), [("X", 101, 1900)])
+    return reg
+
+
+def test_registry_round_trips_through_registry_json(registry):
+    reloaded = ReferenceRegistry(registry.root)
+    assert reloaded.organisms() == ["Virus alpha", "Virus beta"]
+    assert reloaded.resolve("ALPHA").accession == "ALPHA1.1"
+    assert reloaded.resolve("unknown virus") is None
+
+
+def test_artifacts_are_memory_mapped_and_rebuilt_when_stale(registry):
+    ref = registry.get("Virus alpha")
+    assert isinstance(ref.array, np.memmap)
+    assert ref.sequence == _random_seq(3000, 1)
+    assert np.all(np.diff(ref.kmer_codes.astype(np.int64)) >= 0)
+
+    spec = registry.resolve("alpha")
+    meta = registry._build_dir(spec) / "meta.json"
+    before = meta.read_text()
+    registry.pin(spec, _random_seq(3000, 99))
+    registry.build(spec)
+    assert meta.read_text() != before
+
+
+def test_opening_a_built_reference_skips_reading_the_fasta(registry, monkeypatch):
+    registry.get("alpha")  # built by register()
+    reopened = ReferenceRegistry(registry.root)
+
+    def fail(spec):
+        raise AssertionError("FASTA re-read although it is unchanged")
+
+    monkeypatch.setattr(reopened, "_read_sequence", fail)
+    ref = reopened.get("alpha")
+
+    assert ref.sequence is ref.sequence  # decoded once per Reference
+
+
+def test_kmer_index_locates_fragments(registry):
+    ref = registry.get("alpha")
+    seq = ref.sequence
+    assert 700 in ref.kmer_hits(seq[700:711]).tolist()
+    assert ref.locate(seq[1200:2400]) == 1200
+    assert ref.locate("N" * 50) is None
+
+
+def test_mixed_batch_is_routed_by_organism(registry):
+    alpha = registry.get("alpha").sequence
+    beta = registry.get("Virus beta").sequence
+
+    def flip(seq, i):
+        return seq[:i] + ("A" if seq[i] != "A" else "C") + seq[i + 1 :]
+
+    def rec(acc, organism, seq):
+        return CanonicalGenomeRecord(
+            accession=acc, organism=organism, collection_date=None, country=None,
+            region=None, host=None, sequence_length=len(seq), sequence=seq,
+        )
+
+    df = summarize_genomes(
+        [
+            rec("a1", "Virus alpha", flip(flip(alpha, 10), 2000)),
+            rec("b1", "virus BETA", flip(beta, 500)),
+            rec("c1", "Virus gamma", beta),
+        ],
+        references=registry,
+    ).set_index("accession")
+
+    assert df.loc["a1", "genes_affected"] == "A, B"
+    assert df.loc["a1", "num_mutations"] == 2
+    assert df.loc["b1", "genes_affected"] == "X"
+    assert not df.loc["c1", "scorable"]
+    assert df.loc["c1", "skip_reason"] == "missing_reference"
+
+
+def test_unpinned_reference_explains_how_to_fetch_it(tmp_path):
+    (tmp_path / "registry.json").write_text(
+        json.dumps({"references": [{"organism": "V", "accession": "V1.1", "fasta": "V1.1.fasta"}]})
+    )
+    with pytest.raises(FileNotFoundError, match="build_references"):
+        ReferenceRegistry(tmp_path).get("V")
+
+
+def test_repo_registry_pins_sars_cov_2():
+    reg = ReferenceRegistry(ROOT / "data" / "references")
+    spec = reg.resolve("SARS-CoV-2")
+    assert spec.accession == "NC_045512.2"
+    assert spec.genes == SARS_COV_2_GENES
@@ -0,0 +1,132 @@
+from ingest.scoring import ScoreCache, score_key
+
+
+def _counting_scorer(calls):
+    def fake_score_genome(rec):
+        calls.append(rec["accession"])
+        n = sum(a != b for a, b in zip(rec["sequence"], rec["reference_sequence"], strict=False))
+        return {
+            "accession": rec["accession"],
+            "source": rec.get("source", "genbank"),
+            "num_mutations": n,
+            "genes_affected": ["S"] if n else [],
+            "risk_score": float(n),
+            "risk_level": "Low",
+            "risk_explanation": f"{n} mutations",
+        }
+    return fake_score_genome
+
+
+def _records():
+    ref = "ACGT" * 500
+    variant = "T" + ref[1:]
+    return [
+        {"accession": "NC_045512.2", "sequence": ref},
+        {"accession": "A1", "sequence": variant},
+        {"accession": "A2", "sequence": variant},  # resubmission, same bytes
+        {"accession": "A3", "sequence": variant},
+    ]
+
+
+def test_identical_sequences_are_scored_once(monkeypatch):
+    import ingest.analytics as analytics
+
+    calls = []
+    monkeypatch.setattr(analytics, "score_genome", _counting_scorer(calls))
+    df = analytics.summarize_genomes(_records())
+
+    assert calls == ["NC_045512.2", "A1"]
+    assert df["accession"].tolist() == ["NC_045512.2", "A1", "A2", "A3"]
+    assert df["num_mutations"].tolist() == [0, 1, 1, 1]
+    assert df["qc_reference_differences"].tolist()[1:] == [1, 1, 1]
+
+
+def test_saved_cache_is_reused_across_runs(monkeypatch, tmp_path):
+    import ingest.analytics as analytics
+
+    calls = []
+    monkeypatch.setattr(analytics, "score_genome", _counting_scorer(calls))
+    cache = ScoreCache()
+    first = analytics.summarize_genomes(_records(), score_cache=cache)
+    cache.save(tmp_path / "scores.json")
+
+    calls.clear()
+    loaded = ScoreCache.load(tmp_path / "scores.json")
+    second = analytics.summarize_genomes(_records(), score_cache=loaded)
+
+    assert calls == []
+    assert loaded.hits == 4
+    assert second.equals(first)
+
+
+def test_cache_is_bounded_lru():
+    cache = ScoreCache(maxsize=2)
+    cache.put("a", {"num_mutations": 1})
+    cache.put("b", {"num_mutations": 2})
+    cache.get("a")  # "b" becomes least recently used
+    cache.put("c", {"num_mutations": 3})
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert len(cache) == 2
+
+
+def test_cache_keeps_only_sequence_dependent_fields():
+    cache = ScoreCache()
+    cache.put("k", {"accession": "X1", "source": "genbank", "num_mutations": 4})
+    assert cache.get("k") == {"num_mutations": 4}
+
+
+def test_score_key_depends_on_reference_and_sequence():
+    assert score_key("ACGT", "AAAA") == score_key("ACGT", "AAAA")
+    assert score_key("ACGT", "AAAA") != score_key("ACGT", "CCCC")
+    assert score_key("ACGT", "AAAA") != score_key("ACGA", "AAAA")
+
+
+def test_load_missing_or_corrupt_file_gives_empty_cache(tmp_path):
+    assert len(ScoreCache.load(tmp_path / "missing.json")) == 0
+    (tmp_path / "bad.json").write_text("{not json")
+    assert len(ScoreCache.load(tmp_path / "bad.json")) == 0
+
+
+def test_cache_saved_under_an_older_format_is_discarded(tmp_path):
+    import json
+
+    import ingest.scoring as scoring
+
+    path = tmp_path / "scores.json"
+    path.write_text(
+        json.dumps({"format": scoring._CACHE_FORMAT - 1, "entries": [["k", {"num_mutations": 9}]]}),
+        encoding="utf-8",
+    )
+
+    assert len(ScoreCache.load(path)) == 0
+
+
+def test_score_key_depends_on_gene_map_and_scoring_rules(monkeypatch):
+    import ingest.risk as risk
+    from ingest.genes import SARS_COV_2_GENES, GeneMap
+
+    default = score_key("ACGT", "AAAA")
+    assert score_key("ACGT", "AAAA", GeneMap(SARS_COV_2_GENES)) == default
+    assert score_key("ACGT", "AAAA", GeneMap([("S", 1, 4)])) != default
+
+    monkeypatch.setitem(risk._GENE_WEIGHTS, "S", 5)
+    import ingest.scoring as scoring
+
+    scoring._scoring_digest.cache_clear()
+    try:
+        assert score_key("ACGT", "AAAA") != default
+    finally:
+        monkeypatch.undo()
+        scoring._scoring_digest.cache_clear()
+
+
+def test_cached_values_are_not_shared_between_rows():
+    cache = ScoreCache()
+    cache.put("k", {"genes_affected": ["S"], "risk_by_gene": {"S": 1}})
+
+    first = cache.get("k")
+    first["genes_affected"].append("N")
+    first["risk_by_gene"]["N"] = 1
+
+    assert cache.get("k") == {"genes_affected": ["S"], "risk_by_gene": {"S": 1}}
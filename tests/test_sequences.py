@@ -0,0 +1,33 @@
+from src.ingest.flatfile import normalize_genbank_minimal
+from src.ingest.sequences import canonicalize_sequence, masked_lookup
+
+
+def test_canonicalize_sequence_folds_case_and_rna():
+    assert canonicalize_sequence("acgu NNry") == "ACGTNNRY"
+
+
+def test_canonicalize_sequence_strips_whitespace_and_digits():
+    assert canonicalize_sequence("1 acgt\n61 ACGT\r\n") == "ACGTACGT"
+
+
+def test_canonicalize_sequence_keeps_gaps_and_masks_unknown_symbols():
+    assert canonicalize_sequence("AC-G.T*X?é") == "AC-G-TNNNN"
+
+
+def test_canonicalize_sequence_empty():
+    assert canonicalize_sequence("") == ""
+    assert canonicalize_sequence(None) == ""
+
+
+def test_masked_lookup_covers_n_and_ambiguity_codes_only():
+    masked = {chr(i) for i in range(256) if masked_lookup()[i]}
+    assert masked == set("NRYKMSWBDHV")
+
+
+def test_normalize_genbank_minimal_canonicalizes_once():
+    rec = normalize_genbank_minimal(
+        {"accession": "X1", "organism": "SARS-CoV-2", "sequence": " acgu\nnnr "}
+    )
+    assert rec.sequence == "ACGTNNR"
+    assert rec.sequence_length == 7
+    assert rec.normalized is True
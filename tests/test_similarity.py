@@ -0,0 +1,57 @@
+from pathlib import Path
+
+from ingest.mutations import Mutation
+from ingest.similarity import MinHashIndex, update_index_file
+
+
+def _muts(*positions: int) -> list[Mutation]:
+    return [Mutation(pos=p, ref="A", alt="G") for p in positions]
+
+
+def test_query_returns_identical_genome_first_with_zero_distance():
+    index = MinHashIndex()
+    index.add("G1", _muts(100, 200, 300, 400))
+    index.add("G2", _muts(100, 200, 300, 401))
+    index.add("G3", _muts(5000, 6000, 7000))
+
+    hits = index.query(_muts(100, 200, 300, 400), k=2)
+
+    assert hits[0] == ("G1", 0.0)
+    assert [a for a, _ in hits] == ["G1", "G2"]
+    assert 0.0 < hits[1][1] < 1.0
+
+
+def test_query_does_not_return_unrelated_genomes():
+    index = MinHashIndex()
+    index.add("G1", _muts(*range(100, 140)))
+
+    assert index.query(_muts(*range(9000, 9040)), k=5) == []
+
+
+def test_readding_an_accession_replaces_its_signature():
+    index = MinHashIndex()
+    index.add("G1", _muts(1, 2, 3))
+    index.add("G1", _muts(7, 8, 9))
+
+    assert len(index) == 1
+    assert index.query(_muts(7, 8, 9), k=1) == [("G1", 0.0)]
+
+
+def test_duplicate_accession_within_one_batch_keeps_the_last():
+    index = MinHashIndex()
+    index.add_many([("G1", _muts(1, 2, 3)), ("G2", _muts(4, 5, 6)), ("G1", _muts(7, 8, 9))])
+
+    assert len(index) == 2
+    assert index.query(_muts(7, 8, 9), k=1) == [("G1", 0.0)]
+    assert index.query(_muts(4, 5, 6), k=1) == [("G2", 0.0)]
+
+
+def test_index_round_trips_and_updates_incrementally(tmp_path: Path):
+    p = tmp_path / "minhash.npz"
+
+    update_index_file(p, [("G1", _muts(10, 20, 30))])
+    index = update_index_file(p, [("G2", _muts(10, 20, 31))])
+
+    loaded = MinHashIndex.load(p)
+    assert len(loaded) == 2 == len(index)
+    assert loaded.query(_muts(10, 20, 30), k=1) == [("G1", 0.0)]
@@ -0,0 +1,71 @@
+from pathlib import Path
+
+from ingest.models import CanonicalGenomeRecord
+from ingest.store import SegmentStore, split_version
+
+
+def _rec(accession: str, sequence: str = "ACGT") -> CanonicalGenomeRecord:
+    return CanonicalGenomeRecord(
+        accession=accession,
+        organism="Virus",
+        collection_date=None,
+        country=None,
+        region=None,
+        host=None,
+        sequence_length=len(sequence),
+        sequence=sequence,
+    )
+
+
+def test_split_version():
+    assert split_version("NC_045512.2") == ("NC_045512", 2)
+    assert split_version("PX908454") == ("PX908454", 0)
+
+
+def test_append_writes_new_segments_and_skips_duplicates(tmp_path: Path):
+    store = SegmentStore(tmp_path)
+
+    assert store.append([_rec("A.1"), _rec("B.1")]) == 2
+    assert store.append([_rec("A.1"), _rec("C.1")]) == 1
+    assert store.append([_rec("A.1")]) == 0
+
+    assert store.segments() == ["segment-000001.ndjson", "segment-000002.ndjson"]
+    assert sorted(r.accession for r in store.iter_records()) == ["A.1", "B.1", "C.1"]
+
+
+def test_newer_version_supersedes_older(tmp_path: Path):
+    store = SegmentStore(tmp_path)
+    store.append([_rec("A.1", "AAAA")])
+    store.append([_rec("A.2", "CCCC"), _rec("A.1", "GGGG")])
+
+    assert [r.accession for r in store.iter_records()] == ["A.2"]
+    assert store.get("A").sequence == "CCCC"
+    assert "A.1" in store and "A.3" not in store
+
+
+def test_manifest_is_reloaded_on_reopen(tmp_path: Path):
+    SegmentStore(tmp_path).append([_rec("A.1"), _rec("B.1")])
+
+    reopened = SegmentStore(tmp_path)
+
+    assert len(reopened) == 2
+    assert reopened.append([_rec("B.1")]) == 0
+
+
+def test_compaction_merges_segments_and_drops_superseded(tmp_path: Path):
+    store = SegmentStore(tmp_path)
+    store.append([_rec("A.1"), _rec("B.1")])
+    store.append([_rec("A.2")])
+    store.append([_rec("C.1")])
+
+    store.compact_in_background().join()
+
+    assert store.segments() == ["segment-000004.ndjson"]
+    assert sorted(r.accession for r in store.iter_records()) == ["A.2", "B.1", "C.1"]
+    lines = (tmp_path / "segments" / "segment-000004.ndjson").read_text().splitlines()
+    assert len(lines) == 3
+
+    reopened = SegmentStore(tmp_path)
+    assert reopened.get("B.1").accession == "B.1"
+    assert reopened.append([_rec("D.1")]) == 1
+    assert reopened.segments()[-1] == "segment-000005.ndjson"
@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+from datetime import date
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import pytest
+
+from ingest.analytics import (
+    iter_summary_batches,
+    iter_summary_frames,
+    summarize_genomes,
+    summary_schema,
+    write_summary_parquet,
+)
+
+REF = "ACGT" * 500
+
+
+def _records(n):
+    out = []
+    for i in range(n):
+        seq = REF[:99] + "A" + REF[100:] if i % 2 else REF  # position 100 is in ORF1ab
+        out.append(
+            {
+                "accession": f"S{i}",
+                "source": "genbank",
+                "sequence": seq,
+                "collection_date": date(2021, 1, 1 + i % 28) if i % 3 else "2021-05",
+                "lat": 1.5 if i % 4 == 0 else None,
+                "lon": 2.5 if i % 4 == 0 else None,
+            }
+        )
+    out.append({"accession": "SHORT", "sequence": "ACGT"})
+    return out
+
+
+def test_batches_are_chunked_and_typed():
+    batches = list(iter_summary_batches(iter(_records(9)), chunk_size=4, reference_sequence=REF))
+
+    assert [b.num_rows for b in batches] == [4, 4, 2]
+    schema = batches[0].schema
+    assert schema == summary_schema()
+    assert pa.types.is_dictionary(schema.field("risk_level").type)
+    assert pa.types.is_dictionary(schema.field("genes_affected").type)
+    assert schema.field("date").type == pa.date64()
+    assert schema.field("lat").type == pa.float32()
+
+    table = pa.Table.from_batches(batches)
+    assert table.column("date")[3].as_py() == date(2021, 5, 1)
+    assert table.column("skip_reason")[9].as_py() == "too_short (4)"
+
+
+def test_chunks_match_summarize_genomes():
+    records = [{"accession": "NC_045512.2", "sequence": REF}, *_records(7)]
+    full = summarize_genomes(records)
+    frames = list(iter_summary_frames(records, chunk_size=3, reference_sequence=REF))
+    chunked = pd.concat(frames, ignore_index=True)
+
+    assert all(isinstance(f["risk_level"].dtype, pd.CategoricalDtype) for f in frames)
+    for col in ("accession", "scorable", "num_mutations", "risk_score", "skip_reason"):
+        assert chunked[col].tolist() == full[col].tolist()
+    assert chunked["genes_affected"].tolist() == full["genes_affected"].tolist()
+
+
+def test_write_summary_parquet_streams_row_groups(tmp_path):
+    path = tmp_path / "summary" / "part-0.parquet"
+    n = write_summary_parquet(_records(9), path, chunk_size=4, reference_sequence=REF)
+
+    assert n == 10
+    meta = pq.ParquetFile(path).metadata
+    assert meta.num_row_groups == 3
+    df = pd.read_parquet(path)
+    assert len(df) == 10
+    assert df["lat"].dtype == "float32"
+    assert not list(tmp_path.glob("**/*.tmp"))
+
+
+def test_streaming_requires_an_explicit_reference():
+    with pytest.raises(ValueError):
+        next(iter_summary_batches(_records(1)))